@@ -0,0 +1,212 @@
+"""
+Synthetic CBF-style borderôs for the benchmarks.
+
+Every match id maps deterministically (seed + id) to a consistent extraction: teams,
+stadium, attendance and revenue/expense line items whose sums match the totals. The
+PDF is a small but valid single-page document with the borderô text, and carries the
+extraction base64-encoded in a comment line so the fake Gemini server can answer with
+the ground truth without parsing the page.
+
+Team and stadium names come with spelling variants (upper case, missing accents,
+suffixes) so the normalization stage has real work to do.
+"""
+import json
+import base64
+import random
+import hashlib
+import unicodedata
+import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+EXTRACT_MARKER = b"%CBF-BENCH "
+# Competition code -> (name, number of matches per season), the defaults of config/competitions.json
+COMPETITIONS = {
+    "142": ("Campeonato Brasileiro - Série A", 380),
+    "424": ("Copa do Brasil", 150),
+    "242": ("Campeonato Brasileiro - Série B", 380),
+}
+TEAMS = [
+    "Flamengo", "Palmeiras", "Corinthians", "São Paulo", "Grêmio", "Internacional", "Atlético Mineiro", "Cruzeiro",
+    "Fluminense", "Botafogo", "Vasco da Gama", "Santos", "Bahia", "Fortaleza", "Ceará", "Sport", "Vitória",
+    "Juventude", "Athletico Paranaense", "Coritiba", "Goiás", "Atlético Goianiense", "Cuiabá", "Bragantino",
+    "América Mineiro", "Chapecoense", "Avaí", "Criciúma", "Ponte Preta", "Guarani", "Paysandu", "Remo",
+    "Náutico", "Santa Cruz", "CRB", "CSA", "Vila Nova", "Operário", "Novorizontino", "Mirassol",
+]
+STADIUMS = [
+    "Maracanã", "Allianz Parque", "Neo Química Arena", "Morumbis", "Arena do Grêmio", "Beira-Rio", "Arena MRV",
+    "Mineirão", "Nilton Santos", "São Januário", "Vila Belmiro", "Fonte Nova", "Castelão", "Ilha do Retiro",
+    "Barradão", "Alfredo Jaconi", "Ligga Arena", "Couto Pereira", "Serrinha", "Antônio Accioly", "Arena Pantanal",
+    "Nabi Abi Chedid", "Independência", "Arena Condá", "Ressacada", "Heriberto Hülse", "Moisés Lucarelli",
+]
+REVENUE_SOURCES = ["Inteira", "Meia-entrada", "Sócio Torcedor", "Cadeira Especial", "Camarote"]
+EXPENSE_CATEGORIES = [
+    "Arbitragem", "Policiamento", "Segurança privada", "Bilheteria", "Limpeza", "Ambulância",
+    "Aluguel do estádio", "INSS", "Federação", "Gandulas",
+]
+
+
+def _variant(rng: random.Random, name: str) -> str:
+    """Raw spelling as a borderô might print it (canonical most of the time)."""
+    roll = rng.random()
+    if roll < 0.7:
+        return name
+    if roll < 0.8:
+        return name.upper()
+    if roll < 0.9:
+        return "".join(c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c))
+    return f"{name} - {rng.choice(['SP', 'RJ', 'MG', 'RS', 'BA', 'PR'])}"
+
+
+def match_ids(year: int, competition_code: str) -> List[str]:
+    """Match ids in the order generate_urls lists the URLs (file stem without the year suffix)."""
+    if competition_code == "142":
+        return [f"142{round_number}{match}b" for round_number in range(1, 39) for match in range(10)]
+    _, matches = COMPETITIONS[competition_code]
+    return [f"{competition_code}{number}b" for number in range(1, matches + 1)]
+
+
+def plan_matches(count: int, last_year: int = 2025) -> List[Tuple[int, str]]:
+    """
+    (year, competition) pairs, newest season first, whose matches add up to at least count.
+
+    download_pdfs works on a whole competition season, so sizes are rounded up to it.
+    """
+    plan, total, year = [], 0, last_year
+    while total < count:
+        for code, (_, matches) in COMPETITIONS.items():
+            if total >= count:
+                break
+            plan.append((year, code))
+            total += matches
+        year -= 1
+    return plan
+
+
+def match_extract(match_id: str, year: int, seed: int = 0) -> Dict:
+    """The ground-truth PDFExtract-shaped dict of a synthetic match."""
+    rng = random.Random(int.from_bytes(hashlib.sha1(f"{seed}:{year}:{match_id}".encode()).digest()[:8], "big"))
+    competition_code = match_id[:3]
+    home, away = rng.sample(TEAMS, 2)
+    match_date = datetime.date(year, 2, 1) + datetime.timedelta(days=rng.randrange(300))
+
+    paid = rng.randrange(500, 60000)
+    non_paid = rng.randrange(0, 3000)
+    sources = rng.sample(REVENUE_SOURCES, rng.randint(2, len(REVENUE_SOURCES)))
+    weights = [rng.random() for _ in sources]
+    quantities = [int(paid * w / sum(weights)) for w in weights]
+    quantities[0] += paid - sum(quantities) # Ticket quantities add up to the paid attendance
+    revenue_details = []
+    for source, quantity in zip(sources, quantities):
+        price = float(rng.choice([10, 20, 30, 40, 60, 80, 100, 150]))
+        revenue_details.append({"source": source, "quantity": quantity, "price": price, "amount": round(quantity * price, 2)})
+    gross_revenue = round(sum(item["amount"] for item in revenue_details), 2)
+    expense_details = [
+        {"category": category, "amount": round(rng.uniform(1000, 60000), 2)}
+        for category in rng.sample(EXPENSE_CATEGORIES, rng.randint(4, 8))
+    ]
+    total_expenses = round(sum(item["amount"] for item in expense_details), 2)
+    return {
+        "match_details": {
+            "home_team": _variant(rng, home),
+            "away_team": _variant(rng, away),
+            "match_date": match_date.isoformat(),
+            "stadium": _variant(rng, rng.choice(STADIUMS)),
+            "competition": COMPETITIONS.get(competition_code, (f"Competição {competition_code}", 0))[0],
+        },
+        "financial_data": {
+            "gross_revenue": gross_revenue,
+            "total_expenses": total_expenses,
+            "net_result": round(gross_revenue - total_expenses, 2),
+            "revenue_details": revenue_details,
+            "expense_details": expense_details,
+        },
+        "audience_statistics": {
+            "paid_attendance": paid,
+            "non_paid_attendance": non_paid,
+            "total_attendance": paid + non_paid,
+        },
+    }
+
+
+def _brl(value: float) -> str:
+    # Borderôs print 1.234.567,89, which is what gemini.fallback_extract parses
+    return f"{value:,.2f}".translate(str.maketrans(",.", ".,"))
+
+
+def _pdf_text(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_pdf(extract: Dict, padding: int = 0) -> bytes:
+    """
+    Renders an extraction as a single-page PDF (Helvetica text lines, WinAnsi encoding).
+
+    Args:
+        padding (int): Extra bytes of filler stream content, to emulate bigger scanned borderôs.
+    """
+    details, financial, audience = extract["match_details"], extract["financial_data"], extract["audience_statistics"]
+    lines = [
+        "BORDERO FINANCEIRO",
+        f"{details['competition']}",
+        f"{details['home_team']} x {details['away_team']} - {details['match_date']}",
+        f"Estadio: {details['stadium']}",
+        f"Publico Pagante: {audience['paid_attendance']}  Nao Pagante: {audience['non_paid_attendance']}  "
+        f"Total: {audience['total_attendance']}",
+    ]
+    lines += [f"{r['source']}: {r['quantity']} x {_brl(r['price'])} = {_brl(r['amount'])}" for r in financial["revenue_details"]]
+    lines.append(f"Receita Bruta Total: {_brl(financial['gross_revenue'])}")
+    lines += [f"{e['category']}: {_brl(e['amount'])}" for e in financial["expense_details"]]
+    lines.append(f"Despesa Total: {_brl(financial['total_expenses'])}")
+    lines.append(f"Resultado Liquido: {_brl(financial['net_result'])}")
+
+    content = "BT /F1 10 Tf 40 800 Td 14 TL\n" + "".join(f"({_pdf_text(line)}) '\n" for line in lines) + "ET\n"
+    content_bytes = content.encode("cp1252", errors="replace") + (b"%" + b"0" * (padding - 2) + b"\n" if padding > 2 else b"")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Length " + str(len(content_bytes)).encode() + b" >>\nstream\n" + content_bytes + b"\nendstream",
+    ]
+    payload = base64.b64encode(json.dumps(extract, ensure_ascii=False).encode("utf-8"))
+    out = bytearray(b"%PDF-1.4\n" + EXTRACT_MARKER + payload + b"\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def embedded_extract(pdf_bytes: bytes) -> Optional[Dict]:
+    """Reads back the extraction render_pdf embedded (None for other PDFs)."""
+    start = pdf_bytes.find(EXTRACT_MARKER, 0, 64)
+    if start < 0:
+        return None
+    start += len(EXTRACT_MARKER)
+    return json.loads(base64.b64decode(pdf_bytes[start:pdf_bytes.index(b"\n", start)]))
+
+
+def iter_corpus(count: int, seed: int = 0, last_year: int = 2025) -> Iterator[Tuple[str, int, bytes]]:
+    """Yields (file name, year, PDF bytes) for the first count matches of plan_matches(count)."""
+    produced = 0
+    for year, code in plan_matches(count, last_year):
+        for match_id in match_ids(year, code):
+            if produced >= count:
+                return
+            yield f"{match_id}_{year}.pdf", year, render_pdf(match_extract(match_id, year, seed))
+            produced += 1
+
+
+def write_corpus(pdf_dir: Path, count: int, seed: int = 0) -> int:
+    """Writes count synthetic PDFs named like download_pdfs does; returns the bytes written."""
+    pdf_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for file_name, _, pdf_bytes in iter_corpus(count, seed):
+        (pdf_dir / file_name).write_bytes(pdf_bytes)
+        written += len(pdf_bytes)
+    return written
@@ -0,0 +1,134 @@
+"""
+Memory and load-time benchmark of the dashboard dataset on a synthetic multi-season CSV.
+
+Compares a plain pandas load (object strings, float64, weekday names via day_name())
+with the typed MatchDataset loader, and times an incremental reload after one appended match.
+
+    python -m benchmarks.dashboard_dataset --seasons 10 --matches-per-season 4000
+"""
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import datetime
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.dataset import MatchDataset
+
+HEADER = [
+    "id_jogo_cbf", "data_jogo", "time_mandante", "time_visitante", "estadio", "competicao",
+    "publico_pagante", "publico_nao_pagante", "publico_total",
+    "receita_bruta_total", "despesa_total", "resultado_liquido",
+    "caminho_pdf_local", "data_processamento", "status", "log_erro"
+]
+
+
+def _match_row(rng: random.Random, season: int, number: int, teams, stadiums, competitions) -> list:
+    competition_code = rng.randrange(len(competitions))
+    home, away = rng.sample(teams, 2)
+    match_date = datetime.date(season, 1, 15) + datetime.timedelta(days=rng.randrange(320))
+    paid = rng.randrange(0, 60000)
+    non_paid = rng.randrange(0, 3000)
+    revenue = round(paid * rng.uniform(10, 120), 2)
+    expenses = round(revenue * rng.uniform(0.2, 1.4) + 20000, 2)
+    match_id = f"{100 + competition_code}{number:05d}_{season}"
+    return [
+        match_id, match_date.isoformat(), home, away, rng.choice(stadiums), competitions[competition_code],
+        paid, non_paid, paid + non_paid, revenue, expenses, round(revenue - expenses, 2),
+        f"pdfs\\{match_id}.pdf", f"{season}-12-01", "Sucesso", "",
+    ]
+
+
+def write_synthetic_csv(path: Path, seasons: int, matches_per_season: int, seed: int = 42):
+    """Writes a clean-CSV-shaped file with realistic cardinalities (teams, stadiums, competitions)."""
+    rng = random.Random(seed)
+    teams = [f"Clube {i:03d}" for i in range(600)]
+    stadiums = [f"Estádio {i:03d}" for i in range(350)]
+    competitions = [f"Competição {i:02d}" for i in range(40)]
+    first_season = datetime.date.today().year - seasons + 1
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for season in range(first_season, first_season + seasons):
+            for number in range(matches_per_season):
+                writer.writerow(_match_row(rng, season, number, teams, stadiums, competitions))
+    return rng, teams, stadiums, competitions
+
+
+def plain_load(path: Path) -> pd.DataFrame:
+    """The previous dashboard loader: default dtypes plus derived columns."""
+    data = pd.read_csv(path)
+    data['data_jogo'] = pd.to_datetime(data['data_jogo'], errors='coerce')
+    for col in ['receita_bruta_total', 'publico_total', 'resultado_liquido']:
+        data[col] = pd.to_numeric(data[col], errors='coerce')
+    data['ticket_medio'] = (data['receita_bruta_total'] / data['publico_total']).replace([np.inf, -np.inf], np.nan).fillna(0)
+    data['margem_liquida'] = (data['resultado_liquido'] / data['receita_bruta_total']).replace([np.inf, -np.inf], np.nan).fillna(0)
+    data['dia_semana_en'] = data['data_jogo'].dt.day_name()
+    data['dia_semana_pt'] = data['dia_semana_en'].map({
+        'Monday': 'Segunda-feira', 'Tuesday': 'Terça-feira', 'Wednesday': 'Quarta-feira', 'Thursday': 'Quinta-feira',
+        'Friday': 'Sexta-feira', 'Saturday': 'Sábado', 'Sunday': 'Domingo'})
+    return data
+
+
+def _timed(func, repeat: int):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(seasons: int, matches_per_season: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "jogos_resumo_clean.csv"
+        rng, teams, stadiums, competitions = write_synthetic_csv(path, seasons, matches_per_season)
+
+        plain_s, plain = _timed(lambda: plain_load(path), repeat)
+        typed_s, typed = _timed(lambda: MatchDataset(path).load(), repeat)
+
+        dataset = MatchDataset(path)
+        dataset.load()
+        with open(path, 'a', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerow(_match_row(rng, datetime.date.today().year, 99999, teams, stadiums, competitions))
+        start = time.perf_counter()
+        dataset.load()
+        append_s = time.perf_counter() - start
+
+        return {
+            "rows": len(plain),
+            "file_mb": round(path.stat().st_size / 1e6, 2),
+            "plain": {"load_s": round(plain_s, 4), "memory_mb": round(plain.memory_usage(deep=True).sum() / 1e6, 2)},
+            "typed": {"load_s": round(typed_s, 4), "memory_mb": round(typed.memory_usage(deep=True).sum() / 1e6, 2)},
+            "typed_append_one_s": round(append_s, 4),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--matches-per-season", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N load timings")
+    parser.add_argument("--output", type=Path, help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    results = run(args.seasons, args.matches_per_season, args.repeat)
+    print(f"{results['rows']} matches, {results['file_mb']} MB CSV")
+    print(f"{'loader':<8}{'load (s)':>10}{'memory (MB)':>14}")
+    for name in ("plain", "typed"):
+        print(f"{name:<8}{results[name]['load_s']:>10.3f}{results[name]['memory_mb']:>14.2f}")
+    print(f"typed reload after one appended match: {results['typed_append_one_s']:.4f} s")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+
+if __name__ == "__main__":
+    main()
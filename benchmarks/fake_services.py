@@ -0,0 +1,213 @@
+"""
+Local stand-ins for conteudo.cbf.com.br and the Gemini API, for the benchmarks.
+
+FakeCBFServer serves synthetic borderôs at /sumulas/<year>/<match id>.pdf (point
+CBF_BASE_URL at its base_url). FakeGeminiServer answers generateContent calls (point
+GEMINI_BASE_URL at it): PDF extractions return the extraction embedded by
+corpus.render_pdf, name normalization prompts return a mapping to the corpus'
+canonical names and line-item classification prompts return an empty bucket. Both
+can add latency and fail a fraction of the requests.
+"""
+import re
+import json
+import time
+import base64
+import random
+import threading
+import unicodedata
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import STADIUMS, TEAMS, embedded_extract, match_extract, render_pdf
+
+CBF_PATH = re.compile(r"^/sumulas/(\d{4})/(\w+)\.pdf$")
+GEMINI_PATH = re.compile(r"^/[^/]+/models/([^/:]+):generateContent$")
+
+
+def _fold(name: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c)).casefold()
+
+
+CANONICAL = {_fold(name): name for name in TEAMS + STADIUMS}
+
+
+class _FakeServer:
+    """Runs a ThreadingHTTPServer on a free local port in a daemon thread; use as a context manager."""
+
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self, latency_s: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.seed = seed
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _roll(self) -> float:
+        with self._lock:
+            self.requests += 1
+            return self._rng.random()
+
+    def _delay(self):
+        if self.latency_s:
+            time.sleep(self.latency_s * (0.5 + self._rng.random())) # +-50% jitter
+
+    def start(self):
+        fake = self
+
+        class Handler(self.handler_class):
+            server_fake = fake
+
+            def log_message(self, *args):
+                pass # Keep benchmark output clean
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class _CBFHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        fake = self.server_fake
+        match = CBF_PATH.match(self.path)
+        roll = fake._roll()
+        fake._delay()
+        if not match or roll < fake.missing_rate:
+            self.send_error(404) # Matches not played yet
+            return
+        if roll < fake.missing_rate + fake.error_rate:
+            with fake._lock:
+                fake.errors += 1
+            self.send_error(503)
+            return
+        year, match_id = int(match.group(1)), match.group(2)
+        body = render_pdf(match_extract(match_id, year, fake.seed), padding=fake.padding)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeCBFServer(_FakeServer):
+    """
+    Serves the synthetic corpus.
+
+    Args:
+        missing_rate (float): Fraction of URLs answered with 404.
+        error_rate (float): Fraction answered with 503.
+        padding (int): Filler bytes added to every PDF.
+    """
+    handler_class = _CBFHandler
+
+    def __init__(self, latency_s: float = 0.0, error_rate: float = 0.0, missing_rate: float = 0.0,
+                 padding: int = 0, seed: int = 0):
+        super().__init__(latency_s, error_rate, seed)
+        self.missing_rate = missing_rate
+        self.padding = padding
+
+    @property
+    def sumulas_url(self) -> str:
+        return f"{self.base_url}/sumulas"
+
+
+def _json_after(text: str, label: str):
+    """Decodes the JSON value that follows label in a prompt (None when absent)."""
+    start = text.find(label)
+    if start < 0:
+        return None
+    start = min((i for i in (text.find("[", start), text.find("{", start)) if i >= 0), default=-1)
+    if start < 0:
+        return None
+    return json.JSONDecoder().raw_decode(text[start:])[0]
+
+
+def normalization_answer(names: List[str]) -> Dict[str, str]:
+    """Maps raw corpus spellings back to their canonical name (what a good model would do)."""
+    answer = {}
+    for name in names:
+        base = re.sub(r" - [A-Z]{2}$", "", name)
+        answer[name] = CANONICAL.get(_fold(base), base)
+    return answer
+
+
+class _GeminiHandler(BaseHTTPRequestHandler):
+    def _reply(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        fake = self.server_fake
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        roll = fake._roll()
+        fake._delay()
+        if not GEMINI_PATH.match(self.path.split("?")[0]):
+            self._reply(404, {"error": {"code": 404, "message": f"Unknown path {self.path}", "status": "NOT_FOUND"}})
+            return
+        if roll < fake.error_rate:
+            with fake._lock:
+                fake.errors += 1
+            # Half quota errors, half server errors, like a busy day on the real API
+            if roll < fake.error_rate / 2:
+                self._reply(429, {"error": {"code": 429, "message": "Resource has been exhausted (e.g. check quota).",
+                                            "status": "RESOURCE_EXHAUSTED"}})
+            else:
+                self._reply(500, {"error": {"code": 500, "message": "Internal error encountered.", "status": "INTERNAL"}})
+            return
+
+        parts = [part for content in request.get("contents", []) for part in content.get("parts", [])]
+        texts = [part["text"] for part in parts if "text" in part]
+        pdfs = [part.get("inlineData") or part.get("inline_data") for part in parts
+                if "inlineData" in part or "inline_data" in part]
+        prompt = "\n".join(texts)
+        if pdfs:
+            data = pdfs[0]["data"] # The SDK sends URL-safe base64 without padding
+            answer = embedded_extract(base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))) or {}
+        elif "New names to normalize:" in prompt:
+            answer = normalization_answer(_json_after(prompt, "New names to normalize:") or [])
+        else:
+            answer = {item: "" for item in (_json_after(prompt, "Items:") or [])}
+        text = json.dumps(answer, ensure_ascii=False)
+        prompt_tokens = sum(len(t) for t in texts) // 4 + (258 if pdfs else 0) # 258 tokens per PDF page
+        self._reply(200, {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": len(text) // 4,
+                              "totalTokenCount": prompt_tokens + len(text) // 4},
+        })
+
+
+class FakeGeminiServer(_FakeServer):
+    """
+    Answers generateContent for any model.
+
+    Args:
+        error_rate (float): Fraction of calls failing, half with 429 RESOURCE_EXHAUSTED and half with 500.
+    """
+    handler_class = _GeminiHandler
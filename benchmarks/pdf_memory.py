@@ -0,0 +1,204 @@
+"""
+Memory benchmark of PDF input handling: read() copies vs memory-mapped PdfSource.
+
+Each mode runs in its own subprocess over the same corpus (pdfs/ by default, or a
+synthetic one with --synthetic N) with --workers threads, doing per PDF what the
+pipeline does with the content:
+
+    hash     sha256 of the content
+    parse    the fallback parser's pdfplumber pass (gemini.fallback_extract's input path)
+    upload   types.Part.from_bytes + the base64 encoding the SDK does for inline data
+
+    read     f.read() into bytes, BytesIO for pdfplumber (the previous process_pdfs path)
+    mmap     PdfSource view, pdf_stream for pdfplumber, as_bytes only for the upload
+
+Reported per mode: peak traced Python allocations (tracemalloc), peak private resident
+memory (RssAnon, Linux only, sampled) and peak RSS (ru_maxrss, includes mapped file pages
+that the page cache shares). Results go to benchmarks/results/pdf_memory_<timestamp>.json.
+
+    python -m benchmarks.pdf_memory --workers 8
+    python -m benchmarks.pdf_memory --synthetic 500 --padding 2000000 --steps hash,upload
+"""
+import io
+import sys
+import json
+import time
+import base64
+import hashlib
+import argparse
+import datetime
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+MODES = ("read", "mmap")
+STEPS = ("hash", "parse", "upload")
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+
+def _rss_anon_kb() -> Optional[int]:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1e6 if sys.platform == "darwin" else 1e3) # Bytes on macOS, KB elsewhere
+
+
+class _AnonSampler(threading.Thread):
+    """Tracks the peak RssAnon while the workload runs (ru_maxrss cannot tell private from mapped pages)."""
+
+    def __init__(self, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_kb = _rss_anon_kb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            current = _rss_anon_kb()
+            if current is not None and current > (self.peak_kb or 0):
+                self.peak_kb = current
+
+    def stop(self) -> Optional[int]:
+        self._stop_event.set()
+        self.join()
+        return self.peak_kb
+
+
+def _handle(path: Path, mode: str, steps: List[str]) -> int:
+    import pdfplumber
+    from google.genai import types
+    from src.pdf_io import PdfSource, as_bytes, pdf_stream
+
+    def use(content, stream_factory, upload_bytes):
+        if "hash" in steps:
+            hashlib.sha256(content).hexdigest()
+        if "parse" in steps:
+            with stream_factory() as stream, pdfplumber.open(stream) as pdf:
+                for page in pdf.pages:
+                    page.extract_text()
+        if "upload" in steps:
+            part = types.Part.from_bytes(data=upload_bytes(), mime_type="application/pdf")
+            base64.urlsafe_b64encode(part.inline_data.data)
+
+    if mode == "read":
+        with open(path, "rb") as f:
+            content = f.read()
+        use(content, lambda: io.BytesIO(content), lambda: content)
+        return len(content)
+    with PdfSource(path) as source:
+        use(source.view, lambda: pdf_stream(source.view), lambda: as_bytes(source.view))
+        return source.size
+
+
+def run_mode(pdf_dir: Path, mode: str, steps: List[str], workers: int, limit: Optional[int]) -> dict:
+    """Runs one mode in this process and returns its measurements."""
+    import src.pdf_io # noqa: F401  Imports before the baseline so they are not counted
+    import pdfplumber # noqa: F401
+    from google.genai import types # noqa: F401
+
+    paths = sorted(pdf_dir.glob("*.pdf"))[:limit]
+    baseline_anon = _rss_anon_kb()
+    sampler = _AnonSampler()
+    sampler.start()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        total_bytes = sum(pool.map(lambda p: _handle(p, mode, steps), paths))
+    seconds = time.perf_counter() - started
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_anon = sampler.stop()
+    return {
+        "mode": mode,
+        "pdfs": len(paths),
+        "corpus_mb": round(total_bytes / 1e6, 2),
+        "seconds": round(seconds, 3),
+        "peak_traced_mb": round(peak_traced / 1e6, 2),
+        "peak_anon_mb": round((peak_anon - baseline_anon) / 1e3, 2) if peak_anon and baseline_anon else None,
+        "max_rss_mb": _max_rss_mb(),
+    }
+
+
+def print_table(results: List[dict]):
+    print(f"{'mode':<6}{'pdfs':>7}{'seconds':>10}{'traced MB':>12}{'anon MB':>10}{'max RSS MB':>12}")
+    for r in results:
+        print(f"{r['mode']:<6}{r['pdfs']:>7}{r['seconds']:>10.2f}{r['peak_traced_mb']:>12.2f}"
+              f"{r['peak_anon_mb'] if r['peak_anon_mb'] is not None else '-':>10}{r['max_rss_mb'] or '-':>12}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", type=Path, default=ROOT / "pdfs")
+    parser.add_argument("--synthetic", type=int, help="Benchmark N synthetic borderôs instead of --pdf-dir")
+    parser.add_argument("--padding", type=int, default=0, help="Filler bytes per synthetic PDF")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--steps", default=",".join(STEPS), help=f"Subset of {','.join(STEPS)}")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, help="Only the first N PDFs")
+    parser.add_argument("--output", type=Path, help="Result file (default benchmarks/results/pdf_memory_<timestamp>.json)")
+    parser.add_argument("--worker-mode", choices=MODES, help=argparse.SUPPRESS) # Subprocess entry point
+    args = parser.parse_args(argv)
+    steps = [s.strip() for s in args.steps.split(",") if s.strip() in STEPS]
+
+    if args.worker_mode:
+        print(json.dumps(run_mode(args.pdf_dir, args.worker_mode, steps, args.workers, args.limit)))
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix="cbf_pdf_memory_") as workdir:
+        pdf_dir = args.pdf_dir
+        if args.synthetic:
+            from benchmarks.corpus import iter_corpus, render_pdf, embedded_extract
+            pdf_dir = Path(workdir)
+            for file_name, _, pdf_bytes in iter_corpus(args.synthetic):
+                if args.padding:
+                    pdf_bytes = render_pdf(embedded_extract(pdf_bytes), padding=args.padding)
+                (pdf_dir / file_name).write_bytes(pdf_bytes)
+
+        results = []
+        for mode in [m.strip() for m in args.modes.split(",") if m.strip() in MODES]:
+            # One process per mode so peak RSS figures do not leak from one mode into the next
+            command = [sys.executable, "-m", "benchmarks.pdf_memory", "--worker-mode", mode, "--pdf-dir", str(pdf_dir),
+                       "--steps", ",".join(steps), "--workers", str(args.workers)]
+            if args.limit:
+                command += ["--limit", str(args.limit)]
+            completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True)
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print_table(results)
+    report = {
+        "meta": {"started_at": datetime.datetime.now().isoformat(timespec="seconds"), "python": sys.version.split()[0],
+                 "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()}},
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"pdf_memory_{datetime.datetime.now():%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
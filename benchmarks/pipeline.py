@@ -0,0 +1,193 @@
+"""
+End-to-end throughput benchmark of the pipeline on a synthetic borderô corpus.
+
+For every size the stages run in a fresh working directory against local fake services
+(benchmarks/fake_services.py), so nothing touches the real CBF site or the Gemini API:
+
+    download    download_pdfs for enough competition seasons to cover the size
+    process     process_pdfs (fake Gemini extraction, validation, CSV appends, clean CSV sync)
+    normalize   refresh_lookups + a full write_clean_csv
+    dashboard   the dashboard's MatchDataset load of the clean CSV
+
+Results go to benchmarks/results/pipeline_<timestamp>.json; --baseline compares them
+with an earlier run and exits with 1 when a stage got slower than --threshold.
+
+    python -m benchmarks.pipeline --sizes 1000 --gemini-latency-ms 50
+    python -m benchmarks.pipeline --baseline benchmarks/results/pipeline_20260101T000000.json
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import datetime
+import platform
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.corpus import plan_matches, write_corpus
+from benchmarks.fake_services import FakeCBFServer, FakeGeminiServer
+
+STAGES = ("download", "process", "normalize", "dashboard")
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+
+def _stage(seconds: float, items: int, **extra) -> dict:
+    return {"seconds": round(seconds, 3), "items": items,
+            "items_per_s": round(items / seconds, 2) if seconds else None, **extra}
+
+
+def run_size(size: int, stages: List[str], args, cbf: FakeCBFServer, gemini: FakeGeminiServer) -> Dict[str, dict]:
+    """Runs the selected stages for one corpus size inside a temporary working directory."""
+    # Imported late: src modules read the environment set by main()
+    from src.scraper import download_pdfs
+    from src.main import process_pdfs
+    from src.normalize import refresh_lookups, write_clean_csv
+    from src.dataset import MatchDataset
+
+    results = {}
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"cbf_bench_{size}_") as workdir:
+        # process_pdfs writes cache/ and reports/ relative to the working directory
+        os.chdir(workdir)
+        try:
+            pdf_dir, csv_dir, lookup_dir = Path("pdfs"), Path("csv"), Path("lookups")
+            csv_dir.mkdir()
+            lookup_dir.mkdir()
+            raw_csv, clean_csv = csv_dir / "jogos_resumo.csv", csv_dir / "jogos_resumo_clean.csv"
+
+            if "download" in stages:
+                requests_before = cbf.requests
+                started = time.perf_counter()
+                files = 0
+                for year, competition in plan_matches(size):
+                    files += len(download_pdfs(year, competition, str(pdf_dir), max_workers=args.download_workers))
+                results["download"] = _stage(time.perf_counter() - started, cbf.requests - requests_before, files=files)
+            else:
+                write_corpus(pdf_dir, size, seed=args.seed)
+
+            if "process" in stages:
+                calls_before = gemini.requests
+                started = time.perf_counter()
+                failed = process_pdfs(pdf_dir, raw_csv, csv_dir / "receitas_detalhe.csv", csv_dir / "despesas_detalhe.csv",
+                                      "benchmark", clean_csv=clean_csv, lookup_dir=lookup_dir)
+                pdfs = sum(1 for _ in pdf_dir.glob("*.pdf"))
+                results["process"] = _stage(time.perf_counter() - started, pdfs, failed=len(failed),
+                                            gemini_calls=gemini.requests - calls_before)
+
+            if "normalize" in stages and raw_csv.exists():
+                started = time.perf_counter()
+                refresh_lookups(raw_csv, lookup_dir, "benchmark")
+                write_clean_csv(raw_csv, clean_csv, lookup_dir, incremental=False)
+                rows = sum(1 for _ in open(raw_csv, encoding="utf-8")) - 1
+                results["normalize"] = _stage(time.perf_counter() - started, rows)
+
+            if "dashboard" in stages and clean_csv.exists():
+                started = time.perf_counter()
+                data = MatchDataset(clean_csv).load()
+                results["dashboard"] = _stage(time.perf_counter() - started, len(data),
+                                              memory_mb=round(data.memory_usage(deep=True).sum() / 1e6, 2))
+        finally:
+            os.chdir(previous_cwd)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Returns one line per (size, stage) whose throughput dropped by more than threshold."""
+    regressions = []
+    for size, stages in current["results"].items():
+        for stage, result in stages.items():
+            before = baseline.get("results", {}).get(size, {}).get(stage)
+            if not before or not before.get("items_per_s") or not result.get("items_per_s"):
+                continue
+            change = result["items_per_s"] / before["items_per_s"] - 1
+            if change < -threshold:
+                regressions.append(f"{size} {stage}: {before['items_per_s']} -> {result['items_per_s']} items/s ({change:+.0%})")
+    return regressions
+
+
+def print_table(report: dict):
+    print(f"{'size':>8}  {'stage':<10}{'seconds':>10}{'items':>9}{'items/s':>11}")
+    for size, stages in report["results"].items():
+        for stage, result in stages.items():
+            print(f"{size:>8}  {stage:<10}{result['seconds']:>10.2f}{result['items']:>9}{result['items_per_s'] or 0:>11.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated corpus sizes (matches)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Subset of {','.join(STAGES)}")
+    parser.add_argument("--download-workers", type=int, default=5)
+    parser.add_argument("--cbf-latency-ms", type=float, default=0.0)
+    parser.add_argument("--cbf-missing-rate", type=float, default=0.0, help="Share of URLs answered with 404")
+    parser.add_argument("--cbf-error-rate", type=float, default=0.0, help="Share of URLs answered with 503")
+    parser.add_argument("--pdf-padding", type=int, default=0, help="Filler bytes per PDF (emulates bigger scans)")
+    parser.add_argument("--gemini-latency-ms", type=float, default=0.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0, help="Share of calls failing (429/500)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="WARNING", help="Pipeline log level during the run")
+    parser.add_argument("--output", type=Path, help="Result file (default benchmarks/results/pipeline_<timestamp>.json)")
+    parser.add_argument("--baseline", type=Path, help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Tolerated throughput drop vs the baseline")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    stages = [s.strip() for s in args.stages.split(",") if s.strip() in STAGES]
+
+    with FakeCBFServer(latency_s=args.cbf_latency_ms / 1000, error_rate=args.cbf_error_rate,
+                       missing_rate=args.cbf_missing_rate, padding=args.pdf_padding, seed=args.seed) as cbf, \
+            FakeGeminiServer(latency_s=args.gemini_latency_ms / 1000, error_rate=args.gemini_error_rate,
+                             seed=args.seed) as gemini:
+        os.environ.update({
+            "CBF_BASE_URL": cbf.sumulas_url,
+            "GEMINI_BASE_URL": gemini.base_url,
+            "GEMINI_API_KEY": "benchmark",
+            "GEMINI_BACKOFF_SECONDS": os.getenv("GEMINI_BACKOFF_SECONDS", "0.05"),
+        })
+        from src.utils import setup_logging
+        setup_logging()
+        logging.getLogger().setLevel(args.log_level.upper())
+
+        report = {
+            "meta": {
+                "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+            },
+            "results": {},
+        }
+        for size in sizes:
+            report["results"][str(size)] = run_size(size, stages, args, cbf, gemini)
+            print_table({"results": {str(size): report["results"][str(size)]}})
+
+    output = args.output or RESULTS_DIR / f"pipeline_{datetime.datetime.now():%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,19 +11,10 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 # Import from the src folder directly
 from src.main import main
 
-# Debug: command-line entry for normalization
-if len(sys.argv) == 2 and sys.argv[1].lower() == 'normalize':
-    from src.main import run_normalization
-    from dotenv import load_dotenv
-    load_dotenv()
-    from pathlib import Path
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    csv_dir = os.getenv("CSV_DIR", "csv")
-    jogos_resumo_csv = Path(csv_dir) / "jogos_resumo.csv"
-    clean_csv = Path(csv_dir) / "jogos_resumo_clean.csv"
-    print("DEBUG: Running normalization via CLI")
-    run_normalization(jogos_resumo_csv, Path("lookups"), clean_csv, gemini_api_key)
-    sys.exit(0)
+# Any argument selects the headless command-line interface (python run.py --help)
+if len(sys.argv) > 1:
+    from src.cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
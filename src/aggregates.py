@@ -0,0 +1,252 @@
+import io
+import os
+import csv
+import json
+import hashlib
+import logging
+import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .run_lock import RunLock
+from .utils import OperationInProgressError
+
+# One rollup per team role: sums and counts per (season, competition, team, weekday)
+ROLLUP_TEAM_COLUMNS = {
+    "mandante": "time_mandante",
+    "visitante": "time_visitante",
+}
+REQUIRED_COLUMNS = ("competicao", "time_mandante", "time_visitante")
+SUM_FIELDS = [
+    "jogos",                # matches in the group
+    "publico_jogos",        # matches with a known publico_total
+    "publico_total",
+    "receita_bruta_total",
+    "resultado_liquido",
+    "ticket_medio_soma",    # sum of per-match ticket médio (0 when undefined), mean = soma / jogos
+    "margem_liquida_soma",  # sum of per-match margem líquida (0 when undefined), mean = soma / jogos
+]
+
+
+def rollup_key_fields(role: str) -> List[str]:
+    return ["temporada", "competicao", ROLLUP_TEAM_COLUMNS[role], "dia_semana"]
+
+
+def rollup_fields(role: str) -> List[str]:
+    return rollup_key_fields(role) + SUM_FIELDS + ["data_min", "data_max"]
+
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def _ratio(numerator: Optional[float], denominator: Optional[float]) -> float:
+    # Same convention as the dashboard: undefined or infinite ratios count as 0
+    if numerator is None or not denominator:
+        return 0.0
+    return numerator / denominator
+
+
+def match_measures(row: Dict[str, str]) -> Optional[dict]:
+    """
+    Derives the rollup key parts and additive measures of one clean CSV row.
+
+    Returns:
+        dict: None for rows without a valid match date (they never pass a date filter).
+    """
+    try:
+        match_date = datetime.date.fromisoformat((row.get("data_jogo") or "")[:10])
+    except ValueError:
+        return None
+    publico = _to_float(row.get("publico_total"))
+    receita = _to_float(row.get("receita_bruta_total"))
+    resultado = _to_float(row.get("resultado_liquido"))
+    return {
+        "data_jogo": match_date.isoformat(),
+        "temporada": match_date.year,
+        "dia_semana": match_date.weekday(), # 0 = Segunda-feira
+        "publico_jogos": 1 if publico is not None else 0,
+        "publico_total": publico or 0.0,
+        "receita_bruta_total": receita or 0.0,
+        "resultado_liquido": resultado or 0.0,
+        "ticket_medio_soma": _ratio(receita, publico),
+        "margem_liquida_soma": _ratio(resultado, receita),
+    }
+
+
+class RollupTable:
+    """Additive rollup of the clean CSV for one team role, keyed by rollup_key_fields(role)."""
+
+    def __init__(self, role: str):
+        self.role = role
+        self.team_column = ROLLUP_TEAM_COLUMNS[role]
+        self.groups: Dict[tuple, dict] = {}
+
+    def add(self, row: Dict[str, str], measures: dict):
+        key = (measures["temporada"], row.get("competicao") or "", row.get(self.team_column) or "", measures["dia_semana"])
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = {field: 0 for field in SUM_FIELDS}
+            group["data_min"] = group["data_max"] = measures["data_jogo"]
+        group["jogos"] += 1
+        for field in SUM_FIELDS[1:]:
+            group[field] += measures[field]
+        group["data_min"] = min(group["data_min"], measures["data_jogo"])
+        group["data_max"] = max(group["data_max"], measures["data_jogo"])
+
+    def rows(self) -> List[dict]:
+        key_fields = rollup_key_fields(self.role)
+        return [{**dict(zip(key_fields, key)), **group} for key, group in sorted(self.groups.items())]
+
+    def save(self, path: Path):
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=rollup_fields(self.role))
+            writer.writeheader()
+            writer.writerows(self.rows())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, role: str, path: Path) -> "RollupTable":
+        table = cls(role)
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                key = (int(row["temporada"]), row["competicao"], row[table.team_column], int(row["dia_semana"]))
+                group = {field: float(row[field]) for field in SUM_FIELDS}
+                group["jogos"] = int(group["jogos"])
+                group["publico_jogos"] = int(group["publico_jogos"])
+                group["data_min"], group["data_max"] = row["data_min"], row["data_max"]
+                table.groups[key] = group
+        return table
+
+
+def rollup_path(clean_csv_path: Path, role: str) -> Path:
+    return clean_csv_path.with_name(f"agg_{role}.csv")
+
+
+def _rollup_state_path(clean_csv_path: Path) -> Path:
+    return clean_csv_path.with_name("agg_state.json")
+
+
+def prefix_digest(path: Path, length: int) -> str:
+    """SHA-1 of the first length bytes of a file, to tell an append from a rewrite of what was already read."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def _read_state(state_path: Path) -> dict:
+    if not state_path.exists():
+        return {}
+    try:
+        return json.loads(state_path.read_text(encoding='utf-8'))
+    except (json.JSONDecodeError, OSError) as e:
+        logging.warning(f"Ignoring unreadable rollup state {state_path}: {e}")
+        return {}
+
+
+def _fold(clean_csv_path: Path, tables: Dict[str, RollupTable], offset: int, header: Optional[List[str]]) -> tuple:
+    """
+    Adds the complete rows of the clean CSV from byte offset on to the tables.
+
+    Returns:
+        tuple: (new offset, header, number of matches added).
+    """
+    with open(clean_csv_path, 'rb') as f:
+        f.seek(offset)
+        chunk = f.read()
+    end = chunk.rfind(b"\n") + 1 # Leave a partially written last line for the next update
+    reader = csv.reader(io.StringIO(chunk[:end].decode('utf-8'), newline=''))
+    added = 0
+    for row in reader:
+        if not row:
+            continue
+        if header is None:
+            header = row
+            continue
+        record = dict(zip(header, row))
+        measures = match_measures(record)
+        # The dashboard filters competition and both teams with isin, which never keeps empty values
+        if measures is None or not all(record.get(column) for column in REQUIRED_COLUMNS):
+            continue
+        for table in tables.values():
+            table.add(record, measures)
+        added += 1
+    return offset + end, header, added
+
+
+def update_rollups(clean_csv_path: Path) -> Dict[str, RollupTable]:
+    """
+    Brings agg_mandante.csv and agg_visitante.csv (next to the clean CSV) up to date.
+
+    Only rows appended since the last update are folded into the stored sums. When the
+    already aggregated part of the clean CSV changed (lookup re-map, full rewrite) the
+    rollups are rebuilt from scratch, which is detected with a digest of that prefix.
+
+    The pipeline and the dashboard both call this, so the files are read and written under
+    the "rollups" RunLock next to the clean CSV. A caller that finds the lock held aggregates
+    the whole CSV in memory and leaves the files alone. agg_state.json is removed before the
+    tables are written and written back last, so an interrupted update forces a rebuild
+    instead of folding the same rows twice.
+
+    Returns:
+        dict: {role: RollupTable} for "mandante" and "visitante".
+    """
+    if not clean_csv_path.exists():
+        logging.error(f"Clean CSV file not found: {clean_csv_path}")
+        return {role: RollupTable(role) for role in ROLLUP_TEAM_COLUMNS}
+
+    try:
+        lock = RunLock(name="rollups", state_dir=clean_csv_path.parent).acquire()
+    except OperationInProgressError:
+        logging.info(f"Rollups of {clean_csv_path} are being updated by another process, aggregating in memory")
+        tables = {role: RollupTable(role) for role in ROLLUP_TEAM_COLUMNS}
+        _fold(clean_csv_path, tables, 0, None)
+        return tables
+    try:
+        return _update_locked(clean_csv_path)
+    finally:
+        lock.release()
+
+
+def _update_locked(clean_csv_path: Path) -> Dict[str, RollupTable]:
+    state_path = _rollup_state_path(clean_csv_path)
+    state = _read_state(state_path)
+    offset = state.get("offset", 0)
+    size = clean_csv_path.stat().st_size
+    incremental = (
+        0 < offset <= size
+        and all(rollup_path(clean_csv_path, role).exists() for role in ROLLUP_TEAM_COLUMNS)
+        and state.get("prefix_sha1") == prefix_digest(clean_csv_path, offset)
+    )
+    if incremental and offset == size:
+        return {role: RollupTable.load(role, rollup_path(clean_csv_path, role)) for role in ROLLUP_TEAM_COLUMNS}
+
+    if incremental:
+        tables = {role: RollupTable.load(role, rollup_path(clean_csv_path, role)) for role in ROLLUP_TEAM_COLUMNS}
+        header = state["header"]
+    else:
+        tables = {role: RollupTable(role) for role in ROLLUP_TEAM_COLUMNS}
+        offset, header = 0, None
+
+    offset, header, added = _fold(clean_csv_path, tables, offset, header)
+    state_path.unlink(missing_ok=True)
+    for role, table in tables.items():
+        table.save(rollup_path(clean_csv_path, role))
+    new_state = {"offset": offset, "prefix_sha1": prefix_digest(clean_csv_path, offset), "header": header}
+    tmp_path = state_path.with_name(f"{state_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(new_state, f, ensure_ascii=False)
+    os.replace(tmp_path, state_path)
+    logging.info(f"{'Updated' if incremental else 'Rebuilt'} rollups for {clean_csv_path}: {added} matches aggregated")
+    return tables
@@ -0,0 +1,332 @@
+import os
+import glob
+import json
+import time
+import datetime
+import threading
+from pathlib import Path
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from .utils import generate_urls, get_logger, CBFRobotError, ConfigurationError
+
+logger = get_logger("backfill")
+
+DEFAULT_HIT_RATE = 1.0 # Without history every URL is assumed to exist (upper bound)
+DEFAULT_PDF_BYTES = 270_000
+DEFAULT_CALLS_PER_PDF = 1.0
+
+
+def parse_seasons(spec: str) -> List[int]:
+    """Years from "2020-2024", "2021,2023" or a mix of both, newest first."""
+    years = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = (int(p) for p in part.split("-", 1))
+            years.update(range(min(first, last), max(first, last) + 1))
+        else:
+            years.add(int(part))
+    if not years:
+        raise ConfigurationError(f"Nenhuma temporada em '{spec}'")
+    return sorted(years, reverse=True)
+
+
+def _files_by_chunk(pdf_dir: Path) -> Dict[tuple, List[Path]]:
+    files = defaultdict(list)
+    for path in Path(pdf_dir).glob("*.pdf"):
+        stem, _, year = path.stem.rpartition("_")
+        if stem and year.isdigit():
+            files[(int(year), stem[:3])].append(path)
+    return files
+
+
+class HistoricalRates:
+    """
+    Per-competition download hit rate and mean PDF size from the PDFs already on disk, plus
+    Gemini calls and cost per PDF from the model routing reports.
+
+    Only finished seasons (before the current year) count for hit rates; competitions
+    without history use the defaults.
+    """
+
+    def __init__(self, hit_rates: Dict[str, float], pdf_bytes: Dict[str, float],
+                 calls_per_pdf: float = DEFAULT_CALLS_PER_PDF, cost_per_pdf: Optional[float] = None):
+        self.hit_rates = hit_rates
+        self.pdf_bytes = pdf_bytes
+        self.calls_per_pdf = calls_per_pdf
+        self.cost_per_pdf = cost_per_pdf
+
+    @classmethod
+    def from_history(cls, pdf_dir: Path, report_dir: str = "reports") -> "HistoricalRates":
+        current_year = datetime.date.today().year
+        found, expected, sizes = defaultdict(int), defaultdict(int), defaultdict(list)
+        for (year, competition), files in _files_by_chunk(pdf_dir).items():
+            sizes[competition].extend(path.stat().st_size for path in files)
+            if year >= current_year:
+                continue
+            try:
+                expected[competition] += len(generate_urls(year, competition))
+            except ConfigurationError:
+                continue
+            found[competition] += len(files)
+        hit_rates = {c: min(1.0, found[c] / expected[c]) for c in expected if expected[c]}
+        pdf_bytes = {c: sum(s) / len(s) for c, s in sizes.items() if s}
+
+        calls_per_pdf, cost_per_pdf = DEFAULT_CALLS_PER_PDF, None
+        rows = []
+        for report in sorted(glob.glob(os.path.join(report_dir, "model_routing_*.json"))):
+            try:
+                with open(report, 'r', encoding='utf-8') as f:
+                    rows.extend(json.load(f))
+            except (OSError, ValueError):
+                continue
+        if rows:
+            # Every PDF goes to the cheapest tier first, so its call count approximates the PDFs analyzed
+            from .gemini import load_model_tiers
+            first_tier = load_model_tiers()[0].model
+            pdfs = sum(row.get("calls", 0) for row in rows if row.get("model") == first_tier)
+            if pdfs:
+                calls_per_pdf = sum(row.get("calls", 0) for row in rows) / pdfs
+                cost_per_pdf = sum(row.get("cost_usd", 0.0) for row in rows) / pdfs
+        return cls(hit_rates, pdf_bytes, calls_per_pdf, cost_per_pdf)
+
+    def to_dict(self) -> dict:
+        return {"hit_rates": {c: round(r, 4) for c, r in self.hit_rates.items()},
+                "mean_pdf_bytes": {c: round(b) for c, b in self.pdf_bytes.items()},
+                "gemini_calls_per_pdf": round(self.calls_per_pdf, 3),
+                "cost_usd_per_pdf": round(self.cost_per_pdf, 6) if self.cost_per_pdf is not None else None}
+
+
+def plan_backfill(years: List[int], competitions: List[str], pdf_dir: Path,
+                  rates: Optional[HistoricalRates] = None) -> List[dict]:
+    """
+    One chunk per (season, competition), newest season first, with its estimates.
+
+    Each chunk has: year, competition, urls, present (PDFs already downloaded), expected_pdfs
+    (urls x the competition's hit rate) and, for the PDFs still missing, expected_download_bytes
+    and expected_gemini_calls.
+    """
+    rates = rates or HistoricalRates.from_history(pdf_dir)
+    files = _files_by_chunk(pdf_dir)
+    chunks = []
+    for year in years:
+        for competition in competitions:
+            urls = len(generate_urls(year, competition)) # Unknown codes raise ConfigurationError
+            hit_rate = rates.hit_rates.get(competition, DEFAULT_HIT_RATE)
+            present = len(files.get((year, competition), []))
+            expected_pdfs = max(present, round(urls * hit_rate))
+            missing = expected_pdfs - present
+            chunks.append({
+                "year": year,
+                "competition": competition,
+                "urls": urls,
+                "present": present,
+                "expected_pdfs": expected_pdfs,
+                "expected_download_bytes": round(missing * rates.pdf_bytes.get(competition, DEFAULT_PDF_BYTES)),
+                "expected_gemini_calls": round(missing * rates.calls_per_pdf),
+                "status": "pending",
+            })
+    return chunks
+
+
+def plan_totals(chunks: List[dict], rates: HistoricalRates, pdfs_per_hour: Optional[float] = None) -> dict:
+    new_pdfs = sum(c["expected_pdfs"] - c["present"] for c in chunks)
+    totals = {
+        "chunks": len(chunks),
+        "urls": sum(c["urls"] for c in chunks),
+        "expected_new_pdfs": new_pdfs,
+        "expected_download_mb": round(sum(c["expected_download_bytes"] for c in chunks) / 1e6, 1),
+        "expected_gemini_calls": sum(c["expected_gemini_calls"] for c in chunks),
+    }
+    if rates.cost_per_pdf is not None:
+        totals["expected_cost_usd"] = round(new_pdfs * rates.cost_per_pdf, 2)
+    if pdfs_per_hour:
+        totals["expected_hours"] = round(new_pdfs / pdfs_per_hour, 1)
+    return totals
+
+
+class BackfillCheckpoint:
+    """
+    Plan and per-chunk progress of one backfill, saved after every step (state/backfill_<key>.json).
+
+    The key is derived from the seasons and competitions, so running the same backfill again
+    resumes it: finished chunks are skipped.
+    """
+
+    def __init__(self, years: List[int], competitions: List[str], state_dir: Optional[str] = None):
+        key = f"{min(years)}-{max(years)}_{'-'.join(sorted(competitions))}"
+        self.path = Path(state_dir or os.getenv("STATE_DIR", "state")) / f"backfill_{key}.json"
+        self.data: dict = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    @property
+    def chunks(self) -> List[dict]:
+        return self.data.get("chunks", [])
+
+    def start(self, chunks: List[dict], totals: dict, rates: HistoricalRates):
+        """Keeps the progress of chunks already in the checkpoint (downloaded/done); the rest start pending."""
+        previous = {(c["year"], c["competition"]): c for c in self.chunks}
+        for chunk in chunks:
+            before = previous.get((chunk["year"], chunk["competition"]))
+            if before and before.get("status") in ("downloaded", "done"):
+                chunk.update({k: before[k] for k in ("status", "downloaded", "finished_at") if k in before})
+        self.data = {"created_at": self.data.get("created_at") or datetime.datetime.now().isoformat(timespec="seconds"),
+                     "totals": totals, "rates": rates.to_dict(), "analyzed_pdfs": self.data.get("analyzed_pdfs", 0),
+                     "chunks": chunks}
+        self.save()
+
+    def save(self):
+        self.data["updated_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class ThroughputBudget:
+    """
+    Global cap for a backfill: at most max_pdfs analyzed in this invocation, and at most
+    pdfs_per_hour on average (wait_for() sleeps until the next batch fits).
+    """
+
+    def __init__(self, max_pdfs: Optional[int] = None, pdfs_per_hour: Optional[float] = None):
+        self.max_pdfs = max_pdfs
+        self.pdfs_per_hour = pdfs_per_hour
+        self.used = 0
+        self.started = time.monotonic()
+
+    def remaining(self) -> Optional[int]:
+        return None if self.max_pdfs is None else max(0, self.max_pdfs - self.used)
+
+    def exhausted(self) -> bool:
+        return self.max_pdfs is not None and self.used >= self.max_pdfs
+
+    def wait_for(self, cancel_event: Optional[threading.Event] = None):
+        if not self.pdfs_per_hour:
+            return
+        # The PDFs analyzed so far must have taken at least used / pdfs_per_hour hours
+        delay = self.used / self.pdfs_per_hour * 3600 - (time.monotonic() - self.started)
+        if delay > 0:
+            logger.info("Throughput budget reached, waiting", seconds=round(delay, 1), pdfs_per_hour=self.pdfs_per_hour)
+            if cancel_event:
+                cancel_event.wait(delay)
+            else:
+                time.sleep(delay)
+
+    def spend(self, pdfs: int):
+        self.used += pdfs
+
+
+def run_backfill(years: List[int], competitions: List[str], pdf_dir: Path,
+                 download: Callable[[int, str], None], analyze: Callable[[int], List[str]],
+                 pending: Callable[[], int], budget: Optional[ThroughputBudget] = None,
+                 batch_size: int = 50, cancel_event: Optional[threading.Event] = None,
+                 state_dir: Optional[str] = None) -> dict:
+    """
+    Executes a backfill plan in resumable chunks.
+
+    For each (season, competition) chunk not finished in the checkpoint: download(year,
+    competition), then analyze the extraction queue in batches of batch_size within the
+    budget. The queue is global and newest-first, so a batch may include PDFs of other
+    chunks; progress is checkpointed after every download and batch.
+
+    Args:
+        download: Downloads one chunk (e.g. run_operation choice "1"); raises CBFRobotError when
+            it failed. A chunk that errors, or ends with no PDF on disk, is marked "error" and
+            retried by the next run.
+        analyze: Analyzes up to n queued PDFs and returns the failed ids (run_operation choice "2").
+            A batch that leaves the queue as long as before stops the run and marks the chunk
+            "error", instead of calling analyze forever.
+        pending: Number of queued PDFs due for analysis.
+
+    Returns:
+        dict: The checkpoint data (plan, totals, per-chunk status).
+    """
+    budget = budget or ThroughputBudget()
+    rates = HistoricalRates.from_history(pdf_dir)
+    chunks = plan_backfill(years, competitions, pdf_dir, rates)
+    checkpoint = BackfillCheckpoint(years, competitions, state_dir)
+    resumed = sum(1 for c in checkpoint.chunks if c.get("status") == "done")
+    checkpoint.start(chunks, plan_totals(chunks, rates, budget.pdfs_per_hour), rates)
+    logger.info("Backfill started", checkpoint=str(checkpoint.path), resumed_chunks=resumed, **checkpoint.data["totals"])
+
+    def drain() -> Optional[str]:
+        """
+        Analyzes queued PDFs until the queue is empty.
+
+        Returns:
+            str: None when it emptied, else why it stopped: "budget", "cancelled" or "stalled"
+                (a batch left the queue as it was, e.g. analyze failed before touching any PDF).
+        """
+        while pending() > 0:
+            if budget.exhausted():
+                return "budget"
+            if cancel_event and cancel_event.is_set():
+                return "cancelled"
+            queued = pending()
+            remaining = budget.remaining()
+            batch = min(batch_size, queued, remaining if remaining is not None else batch_size)
+            budget.wait_for(cancel_event)
+            if cancel_event and cancel_event.is_set():
+                return "cancelled"
+            failed = analyze(batch)
+            budget.spend(batch)
+            checkpoint.data["analyzed_pdfs"] = checkpoint.data.get("analyzed_pdfs", 0) + batch
+            checkpoint.data["failed_pdfs"] = checkpoint.data.get("failed_pdfs", 0) + len(failed)
+            checkpoint.save()
+            if pending() >= queued:
+                return "stalled"
+        return None
+
+    for chunk in checkpoint.chunks:
+        if chunk["status"] == "done":
+            continue
+        if cancel_event and cancel_event.is_set():
+            break
+        if chunk["status"] == "pending":
+            before = len(_files_by_chunk(pdf_dir).get((chunk["year"], chunk["competition"]), []))
+            try:
+                download(chunk["year"], chunk["competition"])
+                error = None
+            except CBFRobotError as e:
+                error = e.message
+            if cancel_event and cancel_event.is_set():
+                break # Partial download: the chunk stays pending and is downloaded again on resume
+            after = len(_files_by_chunk(pdf_dir).get((chunk["year"], chunk["competition"]), []))
+            if not error and not after:
+                error = "Nenhum borderô obtido para a temporada"
+            if error:
+                # Left for the next run: start() only keeps downloaded/done chunks
+                chunk.update({"status": "error", "error": error})
+                checkpoint.save()
+                logger.warning("Backfill chunk download failed", year=chunk["year"], competition=chunk["competition"],
+                               error=error)
+                continue
+            chunk.pop("error", None)
+            chunk.update({"status": "downloaded", "downloaded": after - before})
+            checkpoint.save()
+            logger.info("Backfill chunk downloaded", year=chunk["year"], competition=chunk["competition"],
+                        new_pdfs=after - before)
+        stopped = drain()
+        if stopped == "stalled":
+            # Retrying in this run would spin on the same batch; the next run starts the chunk again
+            chunk.update({"status": "error", "error": "A análise não consumiu a fila (API indisponível ou chave inválida?)"})
+            checkpoint.save()
+            logger.warning("Backfill analysis made no progress", year=chunk["year"], competition=chunk["competition"],
+                           pending=pending())
+        if stopped:
+            break
+        chunk.update({"status": "done", "finished_at": datetime.datetime.now().isoformat(timespec="seconds")})
+        checkpoint.save()
+
+    done = sum(1 for c in checkpoint.chunks if c["status"] == "done")
+    logger.info("Backfill stopped" if done < len(checkpoint.chunks) else "Backfill completed",
+                chunks_done=done, chunks=len(checkpoint.chunks), analyzed_pdfs=checkpoint.data.get("analyzed_pdfs", 0),
+                budget_used=budget.used)
+    return checkpoint.data
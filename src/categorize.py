@@ -0,0 +1,196 @@
+import os
+import re
+import csv
+import json
+import logging
+from pathlib import Path
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from google import genai
+
+from .matching import fold_text
+from .normalize import load_lookup, save_lookup
+from .gemini import gemini_http_options
+
+OTHER = "Outros"
+GEMINI_BATCH_SIZE = 100
+
+# Ordered rules: the first bucket whose pattern matches the folded text wins, so more specific
+# meanings come first ("CORTESIA ... INTEIRA" is a courtesy ticket, "INSS SOBRE ARBITRAGEM" a tax).
+TICKET_TYPE_RULES: List[Tuple[str, str]] = [
+    ("Cortesia", r"\b(CORTESIAS?|CONVITES?|GRATUIDADES?|GRATUITO|GRATIS|CREDENCIAD\w*)\b"),
+    ("Sócio-torcedor", r"\b(SOCI[OA]S?|ST|FIEL TORCEDOR\w*|PLANOS?|CARNES?|PACOTES?)\b"),
+    # A bare "50" is a price or a sector as often as a half-price ticket; "%" is folded away
+    ("Meia-entrada", r"\b(MEIA\w*|MEJA|ESTUDANTES?|IDOSOS?|PCD|DEFICIENTES?|PROFESSOR\w*|50 POR CENTO)\b"),
+    ("Promocional", r"\b(PROMO\w*|DESCONTOS?|COMBO)\b"),
+    ("Cativa e proprietário", r"\b(CATIVAS?|VITALICI\w*|PROPRI\w*TARIOS?|SUPERFICIARI\w*)\b"),
+    ("Inteira", r"\b(INTEIRAS?|INTEGRAL|NORMAL)\b"),
+]
+
+EXPENSE_TYPE_RULES: List[Tuple[str, str]] = [
+    ("Impostos e encargos", r"\b(INSS|IRRF|IRPF|ISS|ISSQN|IMPOSTOS?|TRIBUT\w*|CONTRIBUICO\w*|FGTS|PIS|COFINS)\b"),
+    ("Seguros", r"\bSEGUROS?\b"),
+    ("Arbitragem e oficiais", r"\b(ARBITRAGEM|ABITRAGEM|ARBITROS?|AUXILIARES|DELEGADOS?|FISCAIS|QUADRO MOVEL|OFICIAIS|SUPERVIS\w*)\b"),
+    ("Saúde e antidoping", r"\b(MEDIC\w*|AMBULANCIAS?|AMBULATORIOS?|DOPING|ANTIDOPING|ENFERM\w*|SOCORRIS\w*)\b"),
+    # Only fees named after an entity: "TAXA DE LIMPEZA" or "TAXA BANCARIA" are not federation fees
+    ("Federação e CBF", r"\b(FEDERACAO|CONFEDERACAO|FEDERATIV\w*|FED|FPF|FERJ|FGF|FMF|FCF|CBF|LIGA)\b"),
+    ("Segurança", r"\b(SEGURANCA|POLICIAMENTO|POLICIA\w*|VIGILAN\w*|BRIGADA|BOMBEIROS?|STEWARDS?|MONITORAMENTO)\b"),
+    ("Ingressos e controle de acesso", r"\b(INGRESSOS?|BILHETE\w*|ARRECADA\w*|CATRACAS?|CONTROLE DE ACESSO|CONTROLADOR\w*|"
+                                       r"PORTEIROS?|EMISSAO|VENDA)\b"),
+    ("Estádio e operação", r"\b(ALUGUE\w*|CAMPO|ESTADIO|LIMPEZA|HIGIENIZACAO|GRADEAMENTO|GRADES|SONORIZACAO|ENERGIA|"
+                           r"ILUMINACAO|GERADOR\w*|BANHEIROS?|MANUTENCAO|GANDULAS?|MAQUEIROS?|ORIENTADOR\w*|STAFF|"
+                           r"FUNCIONARIOS?|APOIO|PRESTADOR\w*|SERVICOS?|CREDENCIAMENTO|OPERAC\w*|GERENTE|ALIMENTACAO|"
+                           r"LANCHES?|TRANSPORTE|HOSPEDAGEM|DIARIAS?|LOGISTIC\w*|LOCACAO|ESTACIONAMENTO|SINALIZACAO|"
+                           r"CET|EVENTOS?|PRODUCAO|CONSUMO|LOCUCAO|MATERIA\w*|ADMINISTRATIV\w*|COORDENADOR\w*|"
+                           r"ORGANIZADOR\w*)\b"),
+]
+
+LINE_ITEM_KINDS = {
+    # kind: (text column, output column, rules, cache lookup file)
+    "ticket": ("source", "tipo_ingresso", TICKET_TYPE_RULES, "ticket_types_lookup.json"),
+    "expense": ("category", "tipo_despesa", EXPENSE_TYPE_RULES, "expense_types_lookup.json"),
+}
+
+
+class LineItemClassifier:
+    """
+    Maps free-text revenue sources / expense categories to canonical buckets.
+
+    Each distinct raw string is classified once: folded text (homoglyphs, accents, case)
+    goes through the ordered regex rules, then the persisted cache of earlier Gemini
+    answers. Whatever is still unknown is collected for a single batched Gemini call.
+    """
+
+    def __init__(self, kind: str, lookup_dir: Path):
+        self.kind = kind
+        _, self.output_column, rules, cache_file = LINE_ITEM_KINDS[kind]
+        self.buckets = [bucket for bucket, _ in rules] + [OTHER]
+        self._rules = [(bucket, re.compile(pattern)) for bucket, pattern in rules]
+        self.cache_path = lookup_dir / cache_file
+        self.cache: Dict[str, str] = load_lookup(self.cache_path)
+        self._memo: Dict[str, Optional[str]] = {}
+
+    def classify(self, text: str) -> Optional[str]:
+        """Returns the bucket for a raw string, or None when neither rules nor cache know it."""
+        if text in self._memo:
+            return self._memo[text]
+        folded = fold_text(text or "")
+        bucket = next((b for b, pattern in self._rules if pattern.search(folded)), None)
+        if bucket is None:
+            bucket = self.cache.get(folded)
+        self._memo[text] = bucket
+        return bucket
+
+    def resolve_unknown(self, texts: List[str], api_key: Optional[str]):
+        """
+        Classifies unknown strings with Gemini and persists the answers in the cache lookup.
+
+        Only texts Gemini answered for are cached (answers outside the buckets as OTHER); the
+        rest stay unknown, so a failed or partial call is retried on the next run instead of
+        fixing them as OTHER for good.
+        """
+        folded_texts = sorted({fold_text(t) for t in texts} - set(self.cache))
+        if not folded_texts or not api_key:
+            return
+        answers = {}
+        for start in range(0, len(folded_texts), GEMINI_BATCH_SIZE):
+            answers.update(call_gemini_for_buckets(folded_texts[start:start + GEMINI_BATCH_SIZE],
+                                                   self.buckets, self.kind, api_key))
+        answered = [folded for folded in folded_texts if folded in answers]
+        if len(answered) < len(folded_texts):
+            logging.warning(f"Gemini left {len(folded_texts) - len(answered)} {self.kind} line items unclassified; "
+                            f"they will be retried on the next run.")
+        if not answered:
+            return
+        for folded in answered:
+            bucket = answers[folded]
+            self.cache[folded] = bucket if bucket in self.buckets else OTHER
+        save_lookup(self.cache_path, self.cache)
+        self._memo.clear()
+
+
+def call_gemini_for_buckets(texts: List[str], buckets: List[str], kind: str, api_key: str) -> Dict[str, str]:
+    """Asks Gemini to assign each text to one of the given buckets."""
+    client = genai.Client(api_key=api_key, http_options=gemini_http_options())
+    model_name = "gemini-2.0-flash"
+    label = "ticket types (revenue line items)" if kind == "ticket" else "expense types"
+    prompt = f"""
+    You classify line items from Brazilian football match reports (borderôs) into {label}.
+    Allowed categories: {json.dumps(buckets, ensure_ascii=False)}
+
+    Items:
+    {json.dumps(texts, ensure_ascii=False)}
+
+    Output ONLY a valid JSON object mapping each item exactly as given to one allowed category.
+    Use "{OTHER}" when none fits.
+    """
+    logging.info(f"Calling Gemini API ({model_name}) to classify {len(texts)} {kind} line items.")
+    try:
+        response = client.models.generate_content(
+            model=model_name,
+            contents=[prompt],
+            config={"response_mime_type": "application/json"}
+        )
+        return json.loads(response.text) if getattr(response, 'text', None) else {}
+    except Exception as e:
+        logging.error(f"Exception during Gemini classification of {kind} line items: {e}")
+        return {}
+
+
+def categorize_csv(detail_csv_path: Path, clean_csv_path: Path, classifier: LineItemClassifier,
+                   api_key: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Writes a copy of a detail CSV with the canonical bucket column appended.
+
+    Returns:
+        dict: Per-bucket aggregates {bucket: {"rows": n, "amount": total}}.
+    """
+    text_column = LINE_ITEM_KINDS[classifier.kind][0]
+    if not detail_csv_path.exists():
+        logging.error(f"Detail CSV file not found: {detail_csv_path}")
+        return {}
+
+    with open(detail_csv_path, 'r', encoding='utf-8', newline='') as infile:
+        reader = csv.DictReader(infile)
+        fieldnames = list(reader.fieldnames or [])
+        rows = list(reader)
+
+    unknown = {row.get(text_column) or "" for row in rows if classifier.classify(row.get(text_column) or "") is None}
+    if unknown:
+        logging.info(f"{len(unknown)} distinct {classifier.kind} line items not covered by rules or cache.")
+        classifier.resolve_unknown(list(unknown), api_key)
+
+    aggregates = defaultdict(lambda: {"rows": 0, "amount": 0.0})
+    tmp_path = clean_csv_path.with_name(clean_csv_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames + [classifier.output_column])
+        writer.writeheader()
+        for row in rows:
+            bucket = classifier.classify(row.get(text_column) or "") or OTHER
+            row[classifier.output_column] = bucket
+            writer.writerow(row)
+            aggregates[bucket]["rows"] += 1
+            try:
+                aggregates[bucket]["amount"] += float(row.get("amount") or 0)
+            except ValueError:
+                pass
+    os.replace(tmp_path, clean_csv_path)
+    logging.info(f"Wrote {len(rows)} categorized rows to {clean_csv_path}")
+    return dict(aggregates)
+
+
+def categorize_line_items(csv_dir: Path, lookup_dir: Path, api_key: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Adds tipo_ingresso to receitas_detalhe.csv and tipo_despesa to despesas_detalhe.csv,
+    writing receitas_detalhe_clean.csv and despesas_detalhe_clean.csv.
+
+    Returns:
+        dict: Per-bucket aggregates for "ticket" and "expense".
+    """
+    results = {}
+    for kind, base_name in (("ticket", "receitas_detalhe"), ("expense", "despesas_detalhe")):
+        classifier = LineItemClassifier(kind, lookup_dir)
+        results[kind] = categorize_csv(csv_dir / f"{base_name}.csv", csv_dir / f"{base_name}_clean.csv",
+                                       classifier, api_key)
+        logging.info(f"Line item aggregates for {kind}: {results[kind]}")
+    return results
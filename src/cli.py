@@ -0,0 +1,301 @@
+import os
+import sys
+import signal
+import argparse
+import datetime
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from .utils import (
+    load_env_variables as load_env_vars,
+    ensure_directory_exists,
+    get_logger,
+    setup_logging,
+    ConfigurationError,
+    DownloadError,
+    OperationInProgressError,
+    error_stats
+)
+from .run_lock import RunLock
+from .work_queue import ExtractionQueue, due_for_extraction
+from .backfill import HistoricalRates, ThroughputBudget, parse_seasons, plan_backfill, plan_totals, run_backfill
+from .main import run_operation
+
+logger = get_logger("cli")
+
+# Subcommand -> run_operation choice
+OPERATIONS = {
+    "download": "1",
+    "process": "2",
+    "full": "3",
+    "normalize": "4",
+}
+
+
+class ConsoleNotifier:
+    """Drop-in for tkinter's messagebox in headless runs: prints messages and counts errors."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.errors = 0
+        self.warnings = 0
+
+    def _print(self, level: str, title: str, message: str):
+        print(f"[{level}] {title}: {message}", file=self.stream, flush=True)
+
+    def showinfo(self, title: str, message: str):
+        self._print("INFO", title, message)
+
+    def showwarning(self, title: str, message: str):
+        self.warnings += 1
+        self._print("AVISO", title, message)
+
+    def showerror(self, title: str, message: str):
+        self.errors += 1
+        self._print("ERRO", title, message)
+
+
+class ConsoleProgress:
+    """Progress callback that prints every 10% step instead of driving a progress bar."""
+
+    def __init__(self, label: str, stream=None):
+        self.label = label
+        self.stream = stream or sys.stdout
+        self._last_step = -1
+
+    def __call__(self, percentage: float):
+        step = int(percentage // 10)
+        if step > self._last_step:
+            self._last_step = step
+            print(f"{self.label}: {min(percentage, 100.0):.0f}%", file=self.stream, flush=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="run.py",
+        description="CBF Robot sem interface gráfica: download, análise e normalização de borderôs."
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--year", type=int, help="Ano dos jogos (padrão: YEAR ou o ano atual)")
+    common.add_argument("--competitions", help="Códigos separados por vírgula (padrão: COMPETITIONS)")
+    common.add_argument("--pdf-dir", help="Diretório dos PDFs (padrão: PDF_DIR)")
+    common.add_argument("--csv-dir", help="Diretório dos CSVs (padrão: CSV_DIR)")
+    common.add_argument("--download-workers", type=int, default=int(os.getenv("DOWNLOAD_MAX_WORKERS", "5")),
+                        help="Downloads paralelos por competição")
+    common.add_argument("--normalization-workers", type=int,
+                        help="Chamadas paralelas ao Gemini na normalização (NORMALIZATION_MAX_WORKERS)")
+    common.add_argument("--batch-size", type=int, default=int(os.getenv("EXTRACTION_BATCH_SIZE", "0")),
+                        help="Analisar no máximo N PDFs da fila por execução, os mais recentes primeiro (0: todos)")
+    common.add_argument("--quiet", action="store_true", help="Não imprimir o progresso")
+    common.add_argument("--profile", action="store_true",
+                        help="Gerar perfis (cProfile, amostragem, memória) por etapa em reports/ (ou CBF_PROFILE=1)")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("download", parents=[common], help="Baixar novos borderôs")
+    subparsers.add_parser("process", parents=[common], help="Analisar borderôs ainda não processados")
+    subparsers.add_parser("full", parents=[common], help="Download e análise")
+    subparsers.add_parser("normalize", parents=[common], help="Normalizar nomes (CSV)")
+    schedule = subparsers.add_parser("schedule", parents=[common],
+                                     help="Executar ciclos incrementais de download e análise em intervalo fixo")
+    schedule.add_argument("--interval", type=float, default=float(os.getenv("SCHEDULE_INTERVAL_SECONDS", "3600")),
+                          help="Segundos entre o início de ciclos consecutivos")
+    schedule.add_argument("--max-cycles", type=int, help="Parar após N ciclos (padrão: sem limite)")
+    backfill = subparsers.add_parser("backfill", parents=[common],
+                                     help="Baixar e analisar várias temporadas em etapas retomáveis")
+    backfill.add_argument("--seasons", required=True, help="Temporadas, ex.: 2020-2024 ou 2019,2021")
+    backfill.add_argument("--plan-only", action="store_true", help="Só mostrar o plano e as estimativas")
+    backfill.add_argument("--budget", type=int, help="Analisar no máximo N PDFs nesta execução (retomar depois)")
+    backfill.add_argument("--pdfs-per-hour", type=float, help="Limitar a vazão média de análise")
+    retries = subparsers.add_parser("retries", parents=[common],
+                                    help="Listar PDFs com falha (em espera e descartados) e reenfileirá-los")
+    retries.add_argument("--requeue", metavar="ARQUIVO|all",
+                         help="Reenfileirar um PDF (ex.: 14210b_2025.pdf) ou todos com 'all'")
+    return parser
+
+
+def _settings(args) -> dict:
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        raise ConfigurationError("Chave da API Gemini não encontrada. Configure a variável GEMINI_API_KEY no arquivo .env.")
+    competitions = args.competitions or os.getenv("COMPETITIONS", "142,424,242")
+    settings = {
+        "competitions": [c.strip() for c in competitions.split(",") if c.strip()],
+        "pdf_dir": args.pdf_dir or os.getenv("PDF_DIR", "pdfs"),
+        "csv_dir": args.csv_dir or os.getenv("CSV_DIR", "csv"),
+        "gemini_api_key": gemini_api_key,
+    }
+    ensure_directory_exists(settings["pdf_dir"])
+    ensure_directory_exists(settings["csv_dir"])
+    if args.normalization_workers:
+        os.environ["NORMALIZATION_MAX_WORKERS"] = str(args.normalization_workers)
+    return settings
+
+
+def run_once(command: str, args, settings: dict, cancel_event: Optional[threading.Event] = None) -> int:
+    """
+    Runs one operation under the run lock.
+
+    Returns:
+        int: Process exit code (0 ok, 1 errors or failed PDFs, 2 lock held).
+    """
+    year = args.year or int(os.getenv("YEAR", datetime.date.today().year))
+    notifier = ConsoleNotifier()
+    progress = None if args.quiet else ConsoleProgress(command)
+    try:
+        with RunLock():
+            logger.info("Headless operation started", command=command, year=year, competitions=settings["competitions"])
+            failed_pdfs = run_operation(
+                OPERATIONS[command], year, settings["competitions"], settings["pdf_dir"], settings["csv_dir"],
+                settings["gemini_api_key"], progress_callback=progress, cancel_event=cancel_event,
+                notifier=notifier, download_workers=args.download_workers, wait_for_background=True,
+                profile=True if args.profile else None, max_pdfs=args.batch_size or None
+            )
+    except OperationInProgressError as e:
+        notifier.showwarning("Operação em Andamento", f"{e.message} {e.details}")
+        return 2
+    if not args.quiet and error_stats.snapshot():
+        print(f"\nResumo de erros:\n{error_stats.table()}", flush=True)
+    return 1 if notifier.errors or failed_pdfs else 0
+
+
+def _stop_event_on_signals() -> threading.Event:
+    """Event set by SIGINT/SIGTERM, so long runs stop between steps instead of dying mid-write."""
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info("Stop requested, cancelling the current step", signal=signum)
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, request_stop)
+    return stop_event
+
+
+def run_schedule(args, settings: dict) -> int:
+    """Runs incremental download + analysis cycles every args.interval seconds until stopped."""
+    stop_event = _stop_event_on_signals()
+
+    cycle = 0
+    exit_code = 0
+    while not stop_event.is_set():
+        cycle += 1
+        started = datetime.datetime.now()
+        logger.info("Scheduled cycle started", cycle=cycle)
+        exit_code = run_once("full", args, settings, cancel_event=stop_event)
+        logger.info("Scheduled cycle finished", cycle=cycle, exit_code=exit_code,
+                    duration_s=round((datetime.datetime.now() - started).total_seconds(), 1))
+        if args.max_cycles and cycle >= args.max_cycles:
+            break
+        # A batch-limited cycle leaves a backlog: start the next cycle (and its download pass) right away,
+        # so new matches are queued ahead of the backlog within one batch
+        backlog = ExtractionQueue(settings["pdf_dir"]).untried() if args.batch_size else 0
+        if backlog:
+            logger.info("Extraction backlog remaining, starting next cycle", backlog=backlog)
+            continue
+        # Interval is measured from cycle start; a long cycle starts the next one right away
+        remaining = args.interval - (datetime.datetime.now() - started).total_seconds()
+        stop_event.wait(max(0.0, remaining))
+    return exit_code
+
+
+def _print_plan(chunks: List[dict], totals: dict):
+    print(f"{'temporada':>9}  {'comp.':<6}{'URLs':>6}{'baixados':>10}{'esperados':>11}{'MB':>8}{'chamadas':>10}  status")
+    for c in chunks:
+        print(f"{c['year']:>9}  {c['competition']:<6}{c['urls']:>6}{c['present']:>10}{c['expected_pdfs']:>11}"
+              f"{c['expected_download_bytes'] / 1e6:>8.1f}{c['expected_gemini_calls']:>10}  {c.get('status', 'pending')}")
+    print("Total: " + ", ".join(f"{key}={value}" for key, value in totals.items()), flush=True)
+
+
+def run_backfill_command(args, settings: dict) -> int:
+    """
+    Plans and runs a multi-season backfill under the run lock.
+
+    Returns:
+        int: 0 when every chunk finished, 1 when it stopped early (budget, errors, cancel), 2 lock held.
+    """
+    pdf_dir, csv_dir = Path(settings["pdf_dir"]), Path(settings["csv_dir"])
+    try:
+        years = parse_seasons(args.seasons)
+        rates = HistoricalRates.from_history(pdf_dir)
+        chunks = plan_backfill(years, settings["competitions"], pdf_dir, rates)
+    except (ValueError, ConfigurationError) as e:
+        print(f"Erro de configuração: {getattr(e, 'message', e)}", file=sys.stderr)
+        return 1
+    _print_plan(chunks, plan_totals(chunks, rates, args.pdfs_per_hour))
+    if args.plan_only:
+        return 0
+
+    stop_event = _stop_event_on_signals()
+    notifier = ConsoleNotifier()
+    progress = None if args.quiet else ConsoleProgress("backfill")
+
+    def run(choice: str, year: int, competitions: List[str], max_pdfs: Optional[int] = None) -> List[str]:
+        return run_operation(choice, year, competitions, settings["pdf_dir"], settings["csv_dir"],
+                             settings["gemini_api_key"], progress_callback=progress, cancel_event=stop_event,
+                             notifier=notifier, download_workers=args.download_workers, wait_for_background=True,
+                             profile=True if args.profile else None, max_pdfs=max_pdfs)
+
+    def download(year: int, competition: str):
+        errors = notifier.errors
+        run("1", year, [competition])
+        if notifier.errors > errors: # run_operation reports failures through the notifier
+            raise DownloadError(f"Falha no download da competição {competition} em {year}")
+
+    try:
+        with RunLock():
+            result = run_backfill(
+                years, settings["competitions"], pdf_dir,
+                download=download,
+                analyze=lambda n: run("2", years[0], settings["competitions"], max_pdfs=n),
+                pending=lambda: due_for_extraction(pdf_dir, csv_dir / "jogos_resumo.csv"),
+                budget=ThroughputBudget(args.budget, args.pdfs_per_hour),
+                batch_size=args.batch_size or 50, cancel_event=stop_event
+            )
+    except OperationInProgressError as e:
+        notifier.showwarning("Operação em Andamento", f"{e.message} {e.details}")
+        return 2
+    if not args.quiet:
+        _print_plan(result["chunks"], result["totals"])
+    return 0 if all(c["status"] == "done" for c in result["chunks"]) else 1
+
+
+def run_retries(args) -> int:
+    """Prints the failed PDFs of the extraction queue and optionally requeues them."""
+    work_queue = ExtractionQueue(args.pdf_dir or os.getenv("PDF_DIR", "pdfs"))
+    if args.requeue:
+        with RunLock():
+            requeued = work_queue.requeue(None if args.requeue == "all" else args.requeue)
+            work_queue.save()
+        print(f"Reenfileirados: {len(requeued)}", flush=True)
+        return 0 if requeued else 1
+    for title, items, when in (("Em espera", work_queue.waiting(), "next_attempt_at"),
+                               ("Descartados (dead letter)", work_queue.dead_letters(), "last_failed_at")):
+        print(f"{title}: {len(items)}")
+        for name, item in sorted(items.items()):
+            print(f"  {name:<22}{item.get('attempts', item.get('retries', 0)):>3}x  "
+                  f"{item.get('last_error_class') or '-':<22}{item.get(when) or ''}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_env_vars()
+    setup_logging()
+    args = build_parser().parse_args(argv)
+    if args.command == "retries":
+        return run_retries(args)
+    try:
+        settings = _settings(args)
+    except ConfigurationError as e:
+        print(f"Erro de configuração: {e.message}", file=sys.stderr)
+        return 1
+    if args.command == "schedule":
+        return run_schedule(args, settings)
+    if args.command == "backfill":
+        return run_backfill_command(args, settings)
+    return run_once(args.command, args, settings)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import os
+import json
+from pathlib import Path
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from .utils import get_logger, ConfigurationError
+
+logger = get_logger("competitions")
+
+DEFAULT_REGISTRY = Path(__file__).resolve().parent.parent / "config" / "competitions.json"
+SEASON_ROUNDS = 38 # Double round-robin of 20 clubs; also the common scale match recency is compared on
+
+
+class Competition(BaseModel):
+    """
+    A CBF competition and how its borderô ids are numbered.
+
+    Schemes:
+        round_match: id <code><round><match>, rounds 1..rounds, matches 0..matches_per_round-1
+            (Série A: 14210 is round 1, match 0).
+        sequential: id <code><number>, numbers 1..matches (Série B, Copa do Brasil).
+
+    seasons overrides the number of matches of a given year (e.g. a shorter cup edition), so
+    finished seasons get a tight URL set. stop_after_misses lets the downloader stop walking a
+    season after that many consecutive ids without a borderô (matches not played yet).
+    """
+    code: str
+    name: str = ""
+    scheme: Literal["round_match", "sequential"] = "sequential"
+    matches: Optional[int] = None
+    rounds: int = SEASON_ROUNDS
+    matches_per_round: int = 10
+    seasons: Dict[str, int] = {}
+    stop_after_misses: Optional[int] = None
+
+    def season_matches(self, year: int) -> int:
+        """Number of matches of a season."""
+        if str(year) in self.seasons:
+            return self.seasons[str(year)]
+        if self.scheme == "round_match":
+            return self.rounds * self.matches_per_round
+        return self.matches or 0
+
+    def match_numbers(self, year: int) -> List[int]:
+        """Numeric part of the season's match ids, in fixture order."""
+        count = self.season_matches(year)
+        if self.scheme == "round_match":
+            width = 10 ** len(str(self.matches_per_round - 1))
+            return [round_number * width + match
+                    for round_number in range(1, self.rounds + 1) for match in range(self.matches_per_round)][:count]
+        return list(range(1, count + 1))
+
+    def sequence(self, number: int) -> int:
+        """1-based position of a match id's number within its season."""
+        if self.scheme == "round_match":
+            width = 10 ** len(str(self.matches_per_round - 1))
+            return (number // width - 1) * self.matches_per_round + number % width + 1
+        return number
+
+    def season_round(self, year: int, number: int) -> int:
+        """Round of the season (1..SEASON_ROUNDS) a match id falls in, comparable across competitions."""
+        season = self.season_matches(year)
+        if not season:
+            return 0
+        return max(1, min(SEASON_ROUNDS, (self.sequence(number) - 1) * SEASON_ROUNDS // season + 1))
+
+    def urls(self, year: int, base_url: Optional[str] = None) -> List[str]:
+        base_url = (base_url or os.getenv("CBF_BASE_URL", "https://conteudo.cbf.com.br/sumulas")).rstrip("/")
+        return [f"{base_url}/{year}/{self.code}{number}b.pdf" for number in self.match_numbers(year)]
+
+
+_registry_cache: Dict[str, tuple] = {}
+
+
+def load_competitions(path: Optional[str] = None) -> Dict[str, Competition]:
+    """
+    Reads the competition registry (COMPETITIONS_FILE, default config/competitions.json).
+
+    The file maps each competition code to its numbering scheme and season sizes, so new
+    competitions only need a new entry. It is re-read when it changes on disk.
+
+    Raises:
+        ConfigurationError: When the file is missing or an entry is invalid.
+    """
+    path = Path(path or os.getenv("COMPETITIONS_FILE") or DEFAULT_REGISTRY)
+    try:
+        mtime = path.stat().st_mtime
+        cached = _registry_cache.get(str(path))
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        competitions = {str(code): Competition(code=str(code), **entry) for code, entry in raw.items()}
+    except (OSError, ValueError, TypeError, ValidationError) as e:
+        raise ConfigurationError(f"Registro de competições inválido: {path}", {"path": str(path), "error": str(e)})
+    _registry_cache[str(path)] = (mtime, competitions)
+    return competitions
+
+
+def get_competition(code: str) -> Competition:
+    """
+    Raises:
+        ConfigurationError: For codes not in the registry.
+    """
+    competition = load_competitions().get(str(code))
+    if competition is None:
+        logger.warning("Unknown competition code", competition_code=code)
+        raise ConfigurationError(f"Código de competição desconhecido ou não suportado: {code}")
+    return competition
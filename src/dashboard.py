@@ -1,51 +1,113 @@
+import sys
+from pathlib import Path
 import streamlit as st
 import pandas as pd
 import numpy as np
 
-st.set_page_config(layout="wide") # Moved to the top
+# Run as "streamlit run src/dashboard.py": make the src package importable, as run.py does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.aggregates import update_rollups, rollup_fields
+from src.categorize import LineItemClassifier, OTHER
+from src.lookup_store import get_lookup_store
+from src.dataset import MatchDataset, WEEKDAYS_PT
+from src import dashboard_data
+from src.dashboard_data import (selecao_normalizada, fatia_pagina, preparar_detalhe, detalhe_do_jogo,
+                                totais_do_clube, totais_da_categoria)
 
-# Load data
-@st.cache_data
-def load_data():
-    data = pd.read_csv("csv/jogos_resumo_clean.csv") # Removed parse_dates from here
-    
-    # Explicitly convert 'data_jogo' to datetime, coercing errors to NaT
-    data['data_jogo'] = pd.to_datetime(data['data_jogo'], errors='coerce')
-
-    # Ensure relevant columns are numeric, coercing errors to NaN
-    numeric_cols = ['receita_bruta_total', 'publico_total', 'resultado_liquido']
-    for col in numeric_cols:
-        data[col] = pd.to_numeric(data[col], errors='coerce')
+st.set_page_config(layout="wide") # Moved to the top
 
-    # Calculate additional metrics
-    data['ticket_medio'] = data['receita_bruta_total'] / data['publico_total']
-    data['margem_liquida'] = data['resultado_liquido'] / data['receita_bruta_total']
-    
-    # Replace inf values with NaN, then fill NaN with 0 (or an appropriate value)
-    data.replace([np.inf, -np.inf], np.nan, inplace=True)
-    data['ticket_medio'].fillna(0, inplace=True)
-    data['margem_liquida'].fillna(0, inplace=True)
-    
-    # Create Portuguese day of the week
-    dias_semana_map = {
-        'Monday': 'Segunda-feira',
-        'Tuesday': 'Terça-feira',
-        'Wednesday': 'Quarta-feira',
-        'Thursday': 'Quinta-feira',
-        'Friday': 'Sexta-feira',
-        'Saturday': 'Sábado',
-        'Sunday': 'Domingo'
-    }
-    data['dia_semana_en'] = data['data_jogo'].dt.day_name()
-    data['dia_semana_pt'] = data['dia_semana_en'].map(dias_semana_map)
-    
-    # Define categorical order for Portuguese days of the week
-    dias_ordenados = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira', 'Sexta-feira', 'Sábado', 'Domingo']
-    data['dia_semana_pt'] = pd.Categorical(data['dia_semana_pt'], categories=dias_ordenados, ordered=True)
-    
-    return data
+CSV_DIR = Path("csv")
+LOOKUP_DIR = Path("lookups")
+CLEAN_CSV = CSV_DIR / "jogos_resumo_clean.csv"
+# Line item tables for the drill-down: file, text column, bucket column (see categorize.py), columns kept
+DETALHES = {
+    "Receitas": ("receitas_detalhe", "ticket", "source", "tipo_ingresso", ["id_jogo_cbf", "source", "quantity", "price", "amount"]),
+    "Despesas": ("despesas_detalhe", "expense", "category", "tipo_despesa", ["id_jogo_cbf", "category", "amount"]),
+}
+FILTER_CACHE_ENTRIES = 64 # Distinct filter states kept in the filter-result cache
+PAGE_SIZES = [50, 100, 250, 500]
+DIAS_ORDENADOS = WEEKDAYS_PT
+
+# Load data: one dataset per server process, reloaded incrementally when the CSV changes
+@st.cache_resource
+def load_dataset():
+    return MatchDataset(CLEAN_CSV)
+
+def formato_br(casas, prefixo=""):
+    """Number formatter with Brazilian separators (R$ 1.234,56)."""
+    def formatar(valor):
+        return prefixo + f"{valor:,.{casas}f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    return formatar
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def posicoes_filtradas(_data, versao, inicio, fim, competicoes=None, mandantes=None, visitantes=None):
+    """Row positions of the matches passing the filters, cached per normalized filter state and data version."""
+    return dashboard_data.posicoes_filtradas(_data, inicio, fim, competicoes, mandantes, visitantes)
+
+# Pre-aggregated sums and counts per (temporada, competicao, time, dia_semana), kept up to date incrementally
+@st.cache_data(max_entries=2)
+def load_rollups(versao):
+    tables = update_rollups(CLEAN_CSV)
+    rollups = {}
+    for role, table in tables.items():
+        rollup = pd.DataFrame(table.rows(), columns=rollup_fields(role))
+        rollup['data_min'] = pd.to_datetime(rollup['data_min'])
+        rollup['data_max'] = pd.to_datetime(rollup['data_max'])
+        rollups[role] = rollup
+    return rollups
+
+def filtrar_rollup(rollup, inicio, fim, competicoes, times, outro_time_completo):
+    """
+    Selects the rollup rows for the current filters, or returns None when the filters cannot
+    be answered from the rollup: the period must cover whole seasons and the other team
+    filter must keep every team.
+    """
+    if not outro_time_completo or rollup.empty:
+        return None
+    temporadas = rollup.groupby('temporada').agg(inicio=('data_min', 'min'), fim=('data_max', 'max'))
+    dentro = (temporadas['inicio'] >= inicio) & (temporadas['fim'] <= fim)
+    fora = (temporadas['fim'] < inicio) | (temporadas['inicio'] > fim)
+    if not (dentro | fora).all():
+        return None
+    time_col = rollup.columns[2]
+    return rollup[
+        rollup['temporada'].isin(temporadas.index[dentro]) &
+        rollup['competicao'].isin(competicoes) &
+        rollup[time_col].isin(times)
+    ]
+
+def media_por(rollup, coluna, soma, contagem):
+    """Mean of a measure per group, composed from the rollup sums and counts."""
+    grupos = rollup.groupby(coluna)[[soma, contagem]].sum()
+    return (grupos[soma] / grupos[contagem].replace(0, np.nan)).rename(soma)
+
+def caminho_detalhe(nome):
+    """Prefers the categorized *_clean.csv written by the normalization step."""
+    arquivo = DETALHES[nome][0]
+    clean = CSV_DIR / f"{arquivo}_clean.csv"
+    return clean if clean.exists() else CSV_DIR / f"{arquivo}.csv"
 
-data = load_data()
+@st.cache_data
+def carregar_detalhe(nome, versao):
+    """
+    Loads one line item table only with the columns the drill-down uses, sorted and indexed by
+    id_jogo_cbf, plus a per-match total per bucket used by the club and category views.
+    """
+    _, kind, texto, tipo, colunas = DETALHES[nome]
+    caminho = caminho_detalhe(nome)
+    detalhe = pd.read_csv(caminho, usecols=lambda c: c in colunas or c == tipo,
+                          dtype={'id_jogo_cbf': str, texto: 'category'})
+    if tipo not in detalhe.columns:
+        # Raw file: bucket each distinct text once with the local rules and cache (no Gemini calls)
+        classifier = LineItemClassifier(kind, LOOKUP_DIR)
+        buckets = {t: classifier.classify(t) or OTHER for t in detalhe[texto].cat.categories}
+        detalhe[tipo] = detalhe[texto].map(buckets)
+    return preparar_detalhe(detalhe, tipo)
+
+dataset = load_dataset()
+data = dataset.load()
+versao_dados = dataset.version # Part of every filter-cache key
+rollups = load_rollups(versao_dados)
 
 st.title("CBF Robot - Análise de Jogos de Futebol")
 
@@ -86,15 +148,14 @@ else:
 start_date_filter = pd.Timestamp(selected_date_range[0])
 end_date_filter = pd.Timestamp(selected_date_range[1])
 
-data_filtrada_periodo = data[
-    (data['data_jogo'] >= start_date_filter) & (data['data_jogo'] <= end_date_filter)
-].copy()
+data_filtrada_periodo = data.iloc[posicoes_filtradas(data, versao_dados, start_date_filter, end_date_filter)]
 
 
+competicoes_options = data_filtrada_periodo["competicao"].dropna().unique().tolist()
 competicao = st.sidebar.multiselect(
     "Competição",
-    options=data_filtrada_periodo["competicao"].dropna().unique(),
-    default=data_filtrada_periodo["competicao"].dropna().unique()
+    options=competicoes_options,
+    default=competicoes_options
 )
 
 times_mandantes_options = sorted(data_filtrada_periodo["time_mandante"].dropna().unique())
@@ -111,24 +172,39 @@ time_visitante_selecionado = st.sidebar.multiselect(
     default=times_visitantes_options
 )
 
-# Apply filters
-data_dashboard = data_filtrada_periodo[
-    data_filtrada_periodo["competicao"].isin(competicao) &
-    data_filtrada_periodo["time_mandante"].isin(time_mandante_selecionado) &
-    data_filtrada_periodo["time_visitante"].isin(time_visitante_selecionado)
-].copy() # Use .copy() to avoid SettingWithCopyWarning
+# Apply filters (cached per normalized filter state; a full selection only drops empty cells, like the rollups)
+data_dashboard = data.iloc[posicoes_filtradas(
+    data, versao_dados, start_date_filter, end_date_filter,
+    selecao_normalizada(competicao, competicoes_options),
+    selecao_normalizada(time_mandante_selecionado, times_mandantes_options),
+    selecao_normalizada(time_visitante_selecionado, times_visitantes_options),
+)]
+
+# Aggregates come from the rollups when the filters allow it, otherwise from the filtered rows
+rollup_mandante = filtrar_rollup(rollups['mandante'], start_date_filter, end_date_filter, competicao,
+                                 time_mandante_selecionado, set(time_visitante_selecionado) >= set(times_visitantes_options))
+rollup_visitante = filtrar_rollup(rollups['visitante'], start_date_filter, end_date_filter, competicao,
+                                  time_visitante_selecionado, set(time_mandante_selecionado) >= set(times_mandantes_options))
+rollup_geral = rollup_mandante if rollup_mandante is not None else rollup_visitante
 
 if data_dashboard.empty:
     st.warning("Nenhum dado encontrado para os filtros selecionados.")
 else:
     # --- GENERAL STATS ---
     st.header("Estatísticas Gerais do Período Filtrado")
-    total_jogos = data_dashboard.shape[0]
-    total_publico = data_dashboard['publico_total'].sum()
-    total_receita = data_dashboard['receita_bruta_total'].sum()
+    if rollup_geral is not None:
+        total_jogos = int(rollup_geral['jogos'].sum())
+        total_publico = rollup_geral['publico_total'].sum()
+        total_receita = rollup_geral['receita_bruta_total'].sum()
+        total_resultado = rollup_geral['resultado_liquido'].sum()
+    else:
+        total_jogos = data_dashboard.shape[0]
+        total_publico = data_dashboard['publico_total'].sum()
+        total_receita = data_dashboard['receita_bruta_total'].sum()
+        total_resultado = data_dashboard['resultado_liquido'].sum()
     # Calculate overall ticket_medio and margem_liquida carefully to avoid division by zero
     overall_ticket_medio = total_receita / total_publico if total_publico > 0 else 0
-    overall_margem_liquida = data_dashboard['resultado_liquido'].sum() / total_receita if total_receita > 0 else 0
+    overall_margem_liquida = total_resultado / total_receita if total_receita > 0 else 0
     total_receita_milhoes = total_receita / 1_000_000
 
 
@@ -149,7 +225,12 @@ else:
         st.subheader("Público Médio por Dia da Semana")
         # Group by Portuguese day name, calculate mean, then sort by the categorical order (day of week)
         # or by value. Let's sort by value (mean attendance) for now.
-        dia_semana_publico = data_dashboard.groupby('dia_semana_pt', observed=False)['publico_total'].mean().sort_values(ascending=False)
+        if rollup_geral is not None:
+            dia_semana_publico = media_por(rollup_geral, 'dia_semana', 'publico_total', 'publico_jogos').reindex(range(7))
+            dia_semana_publico.index = pd.CategoricalIndex(DIAS_ORDENADOS, categories=DIAS_ORDENADOS, ordered=True, name='dia_semana_pt')
+            dia_semana_publico = dia_semana_publico.sort_values(ascending=False)
+        else:
+            dia_semana_publico = data_dashboard.groupby('dia_semana_pt', observed=False)['publico_total'].mean().sort_values(ascending=False)
         st.bar_chart(dia_semana_publico)
         st.caption("Mostra o público médio para cada dia da semana em que ocorreram jogos.")
 
@@ -174,13 +255,19 @@ else:
     col3_publico, col4_publico = st.columns(2)
     with col3_publico:
         st.subheader("Público Médio por Time Mandante")
-        publico_medio_mandante = data_dashboard.groupby('time_mandante')['publico_total'].mean().sort_values(ascending=False).head(20) # Top 20
+        if rollup_mandante is not None:
+            publico_medio_mandante = media_por(rollup_mandante, 'time_mandante', 'publico_total', 'publico_jogos').sort_values(ascending=False).head(20)
+        else:
+            publico_medio_mandante = data_dashboard.groupby('time_mandante', observed=True)['publico_total'].mean().sort_values(ascending=False).head(20) # Top 20
         st.bar_chart(publico_medio_mandante)
         st.caption("Top 20 times com maior público médio quando mandantes.")
 
     with col4_publico:
         st.subheader("Público Médio por Time Visitante")
-        publico_medio_visitante = data_dashboard.groupby('time_visitante')['publico_total'].mean().sort_values(ascending=False).head(20) # Top 20
+        if rollup_visitante is not None:
+            publico_medio_visitante = media_por(rollup_visitante, 'time_visitante', 'publico_total', 'publico_jogos').sort_values(ascending=False).head(20)
+        else:
+            publico_medio_visitante = data_dashboard.groupby('time_visitante', observed=True)['publico_total'].mean().sort_values(ascending=False).head(20) # Top 20
         st.bar_chart(publico_medio_visitante)
         st.caption("Top 20 times com maior público médio quando visitantes.")
     
@@ -192,13 +279,19 @@ else:
 
     with col1_fin:
         st.subheader("Ticket Médio por Clube (Mandante)")
-        ticket_medio_clube = data_dashboard.groupby('time_mandante')['ticket_medio'].mean().sort_values(ascending=False).head(20) # Top 20
+        if rollup_mandante is not None:
+            ticket_medio_clube = media_por(rollup_mandante, 'time_mandante', 'ticket_medio_soma', 'jogos').rename('ticket_medio').sort_values(ascending=False).head(20)
+        else:
+            ticket_medio_clube = data_dashboard.groupby('time_mandante', observed=True)['ticket_medio'].mean().sort_values(ascending=False).head(20) # Top 20
         st.bar_chart(ticket_medio_clube)
         st.caption("Top 20 times com maior ticket médio quando mandantes.")
 
     with col2_fin:
         st.subheader("Margem Líquida Média por Clube (Mandante)")
-        margem_liquida_clube = data_dashboard.groupby('time_mandante')['margem_liquida'].mean().sort_values(ascending=False).head(20) # Top 20
+        if rollup_mandante is not None:
+            margem_liquida_clube = media_por(rollup_mandante, 'time_mandante', 'margem_liquida_soma', 'jogos').rename('margem_liquida').sort_values(ascending=False).head(20)
+        else:
+            margem_liquida_clube = data_dashboard.groupby('time_mandante', observed=True)['margem_liquida'].mean().sort_values(ascending=False).head(20) # Top 20
         st.bar_chart(margem_liquida_clube)
         st.caption("Top 20 times com maior margem líquida média quando mandantes. Valores podem ser negativos.")
 
@@ -230,7 +323,7 @@ else:
         top_receita = data_dashboard.nlargest(5, 'receita_bruta_total')[['data_jogo', 'time_mandante', 'time_visitante', 'receita_bruta_total', 'competicao']]
         top_receita_display = top_receita.copy()
         top_receita_display['data_jogo'] = top_receita_display['data_jogo'].dt.strftime('%d/%m/%y')
-        st.dataframe(top_receita_display.style.format({"receita_bruta_total": "R$ {:,.2f}".replace('_', '.')}))
+        st.dataframe(top_receita_display.style.format({"receita_bruta_total": formato_br(2, "R$ ")}))
 
     with col3_top:
         st.subheader("Por Maior Ticket Médio")
@@ -238,7 +331,7 @@ else:
         top_ticket = data_dashboard[data_dashboard['publico_total'] > 0].nlargest(5, 'ticket_medio')[['data_jogo', 'time_mandante', 'time_visitante', 'ticket_medio', 'publico_total', 'competicao']]
         top_ticket_display = top_ticket.copy()
         top_ticket_display['data_jogo'] = top_ticket_display['data_jogo'].dt.strftime('%d/%m/%y')
-        st.dataframe(top_ticket_display.style.format({"ticket_medio": "R$ {:_.2f}".replace('_', '.'), "publico_total": "{:_.0f}".replace('_', '.')}))
+        st.dataframe(top_ticket_display.style.format({"ticket_medio": formato_br(2, "R$ "), "publico_total": formato_br(0)}))
 
     with col4_top:
         st.subheader("Por Maior Margem Líquida")
@@ -246,27 +339,32 @@ else:
         top_margem = data_dashboard[data_dashboard['receita_bruta_total'] != 0].nlargest(5, 'margem_liquida')[['data_jogo', 'time_mandante', 'time_visitante', 'margem_liquida', 'receita_bruta_total', 'competicao']]
         top_margem_display = top_margem.copy()
         top_margem_display['data_jogo'] = top_margem_display['data_jogo'].dt.strftime('%d/%m/%y')
-        st.dataframe(top_margem_display.style.format({"margem_liquida": "{:.2%}", "receita_bruta_total": "R$ {:_.2f}".replace('_', '.')}))
+        st.dataframe(top_margem_display.style.format({"margem_liquida": "{:.2%}", "receita_bruta_total": formato_br(2, "R$ ")}))
 
     st.markdown("---")
 
     # Display raw data
     st.header("Dados Brutos Filtrados")
-    st.write(f"Exibindo {data_dashboard.shape[0]} jogos.")
+    # Only the current page is formatted and sent to the browser
+    col_pagina, col_tamanho = st.columns(2)
+    tamanho_pagina = col_tamanho.selectbox("Linhas por página", PAGE_SIZES, index=1)
+    _, total_paginas = fatia_pagina(data_dashboard, 1, tamanho_pagina)
+    pagina = col_pagina.number_input("Página", min_value=1, max_value=total_paginas, value=1, step=1)
+    st.write(f"Exibindo {data_dashboard.shape[0]} jogos (página {pagina} de {total_paginas}).")
     
     # Prepare data for display, handling NaT in 'data_jogo' for formatting
-    data_display = data_dashboard.drop(columns=['dia_semana_en']).copy()
+    data_display = fatia_pagina(data_dashboard, pagina, tamanho_pagina)[0].drop(columns=['dia_semana']).copy()
     
     # Formatters - using lambda for date to handle NaT
     formatters = {
         'data_jogo': lambda x: x.strftime('%d/%m/%y') if pd.notnull(x) else '',
-        'publico_pagante': '{:_.0f}'.replace('_', '.'),
-        'publico_nao_pagante': '{:_.0f}'.replace('_', '.'),
-        'publico_total': '{:_.0f}'.replace('_', '.'),
-        'receita_bruta_total': 'R$ {:_.2f}'.replace('_', '.'),
-        'despesa_total': 'R$ {:_.2f}'.replace('_', '.'),
-        'resultado_liquido': 'R$ {:_.2f}'.replace('_', '.'),
-        'ticket_medio': 'R$ {:_.2f}'.replace('_', '.'),
+        'publico_pagante': formato_br(0),
+        'publico_nao_pagante': formato_br(0),
+        'publico_total': formato_br(0),
+        'receita_bruta_total': formato_br(2, 'R$ '),
+        'despesa_total': formato_br(2, 'R$ '),
+        'resultado_liquido': formato_br(2, 'R$ '),
+        'ticket_medio': formato_br(2, 'R$ '),
         'margem_liquida': '{:.2%}'
     }
     
@@ -275,7 +373,7 @@ else:
     # Forcing numeric columns to be float before applying float formatters can help.
     for col, fmt in formatters.items():
         if col in data_display.columns:
-            if isinstance(fmt, str) and ('f' in fmt or '%' in fmt) and col != 'data_jogo': # Numeric formats
+            if col != 'data_jogo': # Numeric formats
                  data_display[col] = pd.to_numeric(data_display[col], errors='coerce') # Ensure numeric
             # For date, it's handled by lambda. For others, style.format will apply.
 
@@ -284,3 +382,52 @@ else:
     except Exception as e:
         st.error(f"Erro ao formatar a tabela de dados brutos: {e}")
         st.dataframe(data_display) # Fallback to unformatted display
+
+    st.markdown("---")
+
+    # --- LINE ITEM DRILL-DOWN ---
+    st.header("Detalhamento de Receitas e Despesas")
+    # The detail tables are only read once this section is opened
+    if st.toggle("Mostrar detalhamento por jogo, clube e categoria"):
+        nome_detalhe = st.radio("Tabela", list(DETALHES), horizontal=True)
+        _, _, texto_detalhe, tipo_detalhe, _ = DETALHES[nome_detalhe]
+        detalhe, totais = carregar_detalhe(nome_detalhe, caminho_detalhe(nome_detalhe).stat().st_mtime_ns)
+        jogos_filtrados = data_dashboard.set_index('id_jogo_cbf')[['data_jogo', 'time_mandante', 'time_visitante']]
+        totais_filtrados = totais[totais.index.isin(jogos_filtrados.index)]
+
+        aba_jogo, aba_clube, aba_categoria = st.tabs(["Por jogo", "Por clube", "Por categoria"])
+
+        with aba_jogo:
+            rotulos = {
+                id_jogo: f"{jogo.data_jogo:%d/%m/%y} - {jogo.time_mandante} x {jogo.time_visitante}" if pd.notnull(jogo.data_jogo)
+                else f"{jogo.time_mandante} x {jogo.time_visitante}"
+                for id_jogo, jogo in jogos_filtrados.iterrows()
+            }
+            id_jogo = st.selectbox("Jogo", list(rotulos), format_func=rotulos.get)
+            linhas_jogo = detalhe_do_jogo(detalhe, id_jogo)
+            if linhas_jogo.empty:
+                st.info("Nenhum item encontrado para este jogo.")
+            else:
+                st.bar_chart(linhas_jogo.groupby(tipo_detalhe, observed=True)['amount'].sum().sort_values(ascending=False))
+                st.dataframe(linhas_jogo.reset_index(drop=True).style.format(
+                    {'amount': formato_br(2, 'R$ '), 'price': formato_br(2, 'R$ '), 'quantity': formato_br(0)}, na_rep='-'))
+
+        with aba_clube:
+            clube = st.selectbox("Clube (mandante)", sorted(jogos_filtrados['time_mandante'].dropna().unique()))
+            aliases = get_lookup_store(LOOKUP_DIR).aliases("teams", clube)
+            if aliases:
+                st.caption(f"Grafias nos borderôs: {', '.join(sorted(aliases))}")
+            por_tipo = totais_do_clube(totais_filtrados, jogos_filtrados, clube, tipo_detalhe)
+            if por_tipo.empty:
+                st.info("Nenhum item encontrado para este clube no período filtrado.")
+            else:
+                st.bar_chart(por_tipo['valor'])
+                st.dataframe(por_tipo.style.format(
+                    {'valor': formato_br(2, 'R$ '), 'valor_medio_por_jogo': formato_br(2, 'R$ '), 'linhas': formato_br(0)}))
+
+        with aba_categoria:
+            categoria = st.selectbox("Categoria", list(totais_filtrados[tipo_detalhe].cat.categories))
+            por_clube = totais_da_categoria(totais_filtrados, jogos_filtrados, categoria, tipo_detalhe)
+            st.metric(f"Total em {categoria}", formato_br(2, 'R$ ')(por_clube.sum()))
+            st.bar_chart(por_clube.head(20))
+            st.caption("Top 20 clubes mandantes pelo valor total na categoria, no período e filtros selecionados.")
@@ -0,0 +1,83 @@
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Pure data helpers behind the dashboard (filters, pagination, drill-down frames), kept out of
+# src/dashboard.py so they can be imported and tested without a Streamlit session.
+
+
+def selecao_normalizada(selecionados, opcoes) -> Optional[tuple]:
+    """Filter-cache key part for a multiselect: None when every option is kept, else the sorted values."""
+    selecionados = set(selecionados)
+    return None if selecionados >= set(opcoes) else tuple(sorted(selecionados))
+
+
+def mascara_categoria(coluna: pd.Series, valores: Optional[Iterable]) -> np.ndarray:
+    """
+    Boolean mask of a categorical column against the selected values.
+
+    Empty cells never match, as with Series.isin; None keeps every non-empty value and values
+    that are not categories of the column match nothing.
+    """
+    codigos = coluna.cat.codes.to_numpy()
+    if valores is None:
+        return codigos >= 0
+    indices = coluna.cat.categories.get_indexer(list(valores))
+    return np.isin(codigos, indices[indices >= 0]) # get_indexer gives -1, the NaN code, for unknown values
+
+
+def posicoes_filtradas(data: pd.DataFrame, inicio, fim, competicoes=None, mandantes=None, visitantes=None) -> np.ndarray:
+    """
+    Row positions of the matches in the period whose competition and teams are set and selected.
+
+    None for a selection keeps every non-empty value, so a full selection and the rollups
+    (which skip empty keys) count the same matches.
+    """
+    datas = data['data_jogo']
+    mascara = ((datas >= inicio) & (datas <= fim)).to_numpy()
+    mascara = (mascara
+               & mascara_categoria(data['competicao'], competicoes)
+               & mascara_categoria(data['time_mandante'], mandantes)
+               & mascara_categoria(data['time_visitante'], visitantes))
+    return np.flatnonzero(mascara)
+
+
+def fatia_pagina(data: pd.DataFrame, pagina: int, tamanho_pagina: int) -> Tuple[pd.DataFrame, int]:
+    """Rows of a 1-based page (clamped to the last one) and the page count."""
+    total_paginas = max(1, -(-data.shape[0] // tamanho_pagina))
+    inicio = (min(max(pagina, 1), total_paginas) - 1) * tamanho_pagina
+    return data.iloc[inicio:inicio + tamanho_pagina], total_paginas
+
+
+def preparar_detalhe(detalhe: pd.DataFrame, tipo: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Line items sorted and indexed by id_jogo_cbf, plus their total value and line count per
+    (match, bucket) used by the club and category views.
+    """
+    detalhe = detalhe.assign(**{tipo: detalhe[tipo].astype('category')})
+    # A sorted index turns per-match lookups into binary searches
+    detalhe = detalhe.sort_values('id_jogo_cbf', kind='stable').set_index('id_jogo_cbf')
+    totais = (detalhe.groupby([detalhe.index, tipo], observed=True)['amount']
+              .agg(['sum', 'size']).rename(columns={'sum': 'valor', 'size': 'linhas'}).reset_index(level=1))
+    return detalhe, totais
+
+
+def detalhe_do_jogo(detalhe: pd.DataFrame, id_jogo) -> pd.DataFrame:
+    if id_jogo not in detalhe.index:
+        return detalhe.iloc[0:0]
+    return detalhe.loc[[id_jogo]]
+
+
+def totais_do_clube(totais: pd.DataFrame, jogos: pd.DataFrame, clube: str, tipo: str) -> pd.DataFrame:
+    """Value and lines per bucket over the club's home matches, with the mean value per match."""
+    jogos_clube = jogos.index[jogos['time_mandante'] == clube]
+    por_tipo = totais[totais.index.isin(jogos_clube)].groupby(tipo, observed=True)[['valor', 'linhas']].sum()
+    por_tipo['valor_medio_por_jogo'] = por_tipo['valor'] / max(len(jogos_clube), 1)
+    return por_tipo.sort_values('valor', ascending=False)
+
+
+def totais_da_categoria(totais: pd.DataFrame, jogos: pd.DataFrame, categoria: str, tipo: str) -> pd.Series:
+    """Total value of one bucket per home club, largest first."""
+    da_categoria = totais[totais[tipo] == categoria].join(jogos['time_mandante'])
+    return da_categoria.groupby('time_mandante', observed=True)['valor'].sum().sort_values(ascending=False)
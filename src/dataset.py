@@ -0,0 +1,150 @@
+import io
+import os
+import threading
+import logging
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_COLUMNS = ['competicao', 'time_mandante', 'time_visitante', 'estadio', 'status', 'data_processamento', 'log_erro']
+ATTENDANCE_COLUMNS = ['publico_pagante', 'publico_nao_pagante', 'publico_total']
+MONEY_COLUMNS = ['receita_bruta_total', 'despesa_total', 'resultado_liquido']
+WEEKDAYS_PT = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira', 'Sexta-feira', 'Sábado', 'Domingo']
+TAIL_BYTES = 4096 # Bytes before the last read offset that must be unchanged for an append-only reload
+
+# Parsed as plain strings; numbers and dates are coerced afterwards so malformed cells become NA
+READ_DTYPES = {'id_jogo_cbf': str, 'caminho_pdf_local': str, 'data_processamento': str, 'log_erro': str}
+
+
+def _ratio(numerator: pd.Series, denominator: pd.Series) -> np.ndarray:
+    # Undefined ratios (no public, no revenue) count as 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = numerator.to_numpy(dtype='float64', na_value=np.nan) / denominator.to_numpy(dtype='float64', na_value=np.nan)
+    ratio[~np.isfinite(ratio)] = 0
+    return ratio.astype('float32')
+
+
+def prepare_matches(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts clean CSV rows to compact dtypes and adds the derived dashboard columns.
+
+    Names and other low-cardinality text columns are categoricals, attendances nullable Int32, money stays float64 (sums of
+    millions need the precision) while the per-match ratios ticket_medio and
+    margem_liquida are float32. dia_semana is the weekday code (0 = Segunda-feira, -1
+    without date) and dia_semana_pt the ordered categorical built from it. Works row by
+    row, so it can be applied to appended rows only.
+    """
+    data['data_jogo'] = pd.to_datetime(data['data_jogo'], errors='coerce')
+    for col in ATTENDANCE_COLUMNS:
+        if col in data.columns:
+            data[col] = pd.to_numeric(data[col], errors='coerce').round().astype('Int32')
+    for col in MONEY_COLUMNS:
+        if col in data.columns:
+            data[col] = pd.to_numeric(data[col], errors='coerce').astype('float64')
+
+    data['ticket_medio'] = _ratio(data['receita_bruta_total'], data['publico_total'])
+    data['margem_liquida'] = _ratio(data['resultado_liquido'], data['receita_bruta_total'])
+
+    weekday = data['data_jogo'].dt.weekday
+    data['dia_semana'] = weekday.fillna(-1).astype('int8')
+    data['dia_semana_pt'] = pd.Categorical.from_codes(data['dia_semana'].to_numpy(), categories=WEEKDAYS_PT, ordered=True)
+    # Categorical codes make the isin filters integer comparisons
+    for col in CATEGORY_COLUMNS:
+        if col in data.columns:
+            data[col] = data[col].astype('category')
+    return data
+
+
+def _append_rows(data: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
+    """Concatenates prepared frames, extending the categories instead of falling back to objects."""
+    data = data.copy(deep=False)
+    for col in CATEGORY_COLUMNS:
+        if col not in data.columns:
+            continue
+        added = pd.Index(new_rows[col].dropna().unique()).difference(data[col].cat.categories)
+        if len(added):
+            data[col] = data[col].cat.add_categories(added)
+        new_rows[col] = pd.Categorical(new_rows[col], categories=data[col].cat.categories)
+    return pd.concat([data, new_rows], ignore_index=True)
+
+
+class MatchDataset:
+    """
+    The clean matches CSV as a prepared DataFrame that follows the file on disk.
+
+    load() stats the file and returns the cached frame when nothing changed. When the same
+    file grew and the bytes just before the previous end are unchanged, only the appended
+    rows are parsed and prepared; a replaced (os.replace, as the normalizer writes), shrunk
+    or tail-modified file is fully reloaded. A partially written last line is left for the
+    next load.
+    """
+
+    def __init__(self, csv_path: Path):
+        self.csv_path = Path(csv_path)
+        self.data: Optional[pd.DataFrame] = None
+        self.version = None
+        self._lock = threading.Lock()
+        self._signature = None
+        self._offset = 0
+        self._tail = b""
+        self._columns = None
+
+    def _stat(self) -> tuple:
+        stat = os.stat(self.csv_path)
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _read(self, offset: int) -> bytes:
+        with open(self.csv_path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+        return chunk[:chunk.rfind(b"\n") + 1]
+
+    def _tail_unchanged(self) -> bool:
+        start = max(0, self._offset - len(self._tail))
+        with open(self.csv_path, 'rb') as f:
+            f.seek(start)
+            return f.read(self._offset - start) == self._tail
+
+    def _advance(self, chunk: bytes):
+        self._offset += len(chunk)
+        self._tail = (self._tail + chunk)[-TAIL_BYTES:]
+
+    def _full_load(self):
+        chunk = self._read(0)
+        data = pd.read_csv(io.BytesIO(chunk), dtype=READ_DTYPES) if chunk else pd.DataFrame()
+        self._columns = list(data.columns)
+        self.data = prepare_matches(data) if chunk else data
+        self._offset, self._tail = 0, b""
+        self._advance(chunk)
+        logging.info(f"Loaded {len(self.data)} matches from {self.csv_path}")
+
+    def _append(self):
+        chunk = self._read(self._offset)
+        if not chunk:
+            return
+        new_rows = prepare_matches(pd.read_csv(io.BytesIO(chunk), header=None, names=self._columns, dtype=READ_DTYPES))
+        self.data = _append_rows(self.data, new_rows)
+        self._advance(chunk)
+        logging.info(f"Appended {len(new_rows)} matches from {self.csv_path}")
+
+    def load(self) -> pd.DataFrame:
+        """Returns the current frame, re-reading only what changed since the last call."""
+        with self._lock:
+            signature = self._stat()
+            if self.data is not None and signature == self._signature:
+                return self.data
+            appended = (
+                self.data is not None and self._columns
+                and signature[0] == self._signature[0]
+                and signature[1] >= self._offset
+                and self._tail_unchanged()
+            )
+            if appended:
+                self._append()
+            else:
+                self._full_load()
+            self._signature = signature
+            self.version = (signature[0], self._offset)
+            return self.data
@@ -2,12 +2,13 @@ import os
 import json
 from google import genai
 from google.genai import types
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from typing import List, Dict, Any, Optional
 import re
-from io import BytesIO
 import pdfplumber
 import time
+import datetime
+import threading
 
 from .utils import (
     get_logger,
@@ -15,10 +16,14 @@ from .utils import (
     APIError,
     ConfigurationError
 )
+from .pdf_io import BufferLike, as_bytes, pdf_stream
 
 # Set up logger for this module
 logger = get_logger("gemini")
 
+# analyze_pdf error messages caused by the document (nothing extractable), as opposed to API, key or network failures
+UNREADABLE_RESPONSE_PATTERN = re.compile(r"does not match PDFExtract schema|response empty or blocked|PDF content bytes are empty")
+
 # Define Pydantic models for structured output
 class RevenueDetail(BaseModel):
     source: str
@@ -65,13 +70,21 @@ def setup_client():
     if not api_key:
         raise ConfigurationError("GEMINI_API_KEY environment variable is not set.")
 
-    return genai.Client(api_key=api_key)
+    return genai.Client(api_key=api_key, http_options=gemini_http_options())
+
+def gemini_http_options() -> Optional[types.HttpOptions]:
+    """
+    Points the Gen AI client at GEMINI_BASE_URL when it is set (benchmarks run a local
+    fake server there); None keeps the public endpoint.
+    """
+    base_url = os.getenv("GEMINI_BASE_URL")
+    return types.HttpOptions(base_url=base_url) if base_url else None
 
 # Simple rule-based fallback parser using pdfplumber
 
-def fallback_extract(pdf_content_bytes: bytes) -> dict:
+def fallback_extract(pdf_content_bytes: BufferLike) -> dict:
     text = ""
-    with pdfplumber.open(BytesIO(pdf_content_bytes)) as pdf:
+    with pdf_stream(pdf_content_bytes) as stream, pdfplumber.open(stream) as pdf:
         for page in pdf.pages:
             if page_text := page.extract_text():
                 text += page_text + "\n"
@@ -86,8 +99,7 @@ def fallback_extract(pdf_content_bytes: bytes) -> dict:
                 return None
         return None
     gross_rev = parse_amount(r"Receita\s*Bruta(?:\s*Total)?:?\s*[R\$]*\s*([\d\.,]+)")
-    total_exp = parse_amount(r"Despesa\s*Total:?")
-    total_exp = parse_amount(r"Despesa\s*Total:?[R\$]*\s*([\d\.,]+)") if total_exp is None else total_exp
+    total_exp = parse_amount(r"Despesa\s*Total:?[R\$]*\s*([\d\.,]+)")
     net_res = None
     if gross_rev is not None and total_exp is not None:
         net_res = gross_rev - total_exp
@@ -100,13 +112,202 @@ def fallback_extract(pdf_content_bytes: bytes) -> dict:
     }
     return {"financial_data": financial_data}
 
-def analyze_pdf(pdf_content_bytes: bytes, custom_prompt: str = None) -> Dict[str, Any]:
+class ModelTier(BaseModel):
+    """A Gemini model in the routing ladder, with its token prices (USD per 1M tokens)."""
+    model: str
+    input_price: float = 0.0
+    output_price: float = 0.0
+
+DEFAULT_MODEL_TIERS = "gemini-2.0-flash-lite:0.075:0.30,gemini-2.0-flash:0.10:0.40,gemini-2.5-pro:1.25:10.00"
+
+def load_model_tiers() -> List[ModelTier]:
+    """
+    Reads the model routing ladder from GEMINI_MODEL_TIERS.
+
+    The variable is a comma separated list ordered from cheapest to strongest model,
+    each entry written as ``model[:input_price:output_price]``.
+
+    Returns:
+        list: ModelTier entries in escalation order.
+    """
+    raw = os.getenv("GEMINI_MODEL_TIERS", DEFAULT_MODEL_TIERS)
+    tiers = []
+    for entry in raw.split(","):
+        parts = [p.strip() for p in entry.split(":")]
+        if not parts[0]:
+            continue
+        try:
+            prices = [float(p) for p in parts[1:3]]
+        except ValueError:
+            raise ConfigurationError(f"Invalid price in GEMINI_MODEL_TIERS entry: {entry}")
+        tiers.append(ModelTier(model=parts[0], input_price=prices[0] if prices else 0.0,
+                               output_price=prices[1] if len(prices) > 1 else 0.0))
+    if not tiers:
+        raise ConfigurationError("GEMINI_MODEL_TIERS does not define any model.")
+    return tiers
+
+def check_extract_consistency(extract: Dict[str, Any], tolerance: float = 0.01) -> List[str]:
+    """
+    Runs arithmetic sanity checks over a schema-valid extraction.
+
+    Args:
+        extract (dict): Extraction already validated against PDFExtract.
+        tolerance (float): Accepted relative difference between compared totals.
+
+    Returns:
+        list: Human readable descriptions of the failed checks (empty when consistent).
+    """
+    def close(a, b):
+        return abs(a - b) <= max(1.0, tolerance * max(abs(a), abs(b)))
+
+    issues = []
+    financial = extract["financial_data"]
+    audience = extract["audience_statistics"]
+
+    if not close(financial["gross_revenue"] - financial["total_expenses"], financial["net_result"]):
+        issues.append("net_result != gross_revenue - total_expenses")
+    if not close(audience["paid_attendance"] + audience["non_paid_attendance"], audience["total_attendance"]):
+        issues.append("total_attendance != paid_attendance + non_paid_attendance")
+    if financial["revenue_details"]:
+        revenue_sum = sum(item["amount"] for item in financial["revenue_details"])
+        if not close(revenue_sum, financial["gross_revenue"]):
+            issues.append("sum(revenue_details) != gross_revenue")
+    if financial["expense_details"]:
+        expense_sum = sum(item["amount"] for item in financial["expense_details"])
+        if not close(expense_sum, financial["total_expenses"]):
+            issues.append("sum(expense_details) != total_expenses")
+    return issues
+
+class RoutingStats:
+    """Thread-safe per-tier/per-competition counters for the model router."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[tuple, Dict[str, float]] = {}
+
+    def record(self, model: str, competition: Optional[str], outcome: str,
+               latency_s: float = 0.0, cost_usd: float = 0.0, tokens: int = 0):
+        """
+        Records one call to a tier.
+
+        Args:
+            model (str): Model name of the tier.
+            competition (str, optional): Competition code of the PDF, if known.
+            outcome (str): One of "accepted", "low_confidence", "invalid", "api_error".
+        """
+        key = (model, competition or "unknown")
+        with self._lock:
+            entry = self._stats.setdefault(key, {
+                "calls": 0, "accepted": 0, "low_confidence": 0, "invalid": 0, "api_error": 0,
+                "latency_s": 0.0, "cost_usd": 0.0, "tokens": 0
+            })
+            entry["calls"] += 1
+            entry[outcome] += 1
+            entry["latency_s"] += latency_s
+            entry["cost_usd"] += cost_usd
+            entry["tokens"] += tokens
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Returns one row per (model, competition) with derived success rate and mean latency."""
+        with self._lock:
+            rows = []
+            for (model, competition), entry in sorted(self._stats.items()):
+                calls = entry["calls"] or 1
+                rows.append({
+                    "model": model,
+                    "competition": competition,
+                    **entry,
+                    "success_rate": round(entry["accepted"] / calls, 4),
+                    "mean_latency_s": round(entry["latency_s"] / calls, 3),
+                })
+            return rows
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+routing_stats = RoutingStats()
+
+def write_routing_report(report_dir: str = "reports") -> Optional[str]:
+    """
+    Writes the routing statistics of the current run to reports/model_routing_<timestamp>.json.
+
+    run_operation resets the counters per run, so each report covers one run and reports can
+    be summed (backfill.HistoricalRates does) without double counting.
+
+    Returns:
+        str: Path of the report, or None when nothing was recorded.
+    """
+    rows = routing_stats.snapshot()
+    if not rows:
+        return None
+    os.makedirs(report_dir, exist_ok=True)
+    report_file = os.path.join(report_dir, f"model_routing_{datetime.datetime.now():%Y%m%dT%H%M%S}.json")
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+    logger.info("Model routing report written", path=report_file, tiers=len(rows))
+    return report_file
+
+def _call_tier(client, tier: ModelTier, pdf_part, prompt: str, retry_count: int, backoff: float):
+    """Calls one tier with the configured retries. Returns the response and the usage cost."""
+    for attempt in range(1, retry_count + 1):
+        try:
+            response = client.models.generate_content(
+                model=tier.model,
+                contents=[pdf_part, prompt],
+                config={
+                    "temperature": 0.2,
+                    "response_mime_type": "application/json",
+                    "response_schema": PDFExtract
+                }
+            )
+            break
+        except Exception as api_err:
+            logger.warning("Gemini API call failed, retrying if attempts remain",
+                           model=tier.model, attempt=attempt, error=str(api_err))
+            if attempt < retry_count:
+                time.sleep(backoff * attempt)
+            else:
+                raise
+
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or 0
+    output_tokens = getattr(usage, "candidates_token_count", None) or 0
+    cost = (prompt_tokens * tier.input_price + output_tokens * tier.output_price) / 1_000_000
+    return response, cost, prompt_tokens + output_tokens
+
+def _parse_response(response) -> Dict[str, Any]:
+    """
+    Turns a Gemini response into a PDFExtract-validated dict.
+
+    Raises:
+        APIError: If the response is empty/blocked or does not match the schema.
+    """
+    if response is not None and response.parsed:
+        return response.parsed.model_dump()
+    if response is not None and response.text:
+        try:
+            return PDFExtract.model_validate_json(response.text).model_dump()
+        except ValidationError as val_err:
+            raise APIError(f"Response does not match PDFExtract schema: {val_err.error_count()} errors",
+                           {"raw_response": response.text[:500] + ("..." if len(response.text) > 500 else "")})
+    block_reason = getattr(response.prompt_feedback, "block_reason", "Unknown") if hasattr(response, "prompt_feedback") else "Unknown"
+    raise APIError(f"API response empty or blocked. Reason: {block_reason}", {"block_reason": block_reason})
+
+def analyze_pdf(pdf_content_bytes: BufferLike, custom_prompt: str = None, competition: Optional[str] = None) -> Dict[str, Any]:
     """
     Analyzes PDF content using the Google Gen AI API with a specified prompt.
 
+    The models in GEMINI_MODEL_TIERS are tried from cheapest to strongest. A tier's answer is
+    accepted when it validates against PDFExtract and passes check_extract_consistency;
+    otherwise the document escalates to the next tier. If every tier answers with a
+    schema-valid but inconsistent extraction, the one with fewest failed checks is returned.
+
     Args:
-        pdf_content_bytes (bytes): The content of the PDF file as bytes.
+        pdf_content_bytes (bytes | memoryview): The content of the PDF file, e.g. PdfSource.view. The
+            fallback parser reads it in place; the inline upload needs one bytes copy.
         custom_prompt (str, optional): Custom prompt to guide the analysis. Defaults to a standard prompt.
+        competition (str, optional): Competition code, used only to group routing statistics.
 
     Returns:
         dict: Parsed JSON response from the Google Gen AI API or an error dictionary.
@@ -114,9 +315,11 @@ def analyze_pdf(pdf_content_bytes: bytes, custom_prompt: str = None) -> Dict[str
     fallback_enabled = os.getenv("ENABLE_FALLBACK", "true").lower() in ("1","true","yes")
     retry_count = int(os.getenv("GEMINI_RETRY_COUNT", "3"))
     backoff = float(os.getenv("GEMINI_BACKOFF_SECONDS", "1"))
+    tolerance = float(os.getenv("GEMINI_CONSISTENCY_TOLERANCE", "0.01"))
 
     try:
         client = setup_client()
+        tiers = load_model_tiers()
 
         if not pdf_content_bytes:
             logger.error("Empty PDF content received")
@@ -133,62 +336,58 @@ def analyze_pdf(pdf_content_bytes: bytes, custom_prompt: str = None) -> Dict[str
         prompt = custom_prompt if custom_prompt else default_prompt
 
         # Create the PDF part for document processing
-        pdf_part = types.Part.from_bytes(data=pdf_content_bytes, mime_type="application/pdf")
+        pdf_part = types.Part.from_bytes(data=as_bytes(pdf_content_bytes), mime_type="application/pdf")
         pdf_size_kb = len(pdf_content_bytes) / 1024
 
-        # Log the API call
-        logger.info("Sending PDF to Gemini API", 
-                   pdf_size_kb=f"{pdf_size_kb:.2f}KB",
-                   model="gemini-2.0-flash")
-
-        # Retry API call on failure
-        response = None
-        for attempt in range(1, retry_count + 1):
+        best_candidate = None # (issues, extract, model) of the least inconsistent answer so far
+        last_error = None
+        for tier in tiers:
+            # Log the API call
+            logger.info("Sending PDF to Gemini API",
+                       pdf_size_kb=f"{pdf_size_kb:.2f}KB",
+                       model=tier.model,
+                       competition=competition)
+            started = time.perf_counter()
             try:
-                response = client.models.generate_content(
-                    model="gemini-2.0-flash", 
-                    contents=[pdf_part, prompt],
-                    config={
-                        "temperature": 0.2,
-                        "response_mime_type": "application/json",
-                        "response_schema": PDFExtract
-                    }
-                )
-                break
+                response, cost, tokens = _call_tier(client, tier, pdf_part, prompt, retry_count, backoff)
             except Exception as api_err:
-                logger.warning("Gemini API call failed, retrying if attempts remain", attempt=attempt, error=str(api_err))
-                if attempt < retry_count:
-                    time.sleep(backoff * attempt)
-                else:
-                    raise
-
-        # Return structured parsed output or fallback to raw JSON parse
-        if response and response.parsed:
-            logger.info("Successfully received structured response from API")
-            return response.parsed.model_dump()
-        elif response and response.text:
-            logger.info("Received unstructured response, attempting JSON parse")
+                last_error = APIError(f"Gemini API call failed for {tier.model}: {api_err}", {"model": tier.model})
+                routing_stats.record(tier.model, competition, "api_error", time.perf_counter() - started)
+                continue
+            latency = time.perf_counter() - started
+
             try:
-                return json.loads(response.text)
-            except json.JSONDecodeError as json_err:
-                error_details = {
-                    "raw_response": response.text[:500] + ("..." if len(response.text) > 500 else ""),
-                    "error_type": "JSONDecodeError"
-                }
-                error = APIError(f"Failed to parse JSON response: {json_err}", error_details)
-                handle_error(error, error_details)
-                return {"error": str(error), "raw_response_preview": error_details["raw_response"]}
-        else:
-            # Handle blocked or empty response
-            block_reason = getattr(response.prompt_feedback, "block_reason", "Unknown") if hasattr(response, "prompt_feedback") else "Unknown"
-            error_details = {"block_reason": block_reason}
-            error = APIError(f"API response empty or blocked. Reason: {block_reason}", error_details)
-            handle_error(error, error_details, log_level="warning")
-            # Fallback on blocked/empty response
-            if fallback_enabled:
-                logger.info("Using fallback parser due to API block/empty response")
-                return fallback_extract(pdf_content_bytes)
-            return {"error": str(error)}
+                extract = _parse_response(response)
+            except APIError as parse_err:
+                last_error = parse_err
+                routing_stats.record(tier.model, competition, "invalid", latency, cost, tokens)
+                handle_error(parse_err, {"model": tier.model, **parse_err.details}, log_level="warning")
+                continue
+
+            issues = check_extract_consistency(extract, tolerance)
+            if not issues:
+                routing_stats.record(tier.model, competition, "accepted", latency, cost, tokens)
+                logger.info("Successfully received structured response from API",
+                            model=tier.model, latency_s=round(latency, 3), cost_usd=round(cost, 6))
+                return extract
+
+            routing_stats.record(tier.model, competition, "low_confidence", latency, cost, tokens)
+            logger.warning("Extraction failed consistency checks, escalating",
+                           model=tier.model, issues=issues)
+            if best_candidate is None or len(issues) < len(best_candidate[0]):
+                best_candidate = (issues, extract, tier.model)
+
+        if best_candidate is not None:
+            logger.warning("No tier produced a consistent extraction, keeping the best candidate",
+                           model=best_candidate[2], issues=best_candidate[0])
+            return best_candidate[1]
+
+        # Every tier failed: fall back to the local parser
+        error = last_error or APIError("No Gemini model tier is configured.")
+        if fallback_enabled:
+            logger.info("Using fallback parser after all model tiers failed", error=str(error))
+            return fallback_extract(pdf_content_bytes)
+        return {"error": str(error)}
 
     except ConfigurationError as e:
         # Re-raise configuration errors for handling in the caller
@@ -202,4 +401,4 @@ def analyze_pdf(pdf_content_bytes: bytes, custom_prompt: str = None) -> Dict[str
         if fallback_enabled and pdf_content_bytes:
             logger.info("Fallback extractor triggered after unexpected error")
             return fallback_extract(pdf_content_bytes)
-        return {"error": str(error)}
\ No newline at end of file
+        return {"error": str(error)}
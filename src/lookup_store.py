@@ -0,0 +1,165 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from collections import defaultdict
+from typing import Dict, List, Mapping, Optional
+
+from .sanitize import sanitize_text
+
+LOOKUP_CATEGORIES = ("teams", "stadiums", "competitions")
+
+
+def _atomic_write_json(path: Path, data, indent: Optional[int] = None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, path)
+
+
+class LookupStore:
+    """
+    In-memory team/stadium/competition lookups shared by the extractor, normalizer and dashboard.
+
+    The JSON files are parsed once; afterwards lookups are O(1) dict reads and
+    aliases() answers canonical -> raw spellings from a reverse index. Every save() of a
+    changed category bumps its version, writes lookups/snapshots/<category>_lookup.v<N>.json
+    and then atomically replaces <category>_lookup.json. Files changed by another process
+    are picked up by refresh(), which only costs a stat() per file when nothing changed.
+    """
+
+    def __init__(self, lookup_dir: Path, keep_snapshots: Optional[int] = None):
+        self.lookup_dir = Path(lookup_dir)
+        self.snapshot_dir = self.lookup_dir / "snapshots"
+        self.versions_path = self.snapshot_dir / "versions.json"
+        self.keep_snapshots = keep_snapshots if keep_snapshots is not None else int(os.getenv("LOOKUP_SNAPSHOTS_KEEP", "10"))
+        self._lock = threading.RLock()
+        self._data: Dict[str, Dict[str, str]] = {}
+        self._aliases: Dict[str, Dict[str, List[str]]] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._mtimes: Dict[str, Optional[int]] = {}
+        self._dirty = set()
+        self._versions: Dict[str, int] = {}
+        if self.versions_path.exists():
+            try:
+                self._versions = json.loads(self.versions_path.read_text(encoding='utf-8'))
+            except (json.JSONDecodeError, OSError) as e:
+                logging.warning(f"Ignoring unreadable lookup versions file {self.versions_path}: {e}")
+        for category in LOOKUP_CATEGORIES:
+            self._load(category)
+
+    def path(self, category: str) -> Path:
+        return self.lookup_dir / f"{category}_lookup.json"
+
+    def _mtime(self, category: str) -> Optional[int]:
+        try:
+            return self.path(category).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self, category: str):
+        data = {}
+        lookup_path = self.path(category)
+        if lookup_path.exists():
+            try:
+                with open(lookup_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                logging.error(f"Error loading lookup file {lookup_path}: {e}. Using empty lookup.")
+        with self._lock:
+            self._data[category] = data
+            self._mtimes[category] = self._mtime(category)
+            self._reindex(category)
+
+    def _reindex(self, category: str):
+        aliases = defaultdict(list)
+        for raw, canonical in self._data[category].items():
+            aliases[canonical].append(raw)
+        self._aliases[category] = dict(aliases)
+        self._fingerprints[category] = hashlib.sha1(
+            json.dumps(self._data[category], sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def refresh(self):
+        """Reloads categories whose JSON file was modified since it was loaded (unsaved edits are kept)."""
+        with self._lock:
+            for category in LOOKUP_CATEGORIES:
+                if category not in self._dirty and self._mtime(category) != self._mtimes.get(category):
+                    logging.info(f"Lookup file {self.path(category)} changed on disk, reloading.")
+                    self._load(category)
+
+    def get(self, category: str, raw_name: str, default: Optional[str] = None) -> Optional[str]:
+        return self._data[category].get(raw_name, default)
+
+    def canonical(self, category: str, raw_name: str) -> str:
+        """Maps a raw name, trying its sanitized form first and falling back to it when unknown."""
+        sanitized, _ = sanitize_text(raw_name)
+        data = self._data[category]
+        return data.get(sanitized) or data.get(raw_name, sanitized)
+
+    def aliases(self, category: str, canonical: str) -> List[str]:
+        """Returns the raw spellings that map to a canonical name."""
+        return list(self._aliases[category].get(canonical, []))
+
+    def mapping(self, category: str) -> Mapping[str, str]:
+        """Read-only view of a category; use update() to change it."""
+        return MappingProxyType(self._data[category])
+
+    def fingerprint(self, category: str) -> str:
+        """Content hash of a category, cheap to compare across runs."""
+        return self._fingerprints[category]
+
+    def version(self, category: str) -> int:
+        return self._versions.get(category, 0)
+
+    def update(self, category: str, mappings: Mapping[str, str]):
+        """Adds or replaces raw -> canonical entries in memory. Call save() to persist."""
+        if not mappings:
+            return
+        with self._lock:
+            self._data[category] = {**self._data[category], **mappings}
+            self._reindex(category)
+            self._dirty.add(category)
+
+    def save(self):
+        """Persists changed categories as a new versioned snapshot plus the live lookup file."""
+        with self._lock:
+            for category in sorted(self._dirty):
+                version = self.version(category) + 1
+                snapshot = self.snapshot_dir / f"{category}_lookup.v{version}.json"
+                _atomic_write_json(snapshot, self._data[category])
+                _atomic_write_json(self.path(category), self._data[category], indent=4)
+                self._versions[category] = version
+                self._mtimes[category] = self._mtime(category)
+                self._prune_snapshots(category)
+                logging.info(f"Saved lookup {self.path(category)} (version {version}, {len(self._data[category])} entries)")
+            if self._dirty:
+                _atomic_write_json(self.versions_path, self._versions, indent=2)
+            self._dirty.clear()
+
+    def _prune_snapshots(self, category: str):
+        if self.keep_snapshots <= 0:
+            return
+        snapshots = sorted(self.snapshot_dir.glob(f"{category}_lookup.v*.json"),
+                           key=lambda p: int(p.stem.rsplit(".v", 1)[1]))
+        for old in snapshots[:-self.keep_snapshots]:
+            old.unlink(missing_ok=True)
+
+
+_stores: Dict[Path, LookupStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_lookup_store(lookup_dir: Path) -> LookupStore:
+    """Returns the process-wide store for a lookup directory, loading it on first use."""
+    key = Path(lookup_dir).resolve()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = LookupStore(key)
+            return store
+    store.refresh()
+    return store
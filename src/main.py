@@ -1,12 +1,16 @@
 import os
 import sys
 import logging
-import tkinter as tk
 import datetime
-from tkinter import messagebox, ttk, filedialog
+import time
+try:
+    import tkinter as tk
+    from tkinter import messagebox, ttk, filedialog
+except ImportError: # Headless Python builds without Tk: only the CLI (src/cli.py) is available
+    tk = messagebox = ttk = filedialog = None
 from pathlib import Path
 from .scraper import download_pdfs
-from .gemini import analyze_pdf
+from .gemini import analyze_pdf, routing_stats, write_routing_report, UNREADABLE_RESPONSE_PATTERN
 from .db import append_to_csv, read_csv
 from .utils import (
     setup_logging, 
@@ -14,43 +18,78 @@ from .utils import (
     ensure_directory_exists,
     get_logger,
     handle_error,
+    classify_error,
     CBFRobotError,
+    APIError,
     ProcessingError,
     ConfigurationError,
-    OperationCancelledError # Added
+    OperationCancelledError, # Added
+    OperationInProgressError,
+    error_stats
 )
-from .normalize import refresh_lookups, write_clean_csv
+from .run_lock import RunLock
+from .normalize import refresh_lookups, write_clean_csv, CleanCsvSync, PendingNameResolver
+from .categorize import categorize_line_items
+from .sanitize import RepairCounter, sanitize_record
+from .metrics import pipeline_metrics, export_metrics
+from .profiling import RunProfiler
+from .pdf_io import PdfSource
+from .pdf_store import PdfContentIndex
+from .work_queue import ExtractionQueue
 import json
 from .validation import validate_summary, validate_revenue, validate_expense
 import threading
-from typing import Callable, Optional, List # Added
+from typing import Callable, Dict, Optional, List # Added
 
-# Set up structured logging
-logger = setup_logging()
+# Logging is configured by the entry points (main() here, cli.main()), not on import, so
+# importing this module (tests, benchmarks, the CLI) does not open cbf_robot.log
+logger = get_logger()
 
-def run_normalization(jogos_resumo_csv_path: Path, lookup_dir: Path, clean_csv_path: Path, gemini_api_key: str):
+def run_normalization(jogos_resumo_csv_path: Path, lookup_dir: Path, clean_csv_path: Path, gemini_api_key: str,
+                      notifier=None):
     """
     Runs the lookup refresh and clean CSV writing process.
     """
+    notifier = notifier or messagebox
     try:
         logger.info("Starting normalization process")
         refresh_lookups(jogos_resumo_csv_path, lookup_dir, gemini_api_key)
-        write_clean_csv(jogos_resumo_csv_path, clean_csv_path, lookup_dir)
-        messagebox.showinfo("Sucesso", "Normalização de nomes concluída. Arquivo 'jogos_resumo_clean.csv' criado/atualizado.")
+        write_clean_csv(jogos_resumo_csv_path, clean_csv_path, lookup_dir, incremental=True)
+        categorize_line_items(jogos_resumo_csv_path.parent, lookup_dir, gemini_api_key)
+        notifier.showinfo("Sucesso", "Normalização de nomes concluída. Arquivo 'jogos_resumo_clean.csv' criado/atualizado.")
         logger.info("Normalization process finished successfully")
     except Exception as e:
         handle_error(
             error=e,
             log_context={"process": "normalization", "input_file": str(jogos_resumo_csv_path)},
-            ui_callback=messagebox.showerror
+            ui_callback=notifier.showerror
         )
 
 def run_operation(choice, year, competitions, pdf_dir, csv_dir, gemini_api_key,
                   progress_callback: Optional[Callable[[float], None]] = None,
-                  cancel_event: Optional[threading.Event] = None):
+                  cancel_event: Optional[threading.Event] = None,
+                  notifier=None,
+                  download_workers: int = 5,
+                  wait_for_background: bool = False,
+                  profile: Optional[bool] = None,
+                  max_pdfs: Optional[int] = None) -> List[str]:
     """
     Executes the selected operation based on the user's choice.
+
+    Args:
+        notifier: Object with showinfo/showwarning/showerror(title, message); defaults to
+            tkinter's messagebox. The CLI passes a console notifier.
+        download_workers (int): Parallel downloads per competition.
+        wait_for_background (bool): Wait for the background name resolution started by
+            operations 2 and 3 before returning (headless runs exit right after).
+        profile (bool, optional): Profile the download/process/normalize stages and write the
+            results to reports/profile_<timestamp>/; None follows CBF_PROFILE.
+        max_pdfs (int, optional): Analyze at most this many queued PDFs (highest priority first).
+
+    Returns:
+        list: IDs of the PDFs that could not be processed.
     """
+    notifier = notifier or messagebox
     # Define paths using pathlib
     pdf_path = Path(pdf_dir)
     csv_path = Path(csv_dir)
@@ -61,6 +100,10 @@ def run_operation(choice, year, competitions, pdf_dir, csv_dir, gemini_api_key,
     jogos_resumo_clean_csv = csv_path / "jogos_resumo_clean.csv" 
 
     failed_pdfs = []
+    pipeline_metrics.reset() # Metrics cover one operation; the exported files describe the last run
+    error_stats.reset()
+    routing_stats.reset()
+    profiler = RunProfiler.from_env(profile)
 
     try:
         operation_context = {
@@ -86,24 +129,35 @@ def run_operation(choice, year, competitions, pdf_dir, csv_dir, gemini_api_key,
                         overall_p = (competition_idx / num_competitions) * 100 + (p_comp / num_competitions)
                         progress_callback(overall_p)
                 
-                download_pdfs(year, competition, pdf_path, progress_callback=sub_progress_download, cancel_event=cancel_event)
+                with profiler.stage("download"):
+                    download_pdfs(year, competition, pdf_path, progress_callback=sub_progress_download, cancel_event=cancel_event,
+                                  max_workers=download_workers)
             
             if progress_callback and not (cancel_event and cancel_event.is_set()) and competitions: # Ensure 100% if completed
                 progress_callback(100.0)
 
             if not (cancel_event and cancel_event.is_set()):
-                messagebox.showinfo("Sucesso", "Download dos PDFs concluído.")
+                notifier.showinfo("Sucesso", "Download dos PDFs concluído.")
             logger.info("PDF download completed", **operation_context)
 
         elif choice == "2": # Process PDFs
             logger.info("Starting PDF processing", **operation_context)
-            failed_pdfs = process_pdfs(pdf_path, jogos_resumo_csv, receitas_detalhe_csv, despesas_detalhe_csv, gemini_api_key, progress_callback=progress_callback, cancel_event=cancel_event)
+            name_resolver = PendingNameResolver(jogos_resumo_csv, jogos_resumo_clean_csv, lookup_path, gemini_api_key)
+            name_resolver.start()
+            try:
+                with profiler.stage("process", memory=True):
+                    failed_pdfs = process_pdfs(pdf_path, jogos_resumo_csv, receitas_detalhe_csv, despesas_detalhe_csv, gemini_api_key, progress_callback=progress_callback, cancel_event=cancel_event,
+                                               clean_csv=jogos_resumo_clean_csv, lookup_dir=lookup_path, max_pdfs=max_pdfs)
+            finally:
+                name_resolver.finish() # Unknown names are resolved and re-mapped in the background
+                if wait_for_background:
+                    name_resolver.join()
             
             if not (cancel_event and cancel_event.is_set()):
                 if failed_pdfs:
-                    messagebox.showwarning("Processamento Concluído com Erros", f"Processamento dos PDFs concluído. Os seguintes PDFs não puderam ser processados: {', '.join(failed_pdfs)}")
+                    notifier.showwarning("Processamento Concluído com Erros", f"Processamento dos PDFs concluído. Os seguintes PDFs não puderam ser processados: {', '.join(failed_pdfs)}")
                 else:
-                    messagebox.showinfo("Sucesso", "Processamento dos PDFs concluído.")
+                    notifier.showinfo("Sucesso", "Processamento dos PDFs concluído.")
             logger.info("PDF processing completed", failed_count=len(failed_pdfs), **operation_context)
 
         elif choice == "3": # Download and Process
@@ -129,7 +183,9 @@ def run_operation(choice, year, competitions, pdf_dir, csv_dir, gemini_api_key,
                         overall_progress = (progress_of_completed_tasks + progress_of_this_task_scaled) * 100
                         progress_callback(overall_progress)
 
-                download_pdfs(year, competition, pdf_path, progress_callback=download_phase_sub_progress, cancel_event=cancel_event)
+                with profiler.stage("download"):
+                    download_pdfs(year, competition, pdf_path, progress_callback=download_phase_sub_progress, cancel_event=cancel_event,
+                                  max_workers=download_workers)
                 current_task_idx += 1
                 # Ensure this step's progress is fully accounted for if download_phase_sub_progress didn't hit 100% for its segment
                 if progress_callback and not (cancel_event and cancel_event.is_set()):
@@ -147,7 +203,16 @@ def run_operation(choice, year, competitions, pdf_dir, csv_dir, gemini_api_key,
                     overall_progress = (progress_of_completed_tasks + progress_of_this_task_scaled) * 100
                     progress_callback(overall_progress)
             
-            failed_pdfs = process_pdfs(pdf_path, jogos_resumo_csv, receitas_detalhe_csv, despesas_detalhe_csv, gemini_api_key, progress_callback=processing_phase_sub_progress, cancel_event=cancel_event)
+            name_resolver = PendingNameResolver(jogos_resumo_csv, jogos_resumo_clean_csv, lookup_path, gemini_api_key)
+            name_resolver.start()
+            try:
+                with profiler.stage("process", memory=True):
+                    failed_pdfs = process_pdfs(pdf_path, jogos_resumo_csv, receitas_detalhe_csv, despesas_detalhe_csv, gemini_api_key, progress_callback=processing_phase_sub_progress, cancel_event=cancel_event,
+                                               clean_csv=jogos_resumo_clean_csv, lookup_dir=lookup_path, max_pdfs=max_pdfs)
+            finally:
+                name_resolver.finish() # Unknown names are resolved and re-mapped in the background
+                if wait_for_background:
+                    name_resolver.join()
             current_task_idx +=1 
             
             if progress_callback and not (cancel_event and cancel_event.is_set()): # Ensure 100% at the end
@@ -155,9 +220,9 @@ def run_operation(choice, year, competitions, pdf_dir, csv_dir, gemini_api_key,
 
             if not (cancel_event and cancel_event.is_set()):
                 if failed_pdfs:
-                    messagebox.showwarning("Concluído com Erros", f"Download e processamento concluídos. Os seguintes PDFs não puderam ser processados: {', '.join(failed_pdfs)}")
+                    notifier.showwarning("Concluído com Erros", f"Download e processamento concluídos. Os seguintes PDFs não puderam ser processados: {', '.join(failed_pdfs)}")
                 else:
-                    messagebox.showinfo("Sucesso", "Download e processamento dos PDFs concluídos.")
+                    notifier.showinfo("Sucesso", "Download e processamento dos PDFs concluídos.")
             logger.info("Download and processing completed", failed_count=len(failed_pdfs), **operation_context)
 
         elif choice == "4": # Normalize CSV
@@ -165,40 +230,61 @@ def run_operation(choice, year, competitions, pdf_dir, csv_dir, gemini_api_key,
             # Normalization is typically fast, but we can set progress to 0 and 100
             if progress_callback: progress_callback(0)
             if cancel_event and cancel_event.is_set(): raise OperationCancelledError("Normalization cancelled.")
-            run_normalization(jogos_resumo_csv, lookup_path, jogos_resumo_clean_csv, gemini_api_key)
+            with pipeline_metrics.timer("normalize"), profiler.stage("normalize"):
+                run_normalization(jogos_resumo_csv, lookup_path, jogos_resumo_clean_csv, gemini_api_key, notifier)
             if progress_callback: progress_callback(100)
             # Message is shown within run_normalization
 
         else:
             error_message = f"Seleção inválida: {choice}"
             logger.warning(error_message, **operation_context)
-            messagebox.showwarning("Seleção Inválida", "Por favor, selecione uma operação válida.")
+            notifier.showwarning("Seleção Inválida", "Por favor, selecione uma operação válida.")
     
     except OperationCancelledError as e:
         logger.info(f"Operation cancelled: {str(e)}", **operation_context)
-        messagebox.showinfo("Operação Cancelada", str(e))
+        notifier.showinfo("Operação Cancelada", str(e))
     except CBFRobotError as e:
         # Handle custom application exceptions
         handle_error(
             error=e,
             log_context={"operation_details": operation_context},
-            ui_callback=messagebox.showerror
+            ui_callback=notifier.showerror
         )
     except Exception as e:
         # Handle unexpected exceptions
         handle_error(
             error=e,
             log_context={"operation_details": operation_context},
-            ui_callback=messagebox.showerror,
+            ui_callback=notifier.showerror,
             log_level="critical"
         )
 
+    if error_stats.snapshot():
+        logger.info("Error summary", operation=choice, errors=error_stats.snapshot())
+    summary = pipeline_metrics.summary()
+    if summary:
+        logger.info("Pipeline timing summary", operation=choice, stages=summary)
+        try:
+            export_metrics()
+        except OSError as e:
+            logger.warning("Failed to export pipeline metrics", error=str(e))
+    try:
+        profiler.finish()
+    except OSError as e:
+        logger.warning("Failed to write profile", error=str(e))
+    return failed_pdfs
+
 def main():
     """
     Ponto de entrada principal para executar as operações de download e análise.
     Agora com interface gráfica.
     """
     load_env_vars()
+    setup_logging()
+
+    if tk is None:
+        print("tkinter não está disponível neste Python. Use a linha de comando: python run.py --help")
+        sys.exit(1)
 
     # Initialize main window before creating control variables
     root = tk.Tk()
@@ -297,18 +383,16 @@ def main():
 
 
                 try:
-                    run_operation(choice, int(year_var.get()), settings["competitions"], 
-                                  settings["pdf_dir"], settings["csv_dir"], settings["gemini_api_key"],
-                                  progress_callback=update_progress, cancel_event=cancel_event)
-                    # Status message is now handled by run_operation or its sub-functions for success/failure/cancellation
-                    # So, we might not need a generic success message here unless no specific message was shown.
-                    if not cancel_event.is_set(): # Only set to generic "completed" if not cancelled
-                        # Check if a specific message was already shown by run_operation
-                        # This is tricky, perhaps run_operation should return a status message string
-                        # For now, let's assume run_operation's message boxes are sufficient.
-                        # status_var.set(f"Operação {choice} concluída.") # Or specific message from run_operation
-                        pass # Messages are handled within run_operation
-
+                    # Same lock as the CLI and scheduler, so a GUI run never overlaps a scheduled one.
+                    # The background name resolver writes lookups and the clean CSV too, so it is
+                    # joined before the lock is released.
+                    with RunLock():
+                        run_operation(choice, int(year_var.get()), settings["competitions"], 
+                                      settings["pdf_dir"], settings["csv_dir"], settings["gemini_api_key"],
+                                      progress_callback=update_progress, cancel_event=cancel_event,
+                                      wait_for_background=True)
+                except OperationInProgressError as e:
+                    messagebox.showwarning("Operação em Andamento", f"Outra execução (CLI ou agendador) está em andamento: {e.details}")
                 except Exception as e: # Catch any other unexpected error from run_operation itself
                     status_var.set(f"Erro inesperado na operação {choice}: {str(e)}")
                     handle_error(e, log_context={"operation": choice}, ui_callback=messagebox.showerror)
@@ -399,13 +483,21 @@ def process_pdfs(pdf_dir: Path, jogos_resumo_csv: Path,
                  receitas_detalhe_csv: Path, despesas_detalhe_csv: Path, 
                  gemini_api_key: str,
                  progress_callback: Optional[Callable[[float], None]] = None,
-                 cancel_event: Optional[threading.Event] = None) -> List[str]:
+                 cancel_event: Optional[threading.Event] = None,
+                 clean_csv: Optional[Path] = None,
+                 lookup_dir: Optional[Path] = None,
+                 max_pdfs: Optional[int] = None) -> List[str]:
     """
     Processa os PDFs não analisados e salva os resultados nos arquivos CSV.
+    Com clean_csv e lookup_dir, cada jogo salvo também é normalizado em clean_csv na hora.
+    Os PDFs pendentes saem da ExtractionQueue em ordem de prioridade (jogos mais recentes
+    primeiro); max_pdfs limita quantos são analisados nesta chamada.
     Retorna uma lista de IDs de PDFs que falharam na análise.
     """
     processed_ids = set()
     failed_pdf_ids = [] # List to store IDs of PDFs that failed processing
+    failure_classes: Dict[str, str] = {} # id -> error class, for the retry backoff/dead-lettering
+    repair_counter = RepairCounter()
     operation_logger = get_logger("pdf_processing")
     
     try:
@@ -427,149 +519,243 @@ def process_pdfs(pdf_dir: Path, jogos_resumo_csv: Path,
     pdf_files = [f for f in pdf_dir.iterdir() if f.is_file() and f.suffix == ".pdf"]
     operation_logger.info("Found PDF files", count=len(pdf_files), directory=str(pdf_dir))
     
+    if not pdf_files:
+        if progress_callback:
+            progress_callback(100.0)
+        return []
+
+    # Hash PDFs not seen yet (only new/changed files are read) so repeated content is extracted once
+    content_index = PdfContentIndex(pdf_dir)
+    with pipeline_metrics.timer("content_index"):
+        hashed, up_to_date = content_index.sync(pdf_files)
+    content_index.save()
+    operation_logger.info("PDF content index synced", hashed=hashed, up_to_date=up_to_date,
+                          duplicate_contents=len(content_index.duplicate_groups()))
+
+    # Newest matches first, whatever the size of the backlog and the directory order
+    work_queue = ExtractionQueue(pdf_dir)
+    enqueued = work_queue.sync(pdf_files, processed_ids | {Path(name).stem for name in content_index.duplicates()})
+    pdf_files = [pdf_dir / name for name in work_queue.ordered(max_pdfs)]
+    operation_logger.info("Extraction queue", pending=len(work_queue), enqueued=enqueued, this_run=len(pdf_files),
+                          backing_off=len(work_queue.waiting()), dead_letters=len(work_queue.dead_letters()))
+    work_queue.save()
+
     total_pdfs = len(pdf_files)
     if total_pdfs == 0:
         if progress_callback:
             progress_callback(100.0)
         return []
+    attempted = []
 
+    # Normalized rows are appended to the clean CSV as each match is committed
+    clean_sync = CleanCsvSync(jogos_resumo_csv, clean_csv, lookup_dir) if clean_csv and lookup_dir else None
+    try:
+        for idx, pdf_file_path_obj in enumerate(pdf_files):
+            if cancel_event and cancel_event.is_set():
+                operation_logger.info("PDF processing cancelled by user.")
+                raise OperationCancelledError("Processamento de PDF cancelado.")
 
-    for idx, pdf_file_path_obj in enumerate(pdf_files):
-        if cancel_event and cancel_event.is_set():
-            operation_logger.info("PDF processing cancelled by user.")
-            raise OperationCancelledError("Processamento de PDF cancelado.")
-
-        pdf_file = pdf_file_path_obj.name
-        id_jogo_cbf = str(pdf_file_path_obj.stem) # Use stem to get filename without extension
+            pdf_file = pdf_file_path_obj.name
+            id_jogo_cbf = str(pdf_file_path_obj.stem) # Use stem to get filename without extension
+            attempted.append(pdf_file)
 
-        if id_jogo_cbf in processed_ids:
-            operation_logger.info("Skipping processed PDF", filename=pdf_file, id=id_jogo_cbf)
-            if progress_callback:
-                progress_callback(((idx + 1) / total_pdfs) * 100)
-            continue
+            if id_jogo_cbf in processed_ids:
+                operation_logger.info("Skipping processed PDF", filename=pdf_file, id=id_jogo_cbf)
+                if progress_callback:
+                    progress_callback(((idx + 1) / total_pdfs) * 100)
+                continue
 
-        operation_logger.info("Processing PDF", filename=pdf_file, id=id_jogo_cbf, path=str(pdf_file_path_obj))
+            content = content_index.get(pdf_file) or {}
+            if content.get("duplicate_of"):
+                # Same bytes as another file (re-used URL, other year): that file's extraction covers it
+                operation_logger.info("Skipping duplicate PDF", filename=pdf_file, duplicate_of=content["duplicate_of"])
+                if progress_callback:
+                    progress_callback(((idx + 1) / total_pdfs) * 100)
+                continue
+            if not content.get("is_pdf", True) or content_index.is_placeholder(content.get("sha256")):
+                reason = "not_pdf" if not content.get("is_pdf", True) else "placeholder"
+                operation_logger.warning("Skipping PDF without borderô content", filename=pdf_file, id=id_jogo_cbf,
+                                         reason=reason, sha256=content.get("sha256"))
+                failed_pdf_ids.append(id_jogo_cbf)
+                failure_classes[id_jogo_cbf] = reason
+                processed_ids.add(id_jogo_cbf)
+                if progress_callback:
+                    progress_callback(((idx + 1) / total_pdfs) * 100)
+                continue
 
-        try:
-            with open(pdf_file_path_obj, 'rb') as f:
-                pdf_content_bytes = f.read()
+            operation_logger.info("Processing PDF", filename=pdf_file, id=id_jogo_cbf, path=str(pdf_file_path_obj))
 
-            response = analyze_pdf(pdf_content_bytes) # Assuming analyze_pdf is not IO-bound for cancellation checks inside it
+            # Competition code is the id prefix (e.g. "142" for 14210b_2025), used to group routing stats and metrics
+            competition = id_jogo_cbf[:3]
+            pdf_started = time.perf_counter()
+            pdf_size = None
+            try:
+                # Memory-mapped: the extractors read the file's pages in place instead of a private copy
+                with pipeline_metrics.timer("read_pdf", competition=competition) as timing:
+                    pdf_source = PdfSource(pdf_file_path_obj)
+                    timing["size_bytes"] = pdf_size = pdf_source.size
+
+                with pdf_source, pipeline_metrics.timer("analyze", competition=competition, size_bytes=pdf_size) as timing:
+                    response = analyze_pdf(pdf_source.view, competition=competition) # Assuming analyze_pdf is not IO-bound for cancellation checks inside it
+                    if response.get("error"):
+                        timing["outcome"] = "error"
+                # Repair lookalike letters/mojibake in every string before caching and validation
+                with pipeline_metrics.timer("sanitize", competition=competition):
+                    response = sanitize_record(response, repair_counter)
             
-            # Cache successful responses
-            if not response.get("error"):
-                try:
-                    cache_dir = Path("cache")
-                    cache_dir.mkdir(exist_ok=True)
-                    cache_file = cache_dir / f"{id_jogo_cbf}.json"
-                    with open(cache_file, 'w', encoding='utf-8') as cf:
-                        json.dump(response, cf)
-                except Exception as cache_err:
-                    operation_logger.warning("Failed to write cache file", error=str(cache_err), id_jogo_cbf=id_jogo_cbf)
-
-            if response.get("error"):
-                error_message = response.get("error")
-                operation_logger.error("Error analyzing PDF with Gemini", 
-                                      error=error_message, 
-                                      filename=pdf_file, 
-                                      id=id_jogo_cbf)
-                failed_pdf_ids.append(id_jogo_cbf) # Add to failed list
-                # Do not write to CSV here, will be reported at the end.
-                # We still mark it as "processed" for this run to avoid retrying immediately
-                processed_ids.add(id_jogo_cbf) 
-                if progress_callback:
-                    progress_callback(((idx + 1) / total_pdfs) * 100)
-                continue # Skip to next PDF
-
-            # ... (rest of the data extraction and CSV writing for successful analysis)
-            match_details = response.get("match_details", {})
-            financial_data = response.get("financial_data", {})
-            audience_stats = response.get("audience_statistics", {})
-            revenue_details = financial_data.get("revenue_details", [])
-            expense_details = financial_data.get("expense_details", [])
-
-            resumo_jogo = {
-                "id_jogo_cbf": id_jogo_cbf,
-                "data_jogo": match_details.get("match_date"),
-                "time_mandante": match_details.get("home_team"),
-                "time_visitante": match_details.get("away_team"),
-                "estadio": match_details.get("stadium"),
-                "competicao": match_details.get("competition"),
-                "publico_pagante": audience_stats.get("paid_attendance"),
-                "publico_nao_pagante": audience_stats.get("non_paid_attendance"),
-                "publico_total": audience_stats.get("total_attendance"),
-                "receita_bruta_total": financial_data.get("gross_revenue"),
-                "despesa_total": financial_data.get("total_expenses"),
-                "resultado_liquido": financial_data.get("net_result"),
-                "caminho_pdf_local": str(pdf_file_path_obj),
-                "data_processamento": datetime.date.today().isoformat(),
-                "status": "Sucesso",
-                "log_erro": None
-            }
+                # Cache successful responses
+                if not response.get("error"):
+                    try:
+                        cache_dir = Path("cache")
+                        cache_dir.mkdir(exist_ok=True)
+                        cache_file = cache_dir / f"{id_jogo_cbf}.json"
+                        with open(cache_file, 'w', encoding='utf-8') as cf:
+                            json.dump(response, cf)
+                    except Exception as cache_err:
+                        operation_logger.warning("Failed to write cache file", error=str(cache_err), id_jogo_cbf=id_jogo_cbf)
+
+                if response.get("error"):
+                    error_message = response.get("error")
+                    operation_logger.error("Error analyzing PDF with Gemini", 
+                                          error=error_message, 
+                                          filename=pdf_file, 
+                                          id=id_jogo_cbf)
+                    failed_pdf_ids.append(id_jogo_cbf) # Add to failed list
+                    failure_classes[id_jogo_cbf] = classify_error(APIError(str(error_message))) or (
+                        "parse_error" if UNREADABLE_RESPONSE_PATTERN.search(str(error_message)) else "api_error")
+                    pipeline_metrics.observe("pdf_total", time.perf_counter() - pdf_started, competition, pdf_size, "error")
+                    # Do not write to CSV here, will be reported at the end.
+                    # We still mark it as "processed" for this run to avoid retrying immediately
+                    processed_ids.add(id_jogo_cbf) 
+                    if progress_callback:
+                        progress_callback(((idx + 1) / total_pdfs) * 100)
+                    continue # Skip to next PDF
+
+                # ... (rest of the data extraction and CSV writing for successful analysis)
+                match_details = response.get("match_details", {})
+                financial_data = response.get("financial_data", {})
+                audience_stats = response.get("audience_statistics", {})
+                revenue_details = financial_data.get("revenue_details", [])
+                expense_details = financial_data.get("expense_details", [])
+
+                resumo_jogo = {
+                    "id_jogo_cbf": id_jogo_cbf,
+                    "data_jogo": match_details.get("match_date"),
+                    "time_mandante": match_details.get("home_team"),
+                    "time_visitante": match_details.get("away_team"),
+                    "estadio": match_details.get("stadium"),
+                    "competicao": match_details.get("competition"),
+                    "publico_pagante": audience_stats.get("paid_attendance"),
+                    "publico_nao_pagante": audience_stats.get("non_paid_attendance"),
+                    "publico_total": audience_stats.get("total_attendance"),
+                    "receita_bruta_total": financial_data.get("gross_revenue"),
+                    "despesa_total": financial_data.get("total_expenses"),
+                    "resultado_liquido": financial_data.get("net_result"),
+                    "caminho_pdf_local": str(pdf_file_path_obj),
+                    "data_processamento": datetime.date.today().isoformat(),
+                    "status": "Sucesso",
+                    "log_erro": None
+                }
             
-            jogos_resumo_headers = [
-                "id_jogo_cbf", "data_jogo", "time_mandante", "time_visitante", "estadio", "competicao",
-                "publico_pagante", "publico_nao_pagante", "publico_total",
-                "receita_bruta_total", "despesa_total", "resultado_liquido",
-                "caminho_pdf_local", "data_processamento", "status", "log_erro"
-            ]
-            validated_summary = validate_summary([resumo_jogo])
-            append_to_csv(jogos_resumo_csv, validated_summary, jogos_resumo_headers)
-
-            for item in revenue_details:
-                item["id_jogo_cbf"] = id_jogo_cbf
-            for item in expense_details:
-                item["id_jogo_cbf"] = id_jogo_cbf
-
-            if revenue_details:
-                receita_headers = ["id_jogo_cbf"] + [k for k in revenue_details[0].keys() if k != "id_jogo_cbf"]
-                validated_revenue = validate_revenue(revenue_details)
-                append_to_csv(receitas_detalhe_csv, validated_revenue, receita_headers)
-
-            if expense_details:
-                despesa_headers = ["id_jogo_cbf"] + [k for k in expense_details[0].keys() if k != "id_jogo_cbf"]
-                validated_expense = validate_expense(expense_details)
-                append_to_csv(despesas_detalhe_csv, validated_expense, despesa_headers)
-
-            operation_logger.info("Successfully processed PDF", 
-                                 id=id_jogo_cbf, 
-                                 match_date=match_details.get("match_date"),
-                                 teams=f"{match_details.get('home_team')} vs {match_details.get('away_team')}")
-            processed_ids.add(id_jogo_cbf)
-
-        except FileNotFoundError:
-            handle_error(
-                error=FileNotFoundError(f"PDF file not found: {str(pdf_file_path_obj)}"),
-                log_context={"id": id_jogo_cbf, "filename": pdf_file},
-                log_level="error"
-            )
-            failed_pdf_ids.append(id_jogo_cbf) # Also count as failed
-        except IOError as io_err:
-            handle_error(
-                error=io_err,
-                log_context={"id": id_jogo_cbf, "filename": pdf_file, "path": str(pdf_file_path_obj)},
-                log_level="error"
-            )
-            failed_pdf_ids.append(id_jogo_cbf)
-        except OperationCancelledError: # Re-raise to be caught by threaded_operation
-            raise
-        except Exception as e:
-            error_details = handle_error(
-                error=e,
-                log_context={"id": id_jogo_cbf, "filename": pdf_file, "path": str(pdf_file_path_obj)},
-                log_level="error"
-            )
-            failed_pdf_ids.append(id_jogo_cbf)
-            # Log error to CSV with a generic "Erro Inesperado" if needed, or rely on failed_pdf_ids list
-            # For now, we are not writing specific error rows for these unexpected errors to jogos_resumo.csv
-            # as the primary goal is to report them via failed_pdf_ids.
-            # If an error row is still desired:
-            # error_log_entry = { ... "status": "Erro Inesperado", "log_erro": str(e) ... }
-            # append_to_csv(jogos_resumo_csv, [error_log_entry], error_log_entry.keys())
-            processed_ids.add(id_jogo_cbf) # Mark as processed to avoid re-attempt in same run
+                jogos_resumo_headers = [
+                    "id_jogo_cbf", "data_jogo", "time_mandante", "time_visitante", "estadio", "competicao",
+                    "publico_pagante", "publico_nao_pagante", "publico_total",
+                    "receita_bruta_total", "despesa_total", "resultado_liquido",
+                    "caminho_pdf_local", "data_processamento", "status", "log_erro"
+                ]
+                with pipeline_metrics.timer("validate", competition=competition):
+                    validated_summary = validate_summary([resumo_jogo])
+                with pipeline_metrics.timer("csv_write", competition=competition):
+                    append_to_csv(jogos_resumo_csv, validated_summary, jogos_resumo_headers)
+                if clean_sync:
+                    try:
+                        with pipeline_metrics.timer("clean_sync", competition=competition):
+                            clean_sync.sync()
+                    except Exception as sync_err:
+                        operation_logger.warning("Failed to update clean CSV", error=str(sync_err), id_jogo_cbf=id_jogo_cbf)
+
+                for item in revenue_details:
+                    item["id_jogo_cbf"] = id_jogo_cbf
+                for item in expense_details:
+                    item["id_jogo_cbf"] = id_jogo_cbf
+
+                if revenue_details:
+                    receita_headers = ["id_jogo_cbf"] + [k for k in revenue_details[0].keys() if k != "id_jogo_cbf"]
+                    with pipeline_metrics.timer("validate", competition=competition):
+                        validated_revenue = validate_revenue(revenue_details)
+                    with pipeline_metrics.timer("csv_write", competition=competition):
+                        append_to_csv(receitas_detalhe_csv, validated_revenue, receita_headers)
+
+                if expense_details:
+                    despesa_headers = ["id_jogo_cbf"] + [k for k in expense_details[0].keys() if k != "id_jogo_cbf"]
+                    with pipeline_metrics.timer("validate", competition=competition):
+                        validated_expense = validate_expense(expense_details)
+                    with pipeline_metrics.timer("csv_write", competition=competition):
+                        append_to_csv(despesas_detalhe_csv, validated_expense, despesa_headers)
+
+                operation_logger.info("Successfully processed PDF", 
+                                     id=id_jogo_cbf, 
+                                     match_date=match_details.get("match_date"),
+                                     teams=f"{match_details.get('home_team')} vs {match_details.get('away_team')}")
+                processed_ids.add(id_jogo_cbf)
+
+            except FileNotFoundError:
+                handle_error(
+                    error=FileNotFoundError(f"PDF file not found: {str(pdf_file_path_obj)}"),
+                    log_context={"id": id_jogo_cbf, "filename": pdf_file},
+                    log_level="error"
+                )
+                failed_pdf_ids.append(id_jogo_cbf) # Also count as failed
+                failure_classes[id_jogo_cbf] = "not_found"
+            except IOError as io_err:
+                handle_error(
+                    error=io_err,
+                    log_context={"id": id_jogo_cbf, "filename": pdf_file, "path": str(pdf_file_path_obj)},
+                    log_level="error"
+                )
+                failed_pdf_ids.append(id_jogo_cbf)
+                failure_classes[id_jogo_cbf] = type(io_err).__name__
+            except OperationCancelledError: # Re-raise to be caught by threaded_operation
+                raise
+            except Exception as e:
+                error_details = handle_error(
+                    error=e,
+                    log_context={"id": id_jogo_cbf, "filename": pdf_file, "path": str(pdf_file_path_obj)},
+                    log_level="error"
+                )
+                failed_pdf_ids.append(id_jogo_cbf)
+                failure_classes[id_jogo_cbf] = classify_error(e) or type(e).__name__
+                # Log error to CSV with a generic "Erro Inesperado" if needed, or rely on failed_pdf_ids list
+                # For now, we are not writing specific error rows for these unexpected errors to jogos_resumo.csv
+                # as the primary goal is to report them via failed_pdf_ids.
+                # If an error row is still desired:
+                # error_log_entry = { ... "status": "Erro Inesperado", "log_erro": str(e) ... }
+                # append_to_csv(jogos_resumo_csv, [error_log_entry], error_log_entry.keys())
+                processed_ids.add(id_jogo_cbf) # Mark as processed to avoid re-attempt in same run
+
+            failed = bool(failed_pdf_ids) and failed_pdf_ids[-1] == id_jogo_cbf
+            pipeline_metrics.observe("pdf_total", time.perf_counter() - pdf_started, competition, pdf_size,
+                                     "error" if failed else "ok")
 
-        if progress_callback:
-            progress_callback(((idx + 1) / total_pdfs) * 100)
+            if progress_callback:
+                progress_callback(((idx + 1) / total_pdfs) * 100)
+    finally:
+        if clean_sync:
+            clean_sync.close()
+        failed_ids = set(failed_pdf_ids)
+        for pdf_file in attempted:
+            if Path(pdf_file).stem in failed_ids:
+                work_queue.fail(pdf_file, failure_classes.get(Path(pdf_file).stem))
+            else:
+                work_queue.complete(pdf_file)
+        work_queue.save()
+
+    if repair_counter.total():
+        operation_logger.info("Text sanitation repairs", total=repair_counter.total(), per_field=repair_counter.as_dict())
+
+    if routing_stats.snapshot():
+        operation_logger.info("Model routing summary", tiers=routing_stats.snapshot())
+        write_routing_report()
             
     return failed_pdf_ids # Return the list of failed PDF IDs
 
@@ -0,0 +1,209 @@
+import os
+import re
+import logging
+import unicodedata
+from difflib import SequenceMatcher
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .sanitize import HOMOGLYPH_TABLE
+
+# Brazilian state codes, used to split "BOTAFOGO - SP" into core name + state qualifier
+UF_CODES = {
+    "AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MT", "MS", "MG", "PA",
+    "PB", "PR", "PE", "PI", "RJ", "RN", "RS", "RO", "RR", "SC", "SP", "SE", "TO"
+}
+
+# Corporate/club-type tokens that do not identify a team ("CRUZEIRO SAF", "FLUMINENSE FC", "OLARIA AC")
+TEAM_NOISE_TOKENS = {
+    "SAF", "S", "A", "F", "C", "FC", "EC", "AC", "SC", "CF", "FBC", "AA", "CLUBE", "CLUB", "FUTEBOL",
+    "ESPORTE", "ESPORTES", "ESPORTIVO", "ASSOCIACAO", "DE", "DA", "DO", "DAS", "DOS", "E"
+}
+STADIUM_NOISE_TOKENS = {"ESTADIO", "DE", "DA", "DO", "DAS", "DOS"}
+COMPETITION_NOISE_TOKENS = {"EDICAO", "DE", "DA", "DO", "DAS", "DOS"}
+
+_NON_ALNUM = re.compile(r"[^A-Z0-9]+")
+_YEAR_OR_GAME = re.compile(r"^(?:(?:19|20)\d{2}|JG\d+)$")
+
+
+class FoldedName(NamedTuple):
+    core: str
+    state: Optional[str]
+
+
+class MatchResult(NamedTuple):
+    name: str
+    canonical: Optional[str]          # Resolved canonical name, or None when ambiguous/unknown
+    score: float                      # Similarity of the best candidate (1.0 for exact folded match)
+    candidates: List[Tuple[str, str, float]]  # (known raw name, canonical, score), best first
+
+
+def fold_text(value: str) -> str:
+    """Uppercases, maps lookalike letters to Latin and strips accents and punctuation."""
+    value = unicodedata.normalize("NFKD", value.upper().translate(HOMOGLYPH_TABLE))
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", value).strip()
+
+
+def fold_name(name: str, category: str) -> FoldedName:
+    """
+    Reduces a raw team/stadium/competition name to a comparable core plus state qualifier.
+
+    Examples:
+        "Coritiba SAF (PR)"                    -> ("CORITIBA", "PR")
+        "ALFREDO JACONI - CAXIAS DO SUL - RS" -> ("ALFREDO JACONI", "RS")
+        "CAMPEONATO BRASILEIRO SÉRIE A 2025"   -> ("CAMPEONATO BRASILEIRO SERIE A", None)
+    """
+    if category == "stadiums":
+        # City and state follow the stadium name after " - "
+        segments = [s for s in re.split(r"\s+-\s+", name) if s.strip()]
+        tokens = fold_text(segments[-1]).split() if segments else []
+        state = tokens[-1] if len(segments) > 1 and tokens and tokens[-1] in UF_CODES else None
+        core_tokens = fold_text(segments[0]).split() if segments else []
+        noise = STADIUM_NOISE_TOKENS
+    else:
+        core_tokens = fold_text(name).split()
+        state = None
+        if category == "teams" and len(core_tokens) > 1 and core_tokens[-1] in UF_CODES:
+            state = core_tokens.pop()
+        noise = TEAM_NOISE_TOKENS if category == "teams" else COMPETITION_NOISE_TOKENS
+        if category == "competitions":
+            core_tokens = [t for t in core_tokens if not _YEAR_OR_GAME.match(t)]
+
+    stripped = [t for t in core_tokens if t not in noise]
+    # Names made only of noise tokens ("SPORT CLUB") keep their original tokens
+    return FoldedName(" ".join(stripped or core_tokens), state)
+
+
+def _trigrams(value: str) -> Set[str]:
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _short_tokens(core: str) -> Set[str]:
+    return {t for t in core.split() if len(t) <= 2}
+
+
+class NameMatcher:
+    """
+    Local index over an existing lookup that resolves new raw name variants without Gemini.
+
+    Names are folded with fold_name. An exact folded match resolves immediately; otherwise
+    candidates sharing trigrams are scored with SequenceMatcher and the best one is accepted
+    only when it is above the threshold and clearly ahead of any different canonical name.
+    """
+
+    def __init__(self, lookup: Dict[str, str], category: str,
+                 threshold: Optional[float] = None, margin: float = 0.05, top_k: Optional[int] = None):
+        self.category = category
+        self.threshold = threshold if threshold is not None else float(os.getenv("NAME_MATCH_THRESHOLD", "0.9"))
+        self.margin = margin
+        self.top_k = top_k if top_k is not None else int(os.getenv("NAME_MATCH_TOP_K", "5"))
+        self._by_core: Dict[str, List[Tuple[str, Optional[str], str]]] = defaultdict(list)
+        self._trigram_index: Dict[str, Set[str]] = defaultdict(set)
+        # Canonical names are valid spellings of themselves
+        entries = list(lookup.items()) + [(canonical, canonical) for canonical in set(lookup.values())]
+        for raw, canonical in entries:
+            self.add(raw, canonical)
+
+    def add(self, raw: str, canonical: str):
+        """Adds a raw -> canonical mapping to the index."""
+        folded = fold_name(raw, self.category)
+        if not folded.core:
+            return
+        if folded.core not in self._by_core:
+            for gram in _trigrams(folded.core):
+                self._trigram_index[gram].add(folded.core)
+        self._by_core[folded.core].append((raw, folded.state, canonical))
+
+    def _resolve_core(self, core: str, state: Optional[str]) -> Optional[str]:
+        """
+        Picks the canonical for a core, using the state to disambiguate homonyms.
+
+        Returns None when several canonicals remain, or when the query has a state and the known
+        spellings only carry other states ("RIO BRANCO - AC" must not resolve to "Rio Branco-ES").
+        """
+        entries = self._by_core[core]
+        if state:
+            known_states = {s for _, s, _ in entries if s}
+            if known_states and state not in known_states:
+                return None
+            entries = [e for e in entries if e[1] in (state, None)]
+        canonicals = {c for _, _, c in entries}
+        if len(canonicals) == 1:
+            return next(iter(canonicals))
+        if state:
+            same_state = {c for _, s, c in entries if s == state}
+            if len(same_state) == 1:
+                return next(iter(same_state))
+        return None
+
+    def match(self, name: str) -> MatchResult:
+        """Matches a raw name against the index. See MatchResult for the returned fields."""
+        folded = fold_name(name, self.category)
+        if not folded.core:
+            return MatchResult(name, None, 0.0, [])
+
+        if folded.core in self._by_core:
+            canonical = self._resolve_core(folded.core, folded.state)
+            candidates = [(raw, c, 1.0) for raw, _, c in self._by_core[folded.core]][:self.top_k]
+            return MatchResult(name, canonical, 1.0 if canonical else 0.0, candidates)
+
+        # Shortlist cores sharing trigrams, then rank them by edit similarity
+        grams = _trigrams(folded.core)
+        short_tokens = _short_tokens(folded.core)
+        overlap: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for core in self._trigram_index.get(gram, ()):
+                overlap[core] += 1
+        shortlist = sorted(overlap, key=overlap.get, reverse=True)[:self.top_k * 4]
+
+        scored = []
+        for core in shortlist:
+            score = SequenceMatcher(None, folded.core, core).ratio()
+            # Short tokens are discriminative ("SERIE A" vs "SERIE B"), so they must agree exactly
+            canonical = self._resolve_core(core, folded.state) if _short_tokens(core) == short_tokens else None
+            raw = self._by_core[core][0][0]
+            scored.append((raw, canonical or self._by_core[core][0][2], score, canonical is not None))
+        scored.sort(key=lambda item: item[2], reverse=True)
+        candidates = [(raw, canonical, round(score, 3)) for raw, canonical, score, _ in scored[:self.top_k]]
+
+        if not scored:
+            return MatchResult(name, None, 0.0, [])
+        best_raw, best_canonical, best_score, unambiguous = scored[0]
+        runner_up = next((s for _, c, s, _ in scored[1:] if c != best_canonical), 0.0)
+        if unambiguous and best_score >= self.threshold and best_score - runner_up >= self.margin:
+            return MatchResult(name, best_canonical, best_score, candidates)
+        return MatchResult(name, None, best_score, candidates)
+
+    def resolve(self, names: List[str]) -> Tuple[Dict[str, str], Dict[str, MatchResult]]:
+        """
+        Splits names into locally resolved mappings and ambiguous ones.
+
+        Returns:
+            tuple: ({raw name: canonical}, {raw name: MatchResult}) for resolved and ambiguous names.
+        """
+        resolved, ambiguous = {}, {}
+        for name in names:
+            result = self.match(name)
+            if result.canonical:
+                resolved[name] = result.canonical
+            else:
+                ambiguous[name] = result
+        logging.info(f"Local matcher for '{self.category}': {len(resolved)} resolved, {len(ambiguous)} ambiguous.")
+        return resolved, ambiguous
+
+
+def candidate_context(ambiguous: Dict[str, MatchResult], lookup: Dict[str, str], sample_size: int = 10) -> Dict[str, str]:
+    """
+    Builds the small lookup excerpt sent to Gemini for ambiguous names: their top-k candidates,
+    plus a few existing mappings as a style guide when no candidate was found.
+    """
+    context = {}
+    for result in ambiguous.values():
+        for raw, canonical, _ in result.candidates:
+            context[raw] = canonical
+    if len(context) < sample_size:
+        for raw, canonical in list(lookup.items())[:sample_size - len(context)]:
+            context.setdefault(raw, canonical)
+    return context
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from .utils import get_logger
+
+logger = get_logger("metrics")
+
+# Upper bounds (seconds) of the duration histogram buckets; +Inf is implicit
+DURATION_BUCKETS_S = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# PDF size buckets (upper bound in bytes, label); the last one is open-ended
+SIZE_BUCKETS = ((256 * 1024, "lt_256k"), (1024 * 1024, "256k_1m"), (4 * 1024 * 1024, "1m_4m"))
+SIZE_BUCKET_OVER = "ge_4m"
+
+
+def size_bucket(size_bytes: Optional[int]) -> str:
+    """Maps a PDF size to its bucket label ("unknown" when the size is not known)."""
+    if size_bytes is None:
+        return "unknown"
+    for upper, label in SIZE_BUCKETS:
+        if size_bytes < upper:
+            return label
+    return SIZE_BUCKET_OVER
+
+
+class PipelineMetrics:
+    """
+    Thread-safe duration histograms per (stage, competition, size bucket, outcome).
+
+    Stages are free-form names ("download", "analyze", "validate", "csv_write", ...). Each
+    observation adds to a count, a sum, the max and the cumulative histogram buckets, plus
+    the bytes handled so the summary can report throughput.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, Dict[str, Any]] = {}
+        self.started_at = time.time()
+
+    def observe(self, stage: str, seconds: float, competition: Optional[str] = None,
+                size_bytes: Optional[int] = None, outcome: str = "ok"):
+        """
+        Records one timed unit of work.
+
+        Args:
+            stage (str): Pipeline stage name.
+            seconds (float): Wall-clock duration.
+            competition (str, optional): Competition code (e.g. "142").
+            size_bytes (int, optional): Size of the PDF handled, for the size bucket and throughput.
+            outcome (str): "ok" or "error".
+        """
+        key = (stage, competition or "unknown", size_bucket(size_bytes), outcome)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "count": 0, "sum_s": 0.0, "max_s": 0.0, "bytes": 0,
+                    "buckets": [0] * (len(DURATION_BUCKETS_S) + 1)
+                }
+            series["count"] += 1
+            series["sum_s"] += seconds
+            series["max_s"] = max(series["max_s"], seconds)
+            series["bytes"] += size_bytes or 0
+            series["buckets"][bisect.bisect_left(DURATION_BUCKETS_S, seconds)] += 1
+
+    @contextmanager
+    def timer(self, stage: str, competition: Optional[str] = None, size_bytes: Optional[int] = None):
+        """
+        Times the enclosed block. Yields a dict whose "competition", "size_bytes" and
+        "outcome" keys may be filled in inside the block; an exception sets outcome "error".
+        """
+        labels = {"competition": competition, "size_bytes": size_bytes, "outcome": "ok"}
+        started = time.perf_counter()
+        try:
+            yield labels
+        except BaseException:
+            labels["outcome"] = "error"
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started, labels["competition"],
+                         labels["size_bytes"], labels["outcome"])
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Returns one row per series with its histogram as {upper_bound: cumulative count}."""
+        with self._lock:
+            rows = []
+            for (stage, competition, bucket, outcome), series in sorted(self._series.items()):
+                cumulative, histogram = 0, {}
+                for upper, count in zip(list(DURATION_BUCKETS_S) + ["+Inf"], series["buckets"]):
+                    cumulative += count
+                    histogram[str(upper)] = cumulative
+                rows.append({
+                    "stage": stage, "competition": competition, "size_bucket": bucket, "outcome": outcome,
+                    "count": series["count"], "sum_s": round(series["sum_s"], 4), "max_s": round(series["max_s"], 4),
+                    "bytes": series["bytes"], "histogram": histogram,
+                })
+            return rows
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Per-stage totals across competitions and size buckets, slowest stage first.
+
+        p95_s is the upper bound of the histogram bucket holding the 95th percentile.
+        Stages run in parallel (downloads) can add up to more than the run's wall time.
+        """
+        stages: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (stage, _, _, outcome), series in self._series.items():
+                entry = stages.setdefault(stage, {
+                    "count": 0, "errors": 0, "sum_s": 0.0, "max_s": 0.0, "bytes": 0,
+                    "buckets": [0] * (len(DURATION_BUCKETS_S) + 1)
+                })
+                entry["count"] += series["count"]
+                entry["errors"] += series["count"] if outcome != "ok" else 0
+                entry["sum_s"] += series["sum_s"]
+                entry["max_s"] = max(entry["max_s"], series["max_s"])
+                entry["bytes"] += series["bytes"]
+                entry["buckets"] = [a + b for a, b in zip(entry["buckets"], series["buckets"])]
+
+        rows = []
+        for stage, entry in stages.items():
+            cumulative, p95 = 0, None
+            for upper, count in zip(list(DURATION_BUCKETS_S) + [float("inf")], entry["buckets"]):
+                cumulative += count
+                if cumulative >= 0.95 * entry["count"]:
+                    p95 = upper
+                    break
+            row = {
+                "stage": stage,
+                "count": entry["count"],
+                "errors": entry["errors"],
+                "total_s": round(entry["sum_s"], 3),
+                "mean_s": round(entry["sum_s"] / entry["count"], 3),
+                "p95_s": p95 if p95 != float("inf") else f">{DURATION_BUCKETS_S[-1]}",
+                "max_s": round(entry["max_s"], 3),
+            }
+            if entry["bytes"] and entry["sum_s"]:
+                row["mb_per_s"] = round(entry["bytes"] / entry["sum_s"] / 1e6, 3)
+            rows.append(row)
+        return sorted(rows, key=lambda r: r["total_s"], reverse=True)
+
+    def to_prometheus(self) -> str:
+        """Renders the series in the Prometheus text exposition format (node_exporter textfile)."""
+        lines = [
+            "# HELP cbf_robot_stage_duration_seconds Duration of pipeline stages in the last run.",
+            "# TYPE cbf_robot_stage_duration_seconds histogram",
+        ]
+        bytes_lines = []
+        for row in self.snapshot():
+            labels = (f'stage="{row["stage"]}",competition="{row["competition"]}",'
+                      f'size_bucket="{row["size_bucket"]}",outcome="{row["outcome"]}"')
+            for upper, cumulative in row["histogram"].items():
+                lines.append(f'cbf_robot_stage_duration_seconds_bucket{{{labels},le="{upper}"}} {cumulative}')
+            lines.append(f"cbf_robot_stage_duration_seconds_sum{{{labels}}} {row['sum_s']}")
+            lines.append(f"cbf_robot_stage_duration_seconds_count{{{labels}}} {row['count']}")
+            if row["bytes"]:
+                bytes_lines.append(f"cbf_robot_stage_bytes_total{{{labels}}} {row['bytes']}")
+        if bytes_lines:
+            lines += ["# HELP cbf_robot_stage_bytes_total PDF bytes handled per stage in the last run.",
+                      "# TYPE cbf_robot_stage_bytes_total counter"] + bytes_lines
+        lines += ["# HELP cbf_robot_last_run_timestamp_seconds Start of the last run (unix time).",
+                  "# TYPE cbf_robot_last_run_timestamp_seconds gauge",
+                  f"cbf_robot_last_run_timestamp_seconds {self.started_at:.0f}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self.started_at = time.time()
+
+
+pipeline_metrics = PipelineMetrics()
+
+
+def _atomic_write_text(path: str, text: str):
+    # Prometheus' textfile collector must never see a half-written file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def export_metrics(report_dir: Optional[str] = None, formats: Optional[str] = None) -> List[str]:
+    """
+    Writes the current metrics to report_dir (env METRICS_DIR, default reports/).
+
+    Args:
+        formats (str, optional): Comma-separated "json" and/or "prometheus" (env METRICS_FORMATS,
+            default both). "none" disables the export.
+
+    Returns:
+        list: Paths written.
+    """
+    report_dir = report_dir or os.getenv("METRICS_DIR", "reports")
+    formats = formats or os.getenv("METRICS_FORMATS", "json,prometheus")
+    selected = {f.strip().lower() for f in formats.split(",") if f.strip()}
+    if not pipeline_metrics.snapshot() or selected <= {"none"}:
+        return []
+    os.makedirs(report_dir, exist_ok=True)
+    written = []
+    if "json" in selected:
+        path = os.path.join(report_dir, "pipeline_metrics.json")
+        _atomic_write_text(path, json.dumps({
+            "started_at": pipeline_metrics.started_at,
+            "summary": pipeline_metrics.summary(),
+            "series": pipeline_metrics.snapshot(),
+        }, ensure_ascii=False, indent=2))
+        written.append(path)
+    if "prometheus" in selected:
+        path = os.path.join(report_dir, "pipeline_metrics.prom")
+        _atomic_write_text(path, pipeline_metrics.to_prometheus())
+        written.append(path)
+    logger.info("Pipeline metrics written", paths=written)
+    return written
@@ -1,11 +1,20 @@
 import os
+import io
 import json
 import csv
 import logging
+import datetime
+import threading
+import concurrent.futures
 from pathlib import Path
 from google import genai
 from google.genai import types # Ensure types is imported
 from collections import defaultdict
+from .matching import NameMatcher, candidate_context, fold_name
+from .sanitize import sanitize_text
+from .aggregates import update_rollups, prefix_digest
+from .lookup_store import LOOKUP_CATEGORIES, LookupStore, get_lookup_store
+from .gemini import gemini_http_options
 
 def load_lookup(lookup_path: Path) -> dict:
     """Loads a JSON lookup file safely."""
@@ -22,11 +31,13 @@ def load_lookup(lookup_path: Path) -> dict:
     return {}
 
 def save_lookup(lookup_path: Path, lookup_data: dict):
-    """Saves a dictionary to a JSON lookup file."""
+    """Saves a dictionary to a JSON lookup file atomically (temp file + rename)."""
     try:
         lookup_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(lookup_path, 'w', encoding='utf-8') as f:
+        tmp_path = lookup_path.with_name(lookup_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             json.dump(lookup_data, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, lookup_path)
         logging.info(f"Saved lookup file: {lookup_path}")
     except Exception as e:
         logging.error(f"Error saving lookup file {lookup_path}: {e}")
@@ -58,7 +69,7 @@ def get_unique_names(csv_path: Path) -> dict[str, set]:
                 if not row: continue # Skip empty rows
                 for col_name, index in columns_to_check.items():
                     if index < len(row):
-                        value = row[index].strip()
+                        value, _ = sanitize_text(row[index])
                         if value: # Avoid adding empty strings
                             unique_names[col_name].add(value)
 
@@ -76,14 +87,14 @@ def call_gemini_for_normalization(names_to_normalize: list[str], existing_lookup
         return {}
 
     logging.info(f"Preparing to call Gemini for category '{category}' with {len(names_to_normalize)} names.")
-    client = genai.Client(api_key=api_key)
+    client = genai.Client(api_key=api_key, http_options=gemini_http_options())
     model_name = "gemini-2.0-flash" # Align with common practice or your gemini.py
 
     prompt = f"""
     You are an expert in Brazilian football data normalization.
     Your task is to normalize the following list of {category} names based on common Brazilian football standards.
 
-    Existing known mappings (use these as a style guide and avoid re-normalizing them differently):
+    Closest known mappings (use these as a style guide and reuse their normalized form when the new name is the same entity):
     {json.dumps(existing_lookup, ensure_ascii=False, indent=2)}
 
     New names to normalize:
@@ -104,7 +115,7 @@ def call_gemini_for_normalization(names_to_normalize: list[str], existing_lookup
     """
 
     logging.info(f"Calling Gemini API ({model_name}) for {len(names_to_normalize)} {category} names...")
-    logging.info(f"Prompt for {category}: {prompt}")
+    logging.debug(f"Prompt for {category}: {prompt}")
 
     try:
         # Use the same API pattern as analyze_pdf in src/gemini.py
@@ -119,7 +130,7 @@ def call_gemini_for_normalization(names_to_normalize: list[str], existing_lookup
         response_text = ""
         if hasattr(response, 'text') and response.text:
             response_text = response.text.strip()
-            logging.info(f"Raw response_text for {category}: {response_text}")
+            logging.info(f"Received {len(response_text)} characters from Gemini for {category}.")
             logging.debug(f"Raw Gemini response text for {category}: {response_text}")
 
             # Attempt to parse directly, as mime_type is application/json
@@ -155,6 +166,51 @@ def call_gemini_for_normalization(names_to_normalize: list[str], existing_lookup
         logging.error(f"Exception during Gemini API call for {category}: {e}", exc_info=True)
         return {}
 
+def merge_proposals(lookups: dict, proposals: dict) -> tuple:
+    """
+    Merges proposed raw -> canonical mappings into per-category updates.
+
+    A raw name is a conflict when it received different canonical names, when the lookup maps
+    it to another canonical name by the time the proposals are merged (a concurrent update of
+    the shared store), or when new spellings that fold to the same name (matching.fold_name,
+    e.g. "BAHIA - BA" and "Bahia (BA)" sent in different Gemini chunks) got different canonical
+    names. Conflicting names are left out of the updates.
+
+    Returns:
+        tuple: ({category: {raw: canonical}}, [conflict dicts]).
+    """
+    new_mappings = {category: {} for category in proposals}
+    conflicts = []
+    for category, by_raw in proposals.items():
+        candidates_by_raw = {}
+        variants = defaultdict(list)
+        for raw, canonicals in by_raw.items():
+            existing = lookups[category].get(raw)
+            candidates_by_raw[raw] = canonicals | ({existing} if existing else set())
+            variants[fold_name(raw, category)].append(raw)
+        for raws in variants.values():
+            candidates = set().union(*(candidates_by_raw[raw] for raw in raws))
+            for raw in sorted(raws):
+                if len(candidates) > 1:
+                    conflicts.append({"category": category, "name": raw, "candidates": sorted(candidates)})
+                elif lookups[category].get(raw) is None:
+                    new_mappings[category][raw] = next(iter(candidates))
+    return new_mappings, conflicts
+
+
+def _write_conflict_report(lookup_dir: Path, conflicts: list) -> Path:
+    """
+    Writes the unresolved conflicts to normalization_conflicts_<timestamp>.json in
+    NORMALIZATION_REPORT_DIR (default: reports/ next to the lookup directory).
+    """
+    report_dir = Path(os.getenv("NORMALIZATION_REPORT_DIR") or Path(lookup_dir).resolve().parent / "reports")
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report_file = report_dir / f"normalization_conflicts_{datetime.datetime.now():%Y%m%dT%H%M%S_%f}.json"
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump({"lookup_dir": str(lookup_dir), "conflicts": conflicts}, f, ensure_ascii=False, indent=2)
+    return report_file
+
+
 def refresh_lookups(csv_path: Path, lookup_dir: Path, gemini_api_key: str):
     """Refreshes lookup files by finding new names in the CSV and normalizing them via Gemini."""
     logging.info(f"Starting lookup refresh for CSV: {csv_path}")
@@ -162,18 +218,9 @@ def refresh_lookups(csv_path: Path, lookup_dir: Path, gemini_api_key: str):
         logging.error("Gemini API key is missing. Cannot refresh lookups.")
         return
 
-    lookup_paths = {
-        "teams": lookup_dir / "teams_lookup.json",
-        "stadiums": lookup_dir / "stadiums_lookup.json",
-        "competitions": lookup_dir / "competitions_lookup.json",
-    }
-
-    # Load existing lookups
-    lookups = {
-        "teams": load_lookup(lookup_paths["teams"]),
-        "stadiums": load_lookup(lookup_paths["stadiums"]),
-        "competitions": load_lookup(lookup_paths["competitions"]),
-    }
+    # Loaded once per process and shared with write_clean_csv and the ingest path
+    store = get_lookup_store(lookup_dir)
+    lookups = {category: store.mapping(category) for category in LOOKUP_CATEGORIES}
     logging.info(f"Existing lookups sizes: teams={len(lookups['teams'])}, stadiums={len(lookups['stadiums'])}, competitions={len(lookups['competitions'])}")
 
     # Get unique names from CSV
@@ -186,87 +233,437 @@ def refresh_lookups(csv_path: Path, lookup_dir: Path, gemini_api_key: str):
 
     # Find names needing normalization
     names_to_normalize = {
-        "teams": list(all_team_names - set(lookups["teams"].keys())),
-        "stadiums": list(unique_csv_names.get('estadio', set()) - set(lookups["stadiums"].keys())),
-        "competitions": list(unique_csv_names.get('competicao', set()) - set(lookups["competitions"].keys())),
+        "teams": sorted(all_team_names - set(lookups["teams"].keys())),
+        "stadiums": sorted(unique_csv_names.get('estadio', set()) - set(lookups["stadiums"].keys())),
+        "competitions": sorted(unique_csv_names.get('competicao', set()) - set(lookups["competitions"].keys())),
     }
     for category, names in names_to_normalize.items():
         logging.info(f"Category '{category}' needs normalization for {len(names)} names: {names}")
 
-    # Call Gemini for normalization and update lookups
+    normalize_new_names(store, names_to_normalize, lookup_dir, gemini_api_key)
+    logging.info("Lookup refresh process complete.")
+
+
+def normalize_new_names(store: LookupStore, names_to_normalize: dict, lookup_dir: Path, gemini_api_key: str):
+    """
+    Resolves unseen names per category (local matcher first, then chunked Gemini calls)
+    and saves the merged mappings to the lookup store.
+    """
+    lookups = {category: store.mapping(category) for category in LOOKUP_CATEGORIES}
+
+    # Ambiguous names per Gemini prompt, and concurrent prompts across categories
+    chunk_size = int(os.getenv("NORMALIZATION_CHUNK_SIZE", "40"))
+    max_workers = int(os.getenv("NORMALIZATION_MAX_WORKERS", "4"))
+
+    # Resolve new names locally first; only ambiguous ones go to Gemini, with their top-k candidates as context
+    proposals = {category: defaultdict(set) for category in lookups}
+    tasks = []
     for category, names_list in names_to_normalize.items():
-        if names_list:
-            logging.info(f"Found {len(names_list)} new {category} to normalize.")
-            new_mappings = call_gemini_for_normalization(names_list, lookups[category], category, gemini_api_key)
-            logging.info(f"New mappings returned for {category}: {new_mappings}")
-            if new_mappings:
-                lookups[category].update(new_mappings)
-                save_lookup(lookup_paths[category], lookups[category])
-        else:
+        if not names_list:
             logging.info(f"No new {category} found to normalize.")
+            continue
+        logging.info(f"Found {len(names_list)} new {category} to normalize.")
+        resolved, ambiguous = NameMatcher(lookups[category], category).resolve(names_list)
+        for raw, canonical in resolved.items():
+            proposals[category][raw].add(canonical)
+        ambiguous_names = sorted(ambiguous)
+        for start in range(0, len(ambiguous_names), chunk_size):
+            chunk = ambiguous_names[start:start + chunk_size]
+            context = candidate_context({name: ambiguous[name] for name in chunk}, lookups[category])
+            tasks.append((category, chunk, context))
+
+    # Bounded chunks run concurrently across all categories
+    if tasks:
+        logging.info(f"Sending {len(tasks)} normalization chunks to Gemini with {max_workers} workers.")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_task = {
+                executor.submit(call_gemini_for_normalization, chunk, context, category, gemini_api_key): (category, chunk)
+                for category, chunk, context in tasks
+            }
+            for future in concurrent.futures.as_completed(future_to_task):
+                category, chunk = future_to_task[future]
+                requested = set(chunk)
+                for raw, canonical in future.result().items():
+                    if raw in requested and isinstance(canonical, str) and canonical.strip():
+                        proposals[category][raw].add(canonical.strip())
 
-    logging.info("Lookup refresh process complete.")
+    # Merged against the store as it is now: the ingest path may have added names meanwhile
+    current = {category: store.mapping(category) for category in LOOKUP_CATEGORIES}
+    new_mappings, conflicts = merge_proposals(current, proposals)
+    if conflicts:
+        report_file = _write_conflict_report(lookup_dir, conflicts)
+        logging.warning(f"{len(conflicts)} normalization conflicts left unresolved (see {report_file}): {conflicts}")
 
+    for category, mappings in new_mappings.items():
+        logging.info(f"New mappings for {category}: {mappings}")
+        store.update(category, mappings)
+    store.save()
 
-def write_clean_csv(raw_csv_path: Path, clean_csv_path: Path, lookup_dir: Path):
-    """Writes a new CSV file with normalized names based on lookup files."""
-    lookup_paths = {
-        "teams": lookup_dir / "teams_lookup.json",
-        "stadiums": lookup_dir / "stadiums_lookup.json",
-        "competitions": lookup_dir / "competitions_lookup.json",
-    }
 
-    lookups = {
-        "teams": load_lookup(lookup_paths["teams"]),
-        "stadiums": load_lookup(lookup_paths["stadiums"]),
-        "competitions": load_lookup(lookup_paths["competitions"]),
-    }
+def _pending_names_path(lookup_dir: Path) -> Path:
+    return lookup_dir / "pending_names.json"
+
+
+_pending_lock = threading.Lock()
+
 
-    # Define column indices to normalize (0-based for CSV reader)
-    columns_to_normalize = {
-        2: "teams",        # time_mandante
-        3: "teams",        # time_visitante
-        4: "stadiums",     # estadio
-        5: "competitions"  # competicao
+def queue_pending_names(lookup_dir: Path, names: dict):
+    """Adds {category: names} without a lookup entry to the queue resolved by resolve_pending_names."""
+    if not any(names.values()):
+        return
+    path = _pending_names_path(lookup_dir)
+    with _pending_lock:
+        pending = load_lookup(path)
+        for category, new_names in names.items():
+            pending[category] = sorted(set(pending.get(category, [])) | set(new_names))
+        save_lookup(path, pending)
+
+
+def resolve_pending_names(lookup_dir: Path, gemini_api_key: str):
+    """Normalizes the queued unknown names and removes them from the queue."""
+    path = _pending_names_path(lookup_dir)
+    with _pending_lock:
+        pending = load_lookup(path)
+    store = get_lookup_store(lookup_dir)
+    names_to_normalize = {
+        category: [name for name in pending.get(category, []) if store.get(category, name) is None]
+        for category in LOOKUP_CATEGORIES
     }
+    if not gemini_api_key or not any(names_to_normalize.values()):
+        return
+    logging.info(f"Resolving queued names: { {c: len(n) for c, n in names_to_normalize.items()} }")
+    normalize_new_names(store, names_to_normalize, lookup_dir, gemini_api_key)
+    with _pending_lock:
+        pending = load_lookup(path)
+        remaining = {category: [n for n in names if store.get(category, n) is None]
+                     for category, names in pending.items()}
+        save_lookup(path, {category: names for category, names in remaining.items() if names})
+
+
+# Define column indices to normalize (0-based for CSV reader)
+COLUMNS_TO_NORMALIZE = {
+    2: "teams",        # time_mandante
+    3: "teams",        # time_visitante
+    4: "stadiums",     # estadio
+    5: "competitions"  # competicao
+}
+
+
+def _clean_state_path(clean_csv_path: Path) -> Path:
+    return clean_csv_path.with_name(clean_csv_path.stem + ".state.json")
+
 
+class CleanCsvState:
+    """
+    Bookkeeping for incremental write_clean_csv runs, stored next to the clean CSV.
+
+    raw_offset is the number of bytes of the raw CSV already normalized and raw_sha1 their
+    digest, so a raw CSV rewritten in place (not only one that shrank) forces a full rewrite.
+    For every normalized column, index maps each raw name to the row IDs that contain it and
+    applied keeps the canonical value written for it, so a lookup change only touches the rows
+    that depend on it.
+    """
+
+    def __init__(self, data: dict = None):
+        data = data or {}
+        self.raw_offset = data.get("raw_offset", 0)
+        self.raw_sha1 = data.get("raw_sha1")
+        self.row_count = data.get("row_count", 0)
+        self.last_id = data.get("last_id")
+        self.lookup_versions = data.get("lookup_versions", {})
+        self.applied = {int(col): names for col, names in data.get("applied", {}).items()}
+        self.index = {int(col): names for col, names in data.get("index", {}).items()}
+
+    @classmethod
+    def load(cls, path: Path):
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (json.JSONDecodeError, OSError) as e:
+            logging.warning(f"Ignoring unreadable clean CSV state {path}: {e}")
+            return None
+
+    def save(self, path: Path):
+        data = {
+            "raw_offset": self.raw_offset,
+            "raw_sha1": self.raw_sha1,
+            "row_count": self.row_count,
+            "last_id": self.last_id,
+            "lookup_versions": self.lookup_versions,
+            "applied": self.applied,
+            "index": self.index,
+        }
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def record(self, row_id: str, col: int, raw_value: str, canonical: str):
+        self.index.setdefault(col, {}).setdefault(raw_value, []).append(row_id)
+        self.applied.setdefault(col, {})[raw_value] = canonical
+
+
+def _normalize_row(row: list, store: LookupStore, state: CleanCsvState, row_number: int, raw_csv_path: Path,
+                   unknown: dict = None) -> list:
+    """
+    Applies the lookups to one raw row and records the dependencies in the state.
+    Names without a lookup entry are added to unknown ({category: set}) when given.
+    """
+    new_row = list(row) # Make a mutable copy
+    for index, category in COLUMNS_TO_NORMALIZE.items():
+        if index < len(row):
+            original_value = row[index].strip()
+            if original_value: # Process only non-empty original values
+                normalized_value = store.canonical(category, original_value)
+                if unknown is not None and store.get(category, original_value) is None \
+                        and store.get(category, normalized_value) is None and not store.aliases(category, normalized_value):
+                    unknown.setdefault(category, set()).add(normalized_value)
+                new_row[index] = normalized_value
+                state.record(row[0], index, original_value, normalized_value)
+            # else: if original_value is empty, keep the cell in new_row as is (empty)
+        else:
+            # This case handles rows that are shorter than expected.
+            logging.warning(f"Row {row_number} in {raw_csv_path} has fewer than {index + 1} columns. Column {index} for {category} normalization is out of bounds.")
+    return new_row
+
+
+def _read_complete_lines(raw_csv_path: Path, offset: int) -> tuple:
+    """Reads the raw CSV from offset up to its last complete line. Returns (text, new offset)."""
+    with open(raw_csv_path, 'rb') as f:
+        f.seek(offset)
+        chunk = f.read()
+    end = chunk.rfind(b"\n") + 1
+    return chunk[:end].decode('utf-8'), offset + end
+
+
+def _write_clean_csv_full(raw_csv_path: Path, clean_csv_path: Path, store: LookupStore, unknown: dict = None) -> CleanCsvState:
+    """Normalizes the whole raw CSV into the clean CSV and returns the resulting state."""
+    state = CleanCsvState()
+    text, state.raw_offset = _read_complete_lines(raw_csv_path, 0)
+    tmp_path = clean_csv_path.with_name(clean_csv_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as outfile:
+        reader = csv.reader(io.StringIO(text, newline=''))
+        writer = csv.writer(outfile)
+
+        for row_number, row in enumerate(reader, 1): # Start row_number from 1 for logging
+            if not row:
+                logging.warning(f"Skipping empty row at line {row_number} in {raw_csv_path}")
+                continue
+            if row_number == 1 and row[0] == "id_jogo_cbf":
+                writer.writerow(row)
+                continue
+            writer.writerow(_normalize_row(row, store, state, row_number, raw_csv_path, unknown))
+            state.row_count += 1
+            state.last_id = row[0]
+    os.replace(tmp_path, clean_csv_path)
+    return state
+
+
+def _remap_changed_rows(clean_csv_path: Path, store: LookupStore, state: CleanCsvState) -> int:
+    """
+    Rewrites old clean rows whose raw names now map to a different canonical name.
+
+    Returns:
+        int: Number of rows rewritten.
+    """
+    # Raw names whose lookup entry changed, per column, with the new canonical value
+    changed = {}
+    for col, category in COLUMNS_TO_NORMALIZE.items():
+        if state.lookup_versions.get(category) == store.fingerprint(category):
+            continue
+        for raw_value, applied_value in state.applied.get(col, {}).items():
+            new_value = store.canonical(category, raw_value)
+            if new_value != applied_value:
+                changed.setdefault(col, {})[raw_value] = new_value
+
+    # Reverse index: row ID -> {column: new value}
+    updates = defaultdict(dict)
+    for col, names in changed.items():
+        for raw_value, new_value in names.items():
+            for row_id in state.index[col].get(raw_value, []):
+                updates[row_id][col] = new_value
+            state.applied[col][raw_value] = new_value
+    if not updates:
+        return 0
+
+    tmp_path = clean_csv_path.with_name(clean_csv_path.name + ".tmp")
+    rewritten = 0
+    with open(clean_csv_path, 'r', encoding='utf-8', newline='') as infile, \
+         open(tmp_path, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.writer(outfile)
+        for row in csv.reader(infile):
+            if row and row[0] in updates:
+                for col, new_value in updates[row[0]].items():
+                    row[col] = new_value
+                rewritten += 1
+            writer.writerow(row)
+    os.replace(tmp_path, clean_csv_path)
+    return rewritten
+
+
+# One writer of the clean CSV and its state at a time (ingest run, background resolution, operation "4")
+_clean_csv_lock = threading.RLock()
+
+
+class CleanCsvSync:
+    """
+    Keeps the clean CSV in step with the raw CSV while rows are being appended.
+
+    The state is loaded (or the clean CSV fully rewritten) once on the first sync();
+    each sync() then only normalizes the raw bytes appended since the previous one, and
+    re-maps old rows only when the lookups changed in between. Names the lookups do not
+    know are queued in pending_names.json. close() persists the state and updates the
+    dashboard rollups (see aggregates.update_rollups). The instance holds
+    the clean CSV lock from the first sync() until close(), so use it as a context manager.
+    """
+
+    def __init__(self, raw_csv_path: Path, clean_csv_path: Path, lookup_dir: Path, incremental: bool = True):
+        self.raw_csv_path = raw_csv_path
+        self.clean_csv_path = clean_csv_path
+        self.lookup_dir = lookup_dir
+        self.store = get_lookup_store(lookup_dir)
+        self.incremental = incremental
+        self.state_path = _clean_state_path(clean_csv_path)
+        self.state: CleanCsvState = None
+        self.unknown = {}
+        self._queued = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _prepare(self) -> int:
+        """Loads the state, or rewrites the clean CSV when there is none. Returns the rows written."""
+        _clean_csv_lock.acquire()
+        try:
+            state = CleanCsvState.load(self.state_path) if self.incremental else None
+            if (state is None or not self.clean_csv_path.exists()
+                    or self.raw_csv_path.stat().st_size < state.raw_offset
+                    or state.raw_sha1 != prefix_digest(self.raw_csv_path, state.raw_offset)):
+                self.state = _write_clean_csv_full(self.raw_csv_path, self.clean_csv_path, self.store, self.unknown)
+                logging.info(f"Successfully wrote normalized data to {self.clean_csv_path} ({self.state.row_count} rows, full rewrite)")
+                return self.state.row_count
+            self.state = state
+            return 0
+        except Exception:
+            _clean_csv_lock.release()
+            raise
+
+    def _remap_if_lookups_changed(self):
+        self.store.refresh()
+        fingerprints = {category: self.store.fingerprint(category) for category in LOOKUP_CATEGORIES}
+        if fingerprints == self.state.lookup_versions:
+            return
+        rewritten = _remap_changed_rows(self.clean_csv_path, self.store, self.state)
+        if rewritten:
+            logging.info(f"Re-mapped {rewritten} rows of {self.clean_csv_path} after lookup changes")
+        self.state.lookup_versions = fingerprints
+
+    def _queue_unknown(self):
+        new_names = {category: names - self._queued.get(category, set()) for category, names in self.unknown.items()}
+        if any(new_names.values()):
+            queue_pending_names(self.lookup_dir, new_names)
+            for category, names in new_names.items():
+                self._queued.setdefault(category, set()).update(names)
+
+    def sync(self) -> int:
+        """
+        Normalizes and appends the raw rows written since the last sync.
+
+        Returns:
+            int: Number of rows written to the clean CSV.
+        """
+        appended = self._prepare() if self.state is None else 0
+        self._remap_if_lookups_changed()
+        text, new_offset = _read_complete_lines(self.raw_csv_path, self.state.raw_offset)
+        if text:
+            with open(self.clean_csv_path, 'a', encoding='utf-8', newline='') as outfile:
+                writer = csv.writer(outfile)
+                for row in csv.reader(io.StringIO(text, newline='')):
+                    if not row:
+                        continue
+                    if self.state.row_count == 0 and row[0] == "id_jogo_cbf":
+                        writer.writerow(row) # Header of a raw CSV created after the clean one
+                        continue
+                    writer.writerow(_normalize_row(row, self.store, self.state, self.state.row_count + 1,
+                                                   self.raw_csv_path, self.unknown))
+                    self.state.row_count += 1
+                    self.state.last_id = row[0]
+                    appended += 1
+        self.state.raw_offset = new_offset
+        self._queue_unknown()
+        return appended
+
+    def close(self):
+        """Saves the state and releases the clean CSV lock."""
+        if self.state is None:
+            return
+        try:
+            self.state.raw_sha1 = prefix_digest(self.raw_csv_path, self.state.raw_offset)
+            self.state.save(self.state_path)
+            update_rollups(self.clean_csv_path)
+        finally:
+            self.state = None
+            _clean_csv_lock.release()
+
+
+class PendingNameResolver(threading.Thread):
+    """
+    Background thread that resolves queued unknown names while PDFs are being processed.
+
+    Runs resolve_pending_names every interval seconds until finish() is called, then once more,
+    and finally brings the clean CSV up to date with the new lookup entries.
+    """
+
+    def __init__(self, raw_csv_path: Path, clean_csv_path: Path, lookup_dir: Path, gemini_api_key: str,
+                 interval: float = None):
+        super().__init__(name="pending-name-resolver", daemon=True)
+        self.raw_csv_path = raw_csv_path
+        self.clean_csv_path = clean_csv_path
+        self.lookup_dir = lookup_dir
+        self.gemini_api_key = gemini_api_key
+        self.interval = interval if interval is not None else float(os.getenv("PENDING_NAMES_INTERVAL", "60"))
+        self._done = threading.Event()
+
+    def finish(self):
+        self._done.set()
+
+    def _resolve(self):
+        try:
+            resolve_pending_names(self.lookup_dir, self.gemini_api_key)
+        except Exception as e:
+            logging.error(f"Error resolving queued names: {e}")
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self._resolve()
+        self._resolve()
+        write_clean_csv(self.raw_csv_path, self.clean_csv_path, self.lookup_dir, incremental=True)
+
+
+def write_clean_csv(raw_csv_path: Path, clean_csv_path: Path, lookup_dir: Path, incremental: bool = False):
+    """
+    Writes a CSV file with normalized names based on lookup files.
+
+    In incremental mode only the raw rows appended since the last run are normalized and
+    appended, and old rows are rewritten only when a lookup entry they use has changed.
+    A full rewrite is done when there is no usable state (first run, or the already normalized
+    part of the raw CSV shrank or changed).
+    """
     if not raw_csv_path.exists():
         logging.error(f"Raw CSV file not found: {raw_csv_path}")
         return
 
     try:
-        with open(raw_csv_path, 'r', encoding='utf-8', newline='') as infile, \
-             open(clean_csv_path, 'w', encoding='utf-8', newline='') as outfile:
-
-            reader = csv.reader(infile)
-            writer = csv.writer(outfile)
-
-            # Optional: Handle header if your CSV has one and you want to preserve it
-            # header = next(reader, None) # Read the first line as header
-            # if header:
-            #     writer.writerow(header) # Write header to the new file
-
-            for row_number, row in enumerate(reader, 1): # Start row_number from 1 for logging
-                if not row:
-                    logging.warning(f"Skipping empty row at line {row_number} in {raw_csv_path}")
-                    continue
-                
-                new_row = list(row) # Make a mutable copy
-                for index, category in columns_to_normalize.items():
-                    if index < len(row):
-                        original_value = row[index].strip()
-                        if original_value: # Process only non-empty original values
-                            # Get normalized value, fallback to original if not found in lookup
-                            normalized_value = lookups[category].get(original_value, original_value)
-                            new_row[index] = normalized_value
-                        # else: if original_value is empty, keep the cell in new_row as is (empty)
-                    else:
-                        # This case handles rows that are shorter than expected.
-                        logging.warning(f"Row {row_number} in {raw_csv_path} has fewer than {index + 1} columns. Column {index} for {category} normalization is out of bounds.")
-                writer.writerow(new_row)
-        logging.info(f"Successfully wrote normalized data to {clean_csv_path}")
-
+        with CleanCsvSync(raw_csv_path, clean_csv_path, lookup_dir, incremental) as clean_sync:
+            appended = clean_sync.sync()
+            if incremental:
+                logging.info(f"Incrementally updated {clean_csv_path}: {appended} rows appended")
     except FileNotFoundError:
          logging.error(f"Could not find the raw CSV file at {raw_csv_path}")
     except Exception as e:
-        logging.error(f"Error writing clean CSV file {clean_csv_path}: {e}")
\ No newline at end of file
+        logging.error(f"Error writing clean CSV file {clean_csv_path}: {e}")
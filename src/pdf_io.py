@@ -0,0 +1,109 @@
+import io
+import mmap
+import hashlib
+from pathlib import Path
+from typing import Optional, Union
+
+BufferLike = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+class BufferStream(io.RawIOBase):
+    """
+    Read-only, seekable file object over a buffer (memoryview, mmap) that copies only
+    the chunks a reader asks for. io.BytesIO would copy the whole buffer first unless
+    it is given a bytes object.
+    """
+
+    def __init__(self, buffer: BufferLike):
+        super().__init__()
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        chunk = self._view[self._pos:self._pos + len(target)]
+        n = len(chunk)
+        memoryview(target).cast("B")[:n] = chunk
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def pdf_stream(pdf_content: BufferLike) -> io.IOBase:
+    """
+    File object for pdfplumber over PDF content without duplicating it.
+
+    pdfplumber does not close streams it is given; close this one (use it as a context manager).
+    """
+    if isinstance(pdf_content, bytes):
+        return io.BytesIO(pdf_content) # Shares the bytes object until written to
+    return io.BufferedReader(BufferStream(pdf_content))
+
+
+def as_bytes(pdf_content: BufferLike) -> bytes:
+    """The content as bytes; copies only when it is not bytes already (e.g. for the API upload)."""
+    return pdf_content if isinstance(pdf_content, bytes) else bytes(pdf_content)
+
+
+class PdfSource:
+    """
+    A PDF on disk mapped read-only into memory.
+
+    view is a zero-copy memoryview over the mapped pages: hashing, local parsing
+    (pdf_stream) and the upload all read the same page-cache pages instead of private
+    copies, and parallel readers of the same file share them. Use as a context manager;
+    the mapping is released on close (close streams from pdf_stream before that).
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._map: Optional[mmap.mmap] = None
+        try:
+            self.size = self.path.stat().st_size
+            if self.size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        self.view = memoryview(self._map) if self._map is not None else memoryview(b"")
+        self._sha256: Optional[str] = None
+
+    def sha256(self) -> str:
+        """Hex digest of the content, hashed straight from the mapping (computed once)."""
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.view).hexdigest()
+        return self._sha256
+
+    def close(self):
+        self.view.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass # A view derived from it is still alive; the mapping goes away with it
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "PdfSource":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,194 @@
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from .utils import get_logger
+from .pdf_io import PdfSource
+
+logger = get_logger("pdf_store")
+
+INDEX_FILE = ".pdf_index.json"
+PDF_MAGIC = b"%PDF-"
+HEADER_WINDOW = 1024 # Readers accept the header anywhere in the first KB
+CHUNK_SIZE = 64 * 1024
+
+
+def looks_like_pdf(head: bytes) -> bool:
+    """True when the first bytes of a file/response carry the %PDF- header (HTML error pages do not)."""
+    return PDF_MAGIC in bytes(head[:HEADER_WINDOW])
+
+
+class HashingWriter:
+    """
+    Writes a streamed download to disk while hashing it, checking the PDF header on the first KB.
+
+    Usage: feed chunks to write(), then close(); sha256, size and is_pdf are set as it goes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'wb')
+        self._hash = hashlib.sha256()
+        self._head = bytearray()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        if len(self._head) < HEADER_WINDOW:
+            self._head += chunk[:HEADER_WINDOW - len(self._head)]
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    @property
+    def is_pdf(self) -> bool:
+        return looks_like_pdf(self._head)
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def close(self):
+        self._file.close()
+
+
+def iter_chunks(response, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Chunks of a requests response opened with stream=True (skips keep-alive empty chunks)."""
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if chunk:
+            yield chunk
+
+
+class PdfContentIndex:
+    """
+    Content-addressed index of the PDFs in a download directory (<pdf_dir>/.pdf_index.json).
+
+    Every file name maps to the sha256 and size of its content; the first file registered
+    with a given hash is its canonical copy. Later files with the same bytes (the same
+    borderô served under another URL or year, templates, "not available" placeholders)
+    are recorded as duplicate_of the canonical file: the downloader hard-links them to it
+    and process_pdfs extracts each content only once. A hash shared by placeholder_copies
+    or more files is a placeholder, not a borderô, and is never sent for extraction.
+    """
+
+    def __init__(self, pdf_dir: Path, placeholder_copies: Optional[int] = None):
+        self.pdf_dir = Path(pdf_dir)
+        self.path = self.pdf_dir / INDEX_FILE
+        self.placeholder_copies = placeholder_copies or int(os.getenv("PDF_PLACEHOLDER_MIN_COPIES", "3"))
+        self._lock = threading.RLock()
+        self._files: Dict[str, dict] = {}
+        self._by_hash: Dict[str, list] = defaultdict(list)
+        self._dirty = False
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._files = json.load(f).get("files", {})
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable PDF index, it will be rebuilt", path=str(self.path), error=str(e))
+        for name, entry in sorted(self._files.items(), key=lambda item: item[1].get("order", 0)):
+            if entry.get("sha256"):
+                self._by_hash[entry["sha256"]].append(name)
+
+    def get(self, file_name: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._files.get(file_name)
+            return dict(entry) if entry else None
+
+    def canonical(self, sha256: str) -> Optional[str]:
+        """Name of the first file with this content that still exists on disk."""
+        with self._lock:
+            for name in self._by_hash.get(sha256, []):
+                if (self.pdf_dir / name).exists():
+                    return name
+        return None
+
+    def is_placeholder(self, sha256: str) -> bool:
+        with self._lock:
+            return len(self._by_hash.get(sha256, [])) >= self.placeholder_copies
+
+    def register(self, file_name: str, sha256: str, size: int, is_pdf: bool = True,
+                 mtime: Optional[float] = None) -> str:
+        """
+        Records file_name's content.
+
+        Returns:
+            str: The canonical file name for the content (file_name itself when it is the first).
+        """
+        with self._lock:
+            previous = self._files.get(file_name)
+            if previous and previous.get("sha256") != sha256 and file_name in self._by_hash.get(previous.get("sha256"), []):
+                self._by_hash[previous["sha256"]].remove(file_name) # Content changed on disk
+            canonical = self.canonical(sha256) or file_name
+            entry = {"sha256": sha256, "size": size, "is_pdf": is_pdf, "mtime": mtime,
+                     "order": previous.get("order") if previous else len(self._files)}
+            if canonical != file_name:
+                entry["duplicate_of"] = canonical
+            self._files[file_name] = entry
+            if file_name not in self._by_hash[sha256]:
+                self._by_hash[sha256].append(file_name)
+            self._dirty = True
+            return canonical
+
+    def sync(self, paths: Iterable[Path]) -> Tuple[int, int]:
+        """
+        Hashes the files that are not indexed yet or changed since (size/mtime), e.g. PDFs
+        downloaded before the index existed.
+
+        Returns:
+            tuple: (files hashed, files already up to date)
+        """
+        hashed = current = 0
+        for path in sorted(paths):
+            stat = path.stat()
+            entry = self.get(path.name)
+            if entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+                current += 1
+                continue
+            with PdfSource(path) as source:
+                self.register(path.name, source.sha256(), source.size,
+                              is_pdf=looks_like_pdf(source.view[:HEADER_WINDOW]), mtime=stat.st_mtime)
+            hashed += 1
+        return hashed, current
+
+    def duplicates(self) -> Set[str]:
+        """File names whose content is stored under another name."""
+        with self._lock:
+            return {name for name, entry in self._files.items() if entry.get("duplicate_of")}
+
+    def duplicate_groups(self) -> Dict[str, list]:
+        """Hashes stored under more than one file name, with the names (canonical first)."""
+        with self._lock:
+            return {sha: list(names) for sha, names in self._by_hash.items() if len(names) > 1}
+
+    def save(self):
+        """Writes the index atomically when it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"files": self._files}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+def link_duplicate(canonical_path: Path, file_path: Path, tmp_path: Path) -> bool:
+    """
+    Replaces a freshly downloaded duplicate (tmp_path) by a hard link to the canonical file.
+
+    Falls back to keeping the downloaded copy where hard links are not supported.
+
+    Returns:
+        bool: True when the link was created.
+    """
+    try:
+        os.link(canonical_path, file_path)
+    except OSError:
+        os.replace(tmp_path, file_path)
+        return False
+    os.remove(tmp_path)
+    return True
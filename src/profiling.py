@@ -0,0 +1,195 @@
+import os
+import sys
+import time
+import pstats
+import cProfile
+import datetime
+import threading
+import tracemalloc
+from io import StringIO
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .utils import get_logger
+
+logger = get_logger("profiling")
+
+# Innermost frames of parked threads (pool workers, log listener, GUI loop): not counted as samples
+IDLE_FUNCTIONS = {"wait", "select", "poll", "_wait_for_tstate_lock", "acquire", "sleep", "serve_forever", "accept", "dequeue"}
+# Allocations made by the profilers (this module included) and the import system are left out of the memory top-N
+TRACEMALLOC_FILTERS = (
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stacks of all other threads every interval seconds.
+
+    cProfile only sees the thread that enabled it; the sampler also covers the download
+    and normalization worker pools. Samples are keyed by the stage active at the time.
+    """
+
+    def __init__(self, interval: float, max_depth: int = 64):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stage = "other"
+        self.stacks: Dict[str, Counter] = defaultdict(Counter)
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            stage = self.stage
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if stack and stack[0].split(" ", 1)[0] in IDLE_FUNCTIONS:
+                    continue # Parked pool threads and the GUI loop are not interesting
+                self.stacks[stage][";".join(reversed(stack))] += 1
+                self.samples[stage] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def top_frames(self, stage: str, top_n: int) -> List[tuple]:
+        """Most frequent innermost frames of a stage as (frame, samples, share)."""
+        leaves = Counter()
+        for stack, count in self.stacks[stage].items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = self.samples[stage] or 1
+        return [(frame, count, count / total) for frame, count in leaves.most_common(top_n)]
+
+
+class RunProfiler:
+    """
+    Opt-in profiling of one run_operation, split by pipeline stage.
+
+    Each stage() block is profiled with cProfile (calling thread) while a StackSampler
+    samples every thread. Blocks opened with memory=True also trace allocations with
+    tracemalloc and record the peak. finish() writes reports/profile_<timestamp>/ with one
+    .pstats file per stage, samples.folded (collapsed stacks for flamegraph.pl/speedscope),
+    memory_<stage>.txt and a top-N summary.txt. A disabled profiler does nothing.
+    """
+
+    def __init__(self, enabled: bool = False, report_dir: str = "reports", top_n: Optional[int] = None,
+                 sample_interval: Optional[float] = None):
+        self.enabled = enabled
+        self.top_n = top_n or int(os.getenv("PROFILE_TOP_N", "25"))
+        self.sample_interval = sample_interval or float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "10")) / 1000
+        self.output_dir = Path(report_dir) / f"profile_{datetime.datetime.now():%Y%m%dT%H%M%S}"
+        self.stats: Dict[str, pstats.Stats] = {}
+        self.durations: Dict[str, float] = defaultdict(float)
+        self.memory: Dict[str, dict] = {}
+        self._sampler: Optional[StackSampler] = None
+
+    @classmethod
+    def from_env(cls, enabled: Optional[bool] = None) -> "RunProfiler":
+        """Profiler enabled by the argument or, when it is None, by CBF_PROFILE=1."""
+        return cls(enabled=_env_flag("CBF_PROFILE") if enabled is None else enabled,
+                   report_dir=os.getenv("PROFILE_DIR", "reports"))
+
+    def start(self):
+        if self.enabled and self._sampler is None:
+            self._sampler = StackSampler(self.sample_interval)
+            self._sampler.start()
+        return self
+
+    @contextmanager
+    def stage(self, name: str, memory: bool = False):
+        """Profiles the enclosed block as stage name (repeated blocks of one stage are merged)."""
+        if not self.enabled:
+            yield
+            return
+        self.start()
+        self._sampler.stage = name
+        tracing = memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start(int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1")))
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.durations[name] += time.perf_counter() - started
+            self._sampler.stage = "other"
+            if name in self.stats:
+                self.stats[name].add(profile)
+            else:
+                self.stats[name] = pstats.Stats(profile)
+            if tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot().filter_traces(TRACEMALLOC_FILTERS)
+                tracemalloc.stop()
+                self.memory[name] = {"peak_bytes": peak, "top": snapshot.statistics("lineno")[:self.top_n]}
+
+    def _stats_text(self, stats: pstats.Stats, sort: str) -> str:
+        stream = StringIO()
+        stats.stream = stream
+        stats.sort_stats(sort).print_stats(self.top_n)
+        return stream.getvalue()
+
+    def summary(self) -> str:
+        lines = []
+        for name, stats in self.stats.items():
+            lines.append(f"=== Stage {name}: {self.durations[name]:.2f} s ===")
+            if self._sampler and self._sampler.samples[name]:
+                lines.append(f"Sampled frames, all threads ({self._sampler.samples[name]} samples):")
+                for frame, count, share in self._sampler.top_frames(name, self.top_n):
+                    lines.append(f"  {share:6.1%}  {count:6d}  {frame}")
+            if name in self.memory:
+                lines.append(f"Peak traced memory: {self.memory[name]['peak_bytes'] / 1e6:.1f} MB")
+            lines.append(f"cProfile, calling thread, top {self.top_n} by cumulative time:")
+            lines.append(self._stats_text(stats, "cumulative").strip())
+            lines.append("")
+        return "\n".join(lines)
+
+    def finish(self) -> Optional[Path]:
+        """
+        Stops sampling and writes the reports.
+
+        Returns:
+            Path: The report directory, or None when disabled or nothing was profiled.
+        """
+        if self._sampler:
+            self._sampler.stop()
+        if not self.enabled or not self.stats:
+            return None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for name, stats in self.stats.items():
+            stats.dump_stats(str(self.output_dir / f"{name}.pstats"))
+        if self._sampler:
+            with open(self.output_dir / "samples.folded", "w", encoding="utf-8") as f:
+                for stage, stacks in self._sampler.stacks.items():
+                    for stack, count in stacks.most_common():
+                        f.write(f"{stage};{stack} {count}\n")
+        for name, memory in self.memory.items():
+            with open(self.output_dir / f"memory_{name}.txt", "w", encoding="utf-8") as f:
+                f.write(f"Peak traced memory: {memory['peak_bytes']} bytes\n")
+                f.write("\n".join(str(stat) for stat in memory["top"]) + "\n")
+        (self.output_dir / "summary.txt").write_text(self.summary(), encoding="utf-8")
+        logger.info("Profile written", path=str(self.output_dir),
+                    stages={name: round(seconds, 2) for name, seconds in self.durations.items()},
+                    peak_memory_mb={name: round(m["peak_bytes"] / 1e6, 1) for name, m in self.memory.items()})
+        return self.output_dir
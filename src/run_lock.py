@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import socket
+from pathlib import Path
+from typing import Optional
+
+from .utils import get_logger, OperationInProgressError
+
+logger = get_logger("run_lock")
+
+DEFAULT_STATE_DIR = Path("state")
+
+
+STILL_ACTIVE = 259 # GetExitCodeProcess code of a running Windows process
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+ERROR_ACCESS_DENIED = 5
+
+
+def _pid_alive_windows(pid: int) -> bool:
+    import ctypes
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return ctypes.get_last_error() == ERROR_ACCESS_DENIED # Exists but belongs to someone else
+    try:
+        exit_code = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return True
+        return exit_code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # os.kill(pid, 0) is not a probe on Windows: signal 0 is CTRL_C_EVENT
+        return _pid_alive_windows(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True # Exists but belongs to someone else, or the check is unsupported
+    return True
+
+
+class RunLock:
+    """
+    Lock file that keeps two runs (CLI, scheduler cycle) from working on the same data at once.
+
+    The owner's pid, host and start time are written to a temporary file that is then hard-linked
+    into place, so the lock never exists without its content. On this host a lock is taken over
+    only when its pid is gone, however long the run takes; a lock from another host (shared
+    state dir) is taken over once older than stale_after seconds. An unreadable lock file counts
+    as held until it is grace seconds old. Stale locks are removed with a rename-and-compare
+    (_take_over), so two contenders that both judged a lock stale cannot remove each other's
+    fresh lock. Use as a context manager; OperationInProgressError is raised when the lock is held.
+    """
+
+    def __init__(self, name: str = "run", state_dir: Optional[Path] = None, stale_after: Optional[float] = None,
+                 grace: float = 60.0):
+        self.path = Path(state_dir or os.getenv("STATE_DIR", DEFAULT_STATE_DIR)) / f"{name}.lock"
+        self.stale_after = stale_after if stale_after is not None else float(os.getenv("LOCK_STALE_SECONDS", str(12 * 3600)))
+        self.grace = grace
+        self._held = False
+
+    def _read(self, path: Optional[Path] = None) -> Optional[str]:
+        try:
+            return (path or self.path).read_text(encoding='utf-8')
+        except OSError:
+            return None
+
+    def _owner(self, content: Optional[str] = None) -> dict:
+        try:
+            return json.loads(content if content is not None else self._read() or "")
+        except json.JSONDecodeError:
+            return {}
+
+    def _take_over(self, seen: Optional[str]) -> bool:
+        """
+        Removes the stale lock whose content was seen, unless another contender replaced it meanwhile.
+
+        The lock is first renamed to a private name (atomic: only one contender gets a given file)
+        and compared with what was judged stale; a lock taken in between is put back.
+        """
+        moved = self.path.with_name(f"{self.path.name}.{os.getpid()}.stale")
+        try:
+            os.replace(self.path, moved)
+        except FileNotFoundError:
+            return True # Already removed; the next attempt links ours
+        try:
+            if self._read(moved) == seen:
+                return True
+            try:
+                os.link(moved, self.path) # Not the lock we judged stale: give it back
+            except FileExistsError:
+                pass
+            return False
+        finally:
+            moved.unlink(missing_ok=True)
+
+    def _is_stale(self, owner: dict) -> bool:
+        if not owner:
+            try:
+                return time.time() - self.path.stat().st_mtime > self.grace
+            except FileNotFoundError:
+                return False # Released meanwhile; the next attempt creates it
+        if owner.get("host") == socket.gethostname():
+            return not _pid_alive(int(owner.get("pid", 0)))
+        return time.time() - owner.get("started_at", 0) > self.stale_after
+
+    def acquire(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        info = {"pid": os.getpid(), "host": socket.gethostname(), "started_at": time.time()}
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        try:
+            for _ in range(3):
+                try:
+                    os.link(tmp_path, self.path) # Atomic and fails when the lock exists, like O_EXCL
+                except FileExistsError:
+                    seen = self._read()
+                    if seen is None:
+                        continue # Released between the link and the read
+                    owner = self._owner(seen)
+                    if not self._is_stale(owner):
+                        raise OperationInProgressError(f"Another run holds {self.path}", owner)
+                    if not self._take_over(seen):
+                        raise OperationInProgressError(f"Another run holds {self.path}", self._owner())
+                    logger.warning("Took over stale lock", path=str(self.path), owner=owner)
+                    continue
+                self._held = True
+                return self
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        raise OperationInProgressError(f"Could not acquire {self.path}", self._owner())
+
+    def release(self):
+        if self._held:
+            if self._owner().get("pid") in (os.getpid(), None):
+                self.path.unlink(missing_ok=True)
+            self._held = False
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,95 @@
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+# Greek and Cyrillic letters that render like Latin ones. Extraction returns them inside
+# otherwise Latin names ("RED BULL BRAGANTIΙΝΟ", "ΜΕΙΑ"); Portuguese text never uses them.
+_LOOKALIKES = {
+    # Greek capitals
+    "Α": "A", "Β": "B", "Ε": "E", "Ζ": "Z", "Η": "H", "Ι": "I", "Κ": "K", "Μ": "M", "Ν": "N",
+    "Ο": "O", "Ρ": "P", "Τ": "T", "Υ": "Y", "Χ": "X",
+    # Greek small letters
+    "ο": "o", "ι": "i", "κ": "k", "ν": "v", "υ": "u", "α": "a", "ε": "e", "ρ": "p", "τ": "t",
+    # Cyrillic capitals
+    "А": "A", "В": "B", "Е": "E", "К": "K", "М": "M", "Н": "H", "О": "O", "Р": "P", "С": "C",
+    "Т": "T", "Х": "X", "І": "I", "Ј": "J", "Ѕ": "S",
+    # Cyrillic small letters
+    "а": "a", "е": "e", "о": "o", "р": "p", "с": "c", "у": "y", "х": "x", "і": "i", "ј": "j", "ѕ": "s",
+}
+# Invisible or layout characters: zero-width marks are dropped, odd spaces become plain spaces
+_INVISIBLES = {"\u200b": None, "\u200c": None, "\u200d": None, "\u2060": None, "\ufeff": None, "\u00ad": None}
+_SPACES = {"\u00a0": " ", "\u2007": " ", "\u202f": " ", "\t": " ", "\r": " ", "\n": " "}
+
+HOMOGLYPH_TABLE = str.maketrans(_LOOKALIKES)
+SANITIZE_TABLE = str.maketrans({**_LOOKALIKES, **_INVISIBLES, **_SPACES})
+
+_MULTI_SPACE = re.compile(r" {2,}")
+# UTF-8 decoded as Latin-1/cp1252 leaves "Ã" or "Â" followed by a continuation character ("SÃ£O")
+_MOJIBAKE = re.compile("[\u00c3\u00c2][\u0080-\u00bf\u2018-\u201e\u2020-\u2122]")
+
+
+def _repair_mojibake(value: str) -> str:
+    for encoding in ("cp1252", "latin-1"):
+        try:
+            return value.encode(encoding).decode("utf-8")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            continue
+    return value
+
+
+def sanitize_text(value: str) -> Tuple[str, bool]:
+    """
+    Repairs one extracted string: mojibake, lookalike letters, invisible characters, spacing.
+
+    Returns:
+        tuple: (sanitized string, whether anything changed).
+    """
+    cleaned = value
+    if _MOJIBAKE.search(cleaned):
+        cleaned = _repair_mojibake(cleaned)
+    cleaned = cleaned.translate(SANITIZE_TABLE)
+    if "  " in cleaned:
+        cleaned = _MULTI_SPACE.sub(" ", cleaned)
+    cleaned = cleaned.strip()
+    return cleaned, cleaned != value
+
+
+class RepairCounter:
+    """Thread-safe count of repaired strings per field path (e.g. "match_details.home_team")."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def add(self, field: str):
+        with self._lock:
+            self._counts[field] += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self._counts.values())
+
+
+def sanitize_record(data: Any, counter: Optional[RepairCounter] = None, field: str = "") -> Any:
+    """
+    Returns a copy of a nested dict/list structure with every string sanitized.
+
+    List items share the field path of their list ("financial_data.revenue_details[].source").
+    """
+    if isinstance(data, str):
+        cleaned, changed = sanitize_text(data)
+        if changed and counter is not None:
+            counter.add(field or "<value>")
+        return cleaned
+    if isinstance(data, dict):
+        return {key: sanitize_record(value, counter, f"{field}.{key}" if field else str(key))
+                for key, value in data.items()}
+    if isinstance(data, list):
+        return [sanitize_record(item, counter, f"{field}[]") for item in data]
+    return data
+
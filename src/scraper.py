@@ -2,18 +2,33 @@ import os
 import requests
 import concurrent.futures # Added
 from .utils import (
-    generate_urls,
     ensure_directory_exists,
     get_logger,
     handle_error,
     DownloadError,
     OperationCancelledError
 )
-from typing import Callable, Optional, List # List Added
+from .metrics import pipeline_metrics
+from .pdf_store import PdfContentIndex, HashingWriter, iter_chunks, link_duplicate
+from .competitions import get_competition
+from pathlib import Path
+from typing import Callable, Dict, Optional, List # List Added
 import threading
 
-def _download_single_pdf(url: str, year: int, competition_code: str, download_dir: str, logger) -> Optional[str]:
-    """Downloads a single PDF file."""
+NOT_FOUND_STATUSES = (404, 410) # Borderô not published; the only answers stop_after_misses counts
+
+def _download_single_pdf(url: str, year: int, competition_code: str, download_dir: str, logger,
+                         content_index: Optional[PdfContentIndex] = None,
+                         failures: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    Downloads a single PDF file.
+
+    The response is streamed to a temporary file while it is hashed. Responses without a
+    PDF header (HTML error pages, empty bodies) are discarded; with content_index, bytes
+    already stored under another name are hard-linked to that file instead of kept twice.
+    When None is returned and failures is given, failures[url] records why: "not_found"
+    (404/410, no borderô published), "not_pdf" or "error" (timeouts, 5xx, 429, anything else).
+    """
     try:
         base_name = os.path.basename(url)
         name_part, ext = os.path.splitext(base_name)
@@ -21,26 +36,59 @@ def _download_single_pdf(url: str, year: int, competition_code: str, download_di
         file_path = os.path.join(download_dir, file_name)
 
         if not os.path.exists(file_path):
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            tmp_path = file_path + ".part"
+            with pipeline_metrics.timer("download", competition=competition_code) as timing:
+                with requests.get(url, timeout=10, stream=True) as response:
+                    response.raise_for_status()
+                    writer = HashingWriter(tmp_path)
+                    try:
+                        for chunk in iter_chunks(response):
+                            writer.write(chunk)
+                    finally:
+                        writer.close()
+                timing["size_bytes"] = writer.size
+                if not writer.is_pdf:
+                    os.remove(tmp_path)
+                    timing["outcome"] = "error"
+                    raise DownloadError(f"Response for {url} is not a PDF", {
+                        "url": url, "file_name": file_name, "year": year, "competition_code": competition_code,
+                        "reason": "not_pdf", "size_bytes": writer.size,
+                        "content_type": response.headers.get("Content-Type"),
+                    })
 
-            with open(file_path, 'wb') as file:
-                file.write(response.content)
+                canonical = content_index.canonical(writer.sha256) if content_index else None
+                if canonical:
+                    linked = link_duplicate(Path(download_dir) / canonical, Path(file_path), Path(tmp_path))
+                    logger.info("Downloaded duplicate content", filename=file_name, duplicate_of=canonical,
+                                hard_link=linked, sha256=writer.sha256)
+                else:
+                    os.replace(tmp_path, file_path)
+                if content_index:
+                    content_index.register(file_name, writer.sha256, writer.size, mtime=os.stat(file_path).st_mtime)
             logger.info("Downloaded file",
                        filename=file_name,
                        url=url,
-                       size_bytes=len(response.content))
+                       size_bytes=writer.size)
             return file_path
         else:
             logger.debug("File already exists", filename=file_name, path=file_path)
             return file_path # Return path if already exists, considered a "success" for download purposes
+    except DownloadError as e:
+        if failures is not None:
+            failures[url] = e.details.get("reason", "error")
+        handle_error(error=e, log_context=e.details, log_level="warning")
+        return None
     except requests.RequestException as e:
         error_context = {
             "url": url,
             "file_name": file_name if 'file_name' in locals() else base_name, # Ensure file_name is defined
             "year": year,
-            "competition_code": competition_code
+            "competition_code": competition_code,
+            # 404 means the match has no borderô yet; handle_error counts it without a traceback
+            "status_code": e.response.status_code if e.response is not None else None
         }
+        if failures is not None:
+            failures[url] = "not_found" if error_context["status_code"] in NOT_FOUND_STATUSES else "error"
         handle_error(
             error=DownloadError(f"Failed to download {url}: {str(e)}", error_context),
             log_context=error_context,
@@ -54,6 +102,8 @@ def _download_single_pdf(url: str, year: int, competition_code: str, download_di
             "year": year,
             "competition_code": competition_code
         }
+        if failures is not None:
+            failures[url] = "error"
         handle_error(
             error=DownloadError(f"Unexpected error downloading {url}: {str(e)}", error_context),
             log_context=error_context,
@@ -71,7 +121,7 @@ def download_pdfs(year: int, competition_code: str, download_dir: str,
 
     Args:
         year (int): Ano dos jogos.
-        competition_code (str): Código da competição (142, 424, 242).
+        competition_code (str): Código da competição no registro (ex.: 142, 424, 242).
         download_dir (str): Diretório onde os PDFs serão salvos.
         progress_callback (Optional[Callable[[float], None]]): Callback to report progress (0.0 to 100.0).
         cancel_event (Optional[threading.Event]): Event to signal cancellation.
@@ -85,9 +135,11 @@ def download_pdfs(year: int, competition_code: str, download_dir: str,
     """
     logger = get_logger("downloader")
     ensure_directory_exists(download_dir)
+    content_index = PdfContentIndex(download_dir)
 
     try:
-        urls = generate_urls(year, competition_code)
+        competition = get_competition(competition_code)
+        urls = competition.urls(year)
     except Exception as e:
         handle_error(
             error=e,
@@ -104,37 +156,66 @@ def download_pdfs(year: int, competition_code: str, download_dir: str,
             progress_callback(100.0)
         return []
 
+    # With a miss policy the season is walked in fixture order, one window at a time, and the walk
+    # stops once the last stop_after_misses ids answered not found (the rest is not played yet).
+    # Transient failures (timeouts, 5xx, 429) and non-PDF answers neither count nor reset the run.
+    stop_after = competition.stop_after_misses
+    window = max(stop_after, max_workers) if stop_after else total_urls
+
     logger.info("Starting PDF downloads",
                year=year,
                competition=competition_code,
                url_count=total_urls,
+               stop_after_misses=stop_after,
                download_dir=str(download_dir),
                max_workers=max_workers)
 
     completed_count = 0
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_url = {executor.submit(_download_single_pdf, url, year, competition_code, download_dir, logger): url for url in urls}
-
-        for future in concurrent.futures.as_completed(future_to_url):
-            if cancel_event and cancel_event.is_set():
-                logger.info("Download operation cancelled by user.")
-                # Attempt to cancel remaining futures
-                for f in future_to_url: # Iterate over keys of the dict
-                    if not f.done():
-                        f.cancel()
-                executor.shutdown(wait=False, cancel_futures=True) # Python 3.9+ for cancel_futures
-                raise OperationCancelledError("Download cancelled by user.")
-
-            result_path = future.result()
-            if result_path:
-                downloaded_files.append(result_path)
-            
-            completed_count += 1
-            if progress_callback:
-                progress_percentage = (completed_count / total_urls) * 100
-                progress_callback(progress_percentage)
+    consecutive_misses = 0
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for window_start in range(0, total_urls, window):
+                window_urls = urls[window_start:window_start + window]
+                failures: Dict[str, str] = {}
+                future_to_url = {executor.submit(_download_single_pdf, url, year, competition_code, download_dir, logger, content_index, failures): url for url in window_urls}
+                results = {}
+
+                for future in concurrent.futures.as_completed(future_to_url):
+                    if cancel_event and cancel_event.is_set():
+                        logger.info("Download operation cancelled by user.")
+                        # Attempt to cancel remaining futures
+                        for f in future_to_url: # Iterate over keys of the dict
+                            if not f.done():
+                                f.cancel()
+                        executor.shutdown(wait=False, cancel_futures=True) # Python 3.9+ for cancel_futures
+                        raise OperationCancelledError("Download cancelled by user.")
+
+                    result_path = future.result()
+                    results[future_to_url[future]] = result_path
+                    if result_path:
+                        downloaded_files.append(result_path)
+
+                    completed_count += 1
+                    if progress_callback:
+                        progress_percentage = (completed_count / total_urls) * 100
+                        progress_callback(progress_percentage)
+
+                for url in window_urls:
+                    if results.get(url):
+                        consecutive_misses = 0
+                    elif failures.get(url) == "not_found":
+                        consecutive_misses += 1
+                if stop_after and consecutive_misses >= stop_after and window_start + window < total_urls:
+                    logger.info("Stopping after consecutive missing borderôs", competition=competition_code, year=year,
+                                misses=consecutive_misses, skipped_urls=total_urls - completed_count)
+                    if progress_callback:
+                        progress_callback(100.0)
+                    break
+    finally:
+        content_index.save()
 
     logger.info("Download completed",
                total_downloaded_or_existing=len(downloaded_files),
-               total_attempted=total_urls)
+               total_attempted=total_urls,
+               duplicate_contents=len(content_index.duplicate_groups()))
     return downloaded_files
\ No newline at end of file
@@ -1,11 +1,16 @@
 import os
+import re
 from dotenv import load_dotenv
 import logging
 import logging.handlers
 import structlog
 import sys
+import copy
+import queue
+import atexit
+import threading
 import traceback
-from typing import Optional, Dict, Any, Callable, Union
+from typing import Optional, Dict, Any, Callable, List, Union
 
 # Exception Hierarchy for CBF Robot
 class CBFRobotError(Exception):
@@ -39,12 +44,104 @@ class OperationCancelledError(CBFRobotError):
     """Exception raised when an operation is cancelled by the user."""
     pass
 
+class OperationInProgressError(CBFRobotError):
+    """Exception raised when another run already holds the operation lock."""
+    pass
+
 # Structured logging processor for additional context
 def add_app_context(_, __, event_dict):
     """Add application context to log records."""
     event_dict["app"] = "CBF Robot"
     return event_dict
 
+# Default 1-in-N sampling for high-volume per-file events (LOG_SAMPLE_EVENTS overrides it)
+DEFAULT_LOG_SAMPLE_EVENTS = "Skipping processed PDF:100,File already exists:100"
+
+class EventSampler:
+    """
+    structlog processor that keeps 1 in N occurrences of selected events.
+
+    The first occurrence is always kept; kept events carry sampled=N so readers know
+    each line stands for N events.
+    """
+    def __init__(self, rates: Dict[str, int]):
+        self.rates = {event: rate for event, rate in rates.items() if rate > 1}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "EventSampler":
+        rates = {}
+        for item in os.getenv("LOG_SAMPLE_EVENTS", DEFAULT_LOG_SAMPLE_EVENTS).split(","):
+            event, _, rate = item.rpartition(":")
+            if event.strip() and rate.strip().isdigit():
+                rates[event.strip()] = int(rate)
+        return cls(rates)
+
+    def __call__(self, _, __, event_dict):
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is None:
+            return event_dict
+        with self._lock:
+            count = self._counts.get(event_dict["event"], 0)
+            self._counts[event_dict["event"]] = count + 1
+        if count % rate:
+            raise structlog.DropEvent
+        event_dict["sampled"] = rate
+        return event_dict
+
+class PayloadTruncator:
+    """
+    Formatter processor that caps long strings and large collections in log events.
+
+    Runs on the listener thread, so oversized prompts and API responses never reach
+    the file in full and never cost the worker threads more than an enqueue.
+    """
+    def __init__(self, max_chars: int = 2000, max_items: int = 50):
+        self.max_chars = max_chars
+        self.max_items = max_items
+
+    def _cap(self, value):
+        if isinstance(value, str):
+            if len(value) > self.max_chars:
+                return f"{value[:self.max_chars]}... [+{len(value) - self.max_chars} chars]"
+            return value
+        if isinstance(value, dict):
+            capped = {k: self._cap(v) for k, v in list(value.items())[:self.max_items]}
+            if len(value) > self.max_items:
+                capped["..."] = f"+{len(value) - self.max_items} items"
+            return capped
+        if isinstance(value, (list, tuple, set, frozenset)):
+            items = list(value)
+            capped = [self._cap(v) for v in items[:self.max_items]]
+            if len(items) > self.max_items:
+                capped.append(f"... +{len(items) - self.max_items} items")
+            return capped
+        return value
+
+    def __call__(self, _, __, event_dict):
+        return {key: self._cap(value) for key, value in event_dict.items()}
+
+class _EventQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that enqueues records unformatted; rendering happens on the listener thread."""
+    def prepare(self, record):
+        # The stock prepare() formats the record here, on the calling thread, and would turn
+        # structlog's event dict into a string before ProcessorFormatter sees it
+        record = copy.copy(record)
+        if not isinstance(record.msg, dict) and record.args:
+            record.msg, record.args = record.getMessage(), None
+        return record
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+def _stop_log_listener():
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop() # Flushes the records still queued
+        _log_listener = None
+
+atexit.register(_stop_log_listener)
+
 def load_env_variables():
     """Load environment variables from the .env file."""
     load_dotenv()
@@ -53,9 +150,15 @@ def setup_logging():
     """
     Configures rotating logging for the application using structlog.
     Logs daily, keeping the last 7 days.
+
+    Callers only enqueue records (QueueHandler); a QueueListener thread renders them, as
+    JSON lines to the file (LOG_FILE_FORMAT=console for the old layout) and with the
+    console renderer to stdout. LOG_SAMPLE_EVENTS ("event:N,...") samples high-volume
+    events and LOG_MAX_FIELD_CHARS / LOG_MAX_ITEMS cap logged payloads.
     """
     log_file = 'cbf_robot.log'
     log_level = logging.INFO
+    _stop_log_listener()
     
     # Create a handler that rotates daily and keeps 7 backups
     handler = logging.handlers.TimedRotatingFileHandler(
@@ -70,6 +173,7 @@ def setup_logging():
     structlog.configure(
         processors=[
             structlog.stdlib.filter_by_level,
+            EventSampler.from_env(),
             structlog.stdlib.add_logger_name,
             structlog.stdlib.add_log_level,
             structlog.stdlib.PositionalArgumentsFormatter(),
@@ -83,14 +187,36 @@ def setup_logging():
         cache_logger_on_first_use=True,
     )
     
-    # Configure formatter for the handler
-    formatter = structlog.stdlib.ProcessorFormatter(
-        processor=structlog.dev.ConsoleRenderer(),
+    # Records from the stdlib logging module (normalize.py) get the same fields
+    foreign_pre_chain = [
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S"),
+        structlog.processors.format_exc_info,
+        add_app_context,
+    ]
+    truncator = PayloadTruncator(
+        max_chars=int(os.getenv("LOG_MAX_FIELD_CHARS", "2000")),
+        max_items=int(os.getenv("LOG_MAX_ITEMS", "50"))
     )
+
+    # Configure formatters for the handlers
+    def formatter(renderer):
+        return structlog.stdlib.ProcessorFormatter(
+            processors=[structlog.stdlib.ProcessorFormatter.remove_processors_meta, truncator, renderer],
+            foreign_pre_chain=foreign_pre_chain,
+        )
+
+    if os.getenv("LOG_FILE_FORMAT", "json").lower() == "console":
+        handler.setFormatter(formatter(structlog.dev.ConsoleRenderer(colors=False)))
+    else:
+        handler.setFormatter(formatter(structlog.processors.JSONRenderer(ensure_ascii=False, default=str)))
     
-    handler.setFormatter(formatter)
-    
-    # Get the root logger and add the handler
+    # Also log to console for interactive use
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter(structlog.dev.ConsoleRenderer()))
+
+    # Get the root logger and route everything through the queue
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
     
@@ -98,12 +224,11 @@ def setup_logging():
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
     
-    root_logger.addHandler(handler)
-    
-    # Also log to console for interactive use
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(_EventQueueHandler(log_queue))
+    global _log_listener
+    _log_listener = logging.handlers.QueueListener(log_queue, handler, console_handler, respect_handler_level=True)
+    _log_listener.start()
     
     # Return a structlog logger instance
     return structlog.get_logger()
@@ -123,6 +248,72 @@ def get_logger(name: str = None):
         return structlog.get_logger(name)
     return structlog.get_logger()
 
+# Expected failure classes: counted and logged without a traceback
+NOT_FOUND_STATUS_CODES = (404, 410)
+# Matched against the message; \b keeps match ids such as 42429 from looking like HTTP 429
+QUOTA_PATTERN = re.compile(r"\b429\b|resource[_ ]exhausted|quota|rate limit", re.IGNORECASE)
+# Log level override per kind; unlisted kinds keep the caller's level
+EXPECTED_ERROR_LOG_LEVELS = {"not_found": "info"}
+
+def classify_error(error: Exception) -> Optional[str]:
+    """
+    Classifies expected, high-volume failures.
+
+    Returns:
+        str: "not_found", "not_pdf", "quota" or "validation", or None for unexpected errors.
+    """
+    details = getattr(error, "details", None) or {}
+    status_code = details.get("status_code") or getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(error, FileNotFoundError) or status_code in NOT_FOUND_STATUS_CODES:
+        return "not_found"
+    if details.get("reason") == "not_pdf": # HTML error pages/placeholders served with 200
+        return "not_pdf"
+    if status_code == 429 or QUOTA_PATTERN.search(str(error)):
+        return "quota"
+    # validation.py raises DataValidationError with the pydantic errors; db.py also uses it for I/O failures
+    if (isinstance(error, DataValidationError) and "errors" in details) or type(error).__name__ == "ValidationError":
+        return "validation"
+    return None
+
+class ErrorStats:
+    """Thread-safe per-run counts of handled errors by kind and type, with the last message of each."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[tuple, Dict[str, Any]] = {}
+
+    def record(self, kind: str, error_type: str, message: str):
+        with self._lock:
+            entry = self._stats.setdefault((kind, error_type), {"count": 0, "last_message": ""})
+            entry["count"] += 1
+            entry["last_message"] = message
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Returns one row per (kind, error type), most frequent first."""
+        with self._lock:
+            rows = [{"kind": kind, "error_type": error_type, **entry}
+                    for (kind, error_type), entry in self._stats.items()]
+        return sorted(rows, key=lambda r: (-r["count"], r["kind"], r["error_type"]))
+
+    def table(self, max_message: int = 60) -> str:
+        """Renders the snapshot as a fixed-width text table (empty string when nothing was recorded)."""
+        rows = self.snapshot()
+        if not rows:
+            return ""
+        cells = [("Tipo", "Erro", "Qtde", "Última mensagem")] + [
+            (r["kind"], r["error_type"], str(r["count"]), r["last_message"][:max_message]) for r in rows
+        ]
+        widths = [max(len(row[i]) for row in cells) for i in range(3)]
+        lines = [f"{row[0]:<{widths[0]}}  {row[1]:<{widths[1]}}  {row[2]:>{widths[2]}}  {row[3]}" for row in cells]
+        lines.insert(1, "-" * len(lines[0]))
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+error_stats = ErrorStats()
+
 def handle_error(
     error: Exception, 
     log_context: Optional[Dict[str, Any]] = None,
@@ -132,6 +323,10 @@ def handle_error(
 ) -> Dict[str, Any]:
     """
     Centralized error handling function.
+
+    Errors classified by classify_error (not found, quota, validation) are logged as one
+    compact "Expected error" line without formatting a traceback; anything else keeps the
+    full diagnostics. Every handled error is counted in error_stats.
     
     Args:
         error: The exception that was raised
@@ -149,19 +344,35 @@ def handle_error(
     # Extract error details
     error_type = type(error).__name__
     error_message = str(error)
-    error_traceback = traceback.format_exc()
-    
-    # Prepare error details
-    error_details = {
-        "error_type": error_type,
-        "error_message": error_message,
-        "traceback": error_traceback,
-        **context
-    }
+    kind = classify_error(error)
+    error_stats.record(kind or "unexpected", error_type, error_message)
     
-    # Log the error with appropriate level
-    log_method = getattr(logger, log_level)
-    log_method("Error occurred", **error_details)
+    if kind:
+        error_details = {
+            "error_type": error_type,
+            "error_message": error_message,
+            "error_kind": kind,
+            "traceback": None,
+            **context
+        }
+        log_method = getattr(logger, EXPECTED_ERROR_LOG_LEVELS.get(kind, log_level))
+        log_method("Expected error", **error_details)
+    else:
+        # Works outside the except block too, where format_exc() would return "NoneType: None"
+        error_traceback = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        
+        # Prepare error details
+        error_details = {
+            "error_type": error_type,
+            "error_message": error_message,
+            "error_kind": "unexpected",
+            "traceback": error_traceback,
+            **context
+        }
+        
+        # Log the error with appropriate level
+        log_method = getattr(logger, log_level)
+        log_method("Error occurred", **error_details)
     
     # UI feedback if callback is provided
     if ui_callback and callable(ui_callback):
@@ -176,43 +387,20 @@ def handle_error(
 def generate_urls(year, competition_code):
     """
     Gera URLs para download de borderôs com base no ano e no código da competição,
-    considerando as regras de numeração específicas.
+    seguindo o esquema de numeração do registro de competições (config/competitions.json).
 
     Args:
         year (int): Ano dos jogos.
-        competition_code (str): Código da competição (142, 424, 242).
+        competition_code (str): Código da competição (ex.: 142, 424, 242).
 
     Returns:
-        list: Lista de URLs geradas.
-    """
-    urls = []
-    base_url = f"https://conteudo.cbf.com.br/sumulas/{year}/"
-
-    if competition_code == "142": # Série A - Rounds 1-38, Matches 0-9
-        for round_number in range(1, 39): # Rounds 1 to 38
-            for match_in_round in range(10): # Matches 0 to 9
-                match_id = f"{competition_code}{round_number}{match_in_round}"
-                url = f"{base_url}{match_id}b.pdf"
-                urls.append(url)
-
-    elif competition_code == "424": # Copa do Brasil - Sequential 1 to 150
-        for match_number in range(1, 151): # Matches 1 to 150
-            match_id = f"{competition_code}{match_number}"
-            url = f"{base_url}{match_id}b.pdf"
-            urls.append(url)
-
-    elif competition_code == "242": # Série B - Sequential 1 to 380
-        for match_number in range(1, 381): # Matches 1 to 380
-            match_id = f"{competition_code}{match_number}"
-            url = f"{base_url}{match_id}b.pdf"
-            urls.append(url)
+        list: Lista de URLs geradas, na ordem da tabela.
 
-    else:
-        logger = get_logger()
-        logger.warning("Unknown competition code", competition_code=competition_code)
-        raise ConfigurationError(f"Código de competição desconhecido ou não suportado: {competition_code}")
-
-    return urls
+    Raises:
+        ConfigurationError: Código ausente do registro.
+    """
+    from .competitions import get_competition # The registry module imports this one
+    return get_competition(competition_code).urls(year)
 
 def ensure_directory_exists(directory):
     """
@@ -0,0 +1,212 @@
+import os
+import re
+import json
+import datetime
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from .utils import get_logger
+from .db import read_csv
+from .pdf_store import PdfContentIndex
+from .competitions import load_competitions
+
+logger = get_logger("work_queue")
+
+QUEUE_FILE = ".extraction_queue.json"
+FILE_NAME = re.compile(r"^(\d{3})(\d+)b?_(\d{4})$")
+# Failures caused by the document (invalid extraction, unreadable model answer): the only ones that
+# count toward dead-lettering. Anything else (quota, api_error, ConfigurationError, network or disk
+# errors) is backed off without counting, so an outage or a bad key cannot dead-letter the backlog.
+DOCUMENT_ERRORS = {"validation", "parse_error"}
+# Failures that retrying cannot fix: dead-lettered on the first occurrence
+PERMANENT_ERRORS = {"not_pdf", "placeholder"}
+
+
+def match_recency(file_name: str) -> tuple:
+    """
+    (year, season round, match number) of a borderô file such as 14210b_2025.pdf.
+
+    The round is placed on a common 38-round scale using the competition registry, so round
+    30 of any competition beats round 29. Files that do not follow the CBF naming sort as the
+    oldest; competitions missing from the registry get round 0.
+    """
+    match = FILE_NAME.match(Path(file_name).stem)
+    if not match:
+        return (0, 0, 0)
+    code, number, year = match.group(1), int(match.group(2)), int(match.group(3))
+    competition = load_competitions().get(code)
+    return (year, competition.season_round(year, number) if competition else 0, number)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now().replace(microsecond=0)
+
+
+class ExtractionQueue:
+    """
+    Persistent priority and retry queue of PDFs waiting for extraction (<pdf_dir>/.extraction_queue.json).
+
+    Pending files are ordered by retry count (failed files go behind fresh ones), then match
+    recency (year, then round of the season, across competitions), then competition priority
+    (QUEUE_COMPETITION_PRIORITY, default COMPETITIONS) and match number. process_pdfs drains
+    it, so the GUI and the scheduler both pick up the newest matches first however large the
+    backlog is.
+
+    A failed file records its attempt count and last error class and is not handed out again
+    before next_attempt_at (RETRY_BASE_DELAY_SECONDS doubled per counted failure, capped at
+    RETRY_MAX_DELAY_SECONDS). After RETRY_MAX_ATTEMPTS failures caused by the document
+    (DOCUMENT_ERRORS), or one permanent failure (not a PDF, placeholder), it is dead-lettered:
+    kept out of routine runs until requeue(). Other failures only back off.
+    Everything survives restarts.
+    """
+
+    def __init__(self, pdf_dir: Path, competition_priority: Optional[List[str]] = None,
+                 max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None):
+        self.pdf_dir = Path(pdf_dir)
+        self.path = self.pdf_dir / QUEUE_FILE
+        priority = competition_priority or os.getenv("QUEUE_COMPETITION_PRIORITY", os.getenv("COMPETITIONS", "142,424,242")).split(",")
+        self.competition_rank = {code.strip(): rank for rank, code in enumerate(priority) if code.strip()}
+        self.max_attempts = max_attempts or int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv("RETRY_BASE_DELAY_SECONDS", "3600"))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv("RETRY_MAX_DELAY_SECONDS", str(7 * 24 * 3600)))
+        self._lock = threading.Lock()
+        self._items: Dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._items = json.load(f).get("items", {})
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable extraction queue, it will be rebuilt", path=str(self.path), error=str(e))
+
+    def priority(self, file_name: str) -> tuple:
+        """Sort key; smaller is drained first."""
+        year, season_round, number = match_recency(file_name)
+        rank = self.competition_rank.get(file_name[:3], len(self.competition_rank))
+        return (self._items.get(file_name, {}).get("retries", 0), -year, -season_round, rank, -number, file_name)
+
+    def sync(self, pdf_files: Iterable[Path], processed_ids: Set[str]) -> int:
+        """
+        Enqueues PDFs that are not processed yet and drops entries that were processed or deleted.
+
+        Returns:
+            int: Number of newly enqueued files.
+        """
+        now = _now().isoformat()
+        pending = {path.name for path in pdf_files if path.stem not in processed_ids}
+        with self._lock:
+            for name in list(self._items):
+                if name not in pending:
+                    del self._items[name]
+            added = [name for name in pending if name not in self._items]
+            for name in added:
+                self._items[name] = {"retries": 0, "enqueued_at": now}
+        return len(added)
+
+    def _due(self, item: dict, now: datetime.datetime) -> bool:
+        if item.get("dead"):
+            return False
+        next_attempt = item.get("next_attempt_at")
+        return not next_attempt or datetime.datetime.fromisoformat(next_attempt) <= now
+
+    def ordered(self, limit: Optional[int] = None, now: Optional[datetime.datetime] = None) -> List[str]:
+        """Due file names (not dead-lettered, backoff elapsed), highest priority first (the first limit of them)."""
+        now = now or _now()
+        with self._lock:
+            names = sorted((name for name, item in self._items.items() if self._due(item, now)), key=self.priority)
+        return names[:limit] if limit else names
+
+    def complete(self, file_name: str):
+        with self._lock:
+            self._items.pop(file_name, None)
+
+    def fail(self, file_name: str, error_class: Optional[str] = None, now: Optional[datetime.datetime] = None) -> dict:
+        """
+        Records a failed attempt and schedules the next one, or dead-letters the file.
+
+        Args:
+            error_class (str, optional): Error kind (utils.classify_error) or exception name.
+
+        Returns:
+            dict: The updated entry.
+        """
+        now = now or _now()
+        with self._lock:
+            item = self._items.setdefault(file_name, {"retries": 0})
+            item["attempts"] = item.get("attempts", 0) + 1
+            if error_class in DOCUMENT_ERRORS or error_class in PERMANENT_ERRORS:
+                item["retries"] = item.get("retries", 0) + 1
+            item["last_error_class"] = error_class
+            item["last_failed_at"] = now.isoformat()
+            if error_class in PERMANENT_ERRORS or item["retries"] >= self.max_attempts:
+                item["dead"] = True
+                item.pop("next_attempt_at", None)
+                logger.warning("PDF moved to dead letters", filename=file_name, attempts=item["attempts"],
+                               error_class=error_class)
+            else:
+                delay = min(self.max_delay, self.base_delay * 2 ** max(item["retries"] - 1, 0))
+                item["next_attempt_at"] = (now + datetime.timedelta(seconds=delay)).isoformat()
+            return dict(item)
+
+    def requeue(self, file_name: Optional[str] = None) -> List[str]:
+        """Makes dead-lettered/backed-off files (one, or all with None) due again with a fresh attempt count."""
+        with self._lock:
+            names = [file_name] if file_name else sorted(name for name, item in self._items.items()
+                                                         if item.get("dead") or item.get("next_attempt_at"))
+            requeued = []
+            for name in names:
+                item = self._items.get(name)
+                if item is None:
+                    continue
+                for key in ("dead", "next_attempt_at"):
+                    item.pop(key, None)
+                item["retries"] = 0
+                requeued.append(name)
+            return requeued
+
+    def dead_letters(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: dict(item) for name, item in self._items.items() if item.get("dead")}
+
+    def waiting(self, now: Optional[datetime.datetime] = None) -> Dict[str, dict]:
+        """Failed files still in their backoff window."""
+        now = now or _now()
+        with self._lock:
+            return {name: dict(item) for name, item in self._items.items()
+                    if not item.get("dead") and not self._due(item, now)}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def untried(self) -> int:
+        """Pending files that have not failed yet (the backlog a scheduler should keep draining)."""
+        with self._lock:
+            return sum(1 for item in self._items.values()
+                       if not item.get("retries") and not item.get("dead") and not item.get("next_attempt_at"))
+
+    def save(self):
+        with self._lock:
+            self.pdf_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"items": self._items}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+def due_for_extraction(pdf_dir: Path, jogos_resumo_csv: Path) -> int:
+    """
+    Number of PDFs process_pdfs would analyze now: not in jogos_resumo.csv, not a duplicate,
+    not backing off or dead-lettered. Syncs the content index and queue files on the way.
+    """
+    pdf_dir = Path(pdf_dir)
+    pdf_files = [f for f in pdf_dir.iterdir() if f.is_file() and f.suffix == ".pdf"]
+    processed_ids = {str(row["id_jogo_cbf"]) for row in read_csv(jogos_resumo_csv) if row.get("id_jogo_cbf")} \
+        if Path(jogos_resumo_csv).exists() else set()
+    content_index = PdfContentIndex(pdf_dir)
+    content_index.sync(pdf_files)
+    content_index.save()
+    work_queue = ExtractionQueue(pdf_dir)
+    work_queue.sync(pdf_files, processed_ids | {Path(name).stem for name in content_index.duplicates()})
+    work_queue.save()
+    return len(work_queue.ordered())
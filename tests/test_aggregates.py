@@ -0,0 +1,64 @@
+import csv
+from src.aggregates import update_rollups, rollup_path
+
+HEADER = ["id_jogo_cbf", "data_jogo", "time_mandante", "time_visitante", "estadio", "competicao",
+          "publico_total", "receita_bruta_total", "resultado_liquido"]
+
+
+def _write(path, rows, mode="w"):
+    with open(path, mode, encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        if mode == "w":
+            writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+def _groups(tables, role):
+    return {key: {k: round(v, 6) if isinstance(v, float) else v for k, v in group.items()}
+            for key, group in tables[role].groups.items()}
+
+
+def test_incremental_update_matches_full_rebuild(tmp_path):
+    clean = tmp_path / "jogos_resumo_clean.csv"
+    _write(clean, [["1", "2025-03-29", "Juventude", "Vitória", "", "Série A", "6547", "220000", "120647.23"],
+                   ["2", "2025-04-05", "Juventude", "Bahia", "", "Série A", "", "0", "-1000"]])
+    update_rollups(clean)
+    _write(clean, [["3", "2025-04-12", "Bahia", "Juventude", "", "Série A", "30000", "900000", "300000"],
+                   ["4", "", "Bahia", "Vitória", "", "Série A", "1", "1", "1"]], mode="a")
+    incremental = update_rollups(clean)
+
+    group = incremental["mandante"].groups[(2025, "Série A", "Juventude", 5)] # Both games on a Saturday
+    assert group["jogos"] == 2 and group["publico_jogos"] == 1
+    assert group["publico_total"] == 6547
+    assert round(group["ticket_medio_soma"], 4) == round(220000 / 6547, 4)
+    assert sum(g["jogos"] for g in incremental["visitante"].groups.values()) == 3 # Undated row skipped
+
+    (tmp_path / "agg_state.json").unlink()
+    rebuilt = update_rollups(clean)
+    assert _groups(incremental, "mandante") == _groups(rebuilt, "mandante")
+    assert _groups(incremental, "visitante") == _groups(rebuilt, "visitante")
+
+
+def test_rewritten_clean_csv_triggers_rebuild(tmp_path):
+    clean = tmp_path / "jogos_resumo_clean.csv"
+    _write(clean, [["1", "2025-03-29", "JUVENTUDE - RS", "Vitória", "", "Série A", "100", "1000", "10"]])
+    update_rollups(clean)
+    _write(clean, [["1", "2025-03-29", "Juventude", "Vitória", "", "Série A", "100", "1000", "10"]])
+
+    tables = update_rollups(clean)
+    assert [key[2] for key in tables["mandante"].groups] == ["Juventude"]
+    assert "JUVENTUDE - RS" not in rollup_path(clean, "mandante").read_text(encoding="utf-8")
+
+
+def test_held_lock_leaves_the_files_alone(tmp_path):
+    from src.run_lock import RunLock
+    clean = tmp_path / "jogos_resumo_clean.csv"
+    _write(clean, [["1", "2025-03-29", "Juventude", "Vitória", "", "Série A", "100", "1000", "10"]])
+    with RunLock(name="rollups", state_dir=tmp_path):
+        tables = update_rollups(clean) # Another process is writing: answer from memory only
+    assert tables["mandante"].groups[(2025, "Série A", "Juventude", 5)]["jogos"] == 1
+    assert not rollup_path(clean, "mandante").exists() and not (tmp_path / "agg_state.json").exists()
+
+    update_rollups(clean)
+    assert rollup_path(clean, "mandante").exists() and (tmp_path / "agg_state.json").exists()
+    assert not list(tmp_path.glob("*.tmp")) and not (tmp_path / "rollups.lock").exists()
@@ -0,0 +1,91 @@
+import threading
+from src.backfill import HistoricalRates, ThroughputBudget, parse_seasons, plan_backfill, run_backfill
+from src.utils import DownloadError
+
+
+def _touch(pdf_dir, *names):
+    for name in names:
+        (pdf_dir / name).write_bytes(b"%PDF-1.4\n" + b"x" * 91)
+
+
+def test_parse_seasons_accepts_ranges_and_lists():
+    assert parse_seasons("2020-2022") == [2022, 2021, 2020]
+    assert parse_seasons("2024, 2019-2020,2024") == [2024, 2020, 2019]
+
+
+def test_plan_estimates_missing_pdfs_from_history(tmp_path):
+    _touch(tmp_path, "42410b_2023.pdf", "42411b_2023.pdf")
+    rates = HistoricalRates({"424": 0.5}, {"424": 1000.0}, calls_per_pdf=1.5, cost_per_pdf=0.01)
+    chunks = plan_backfill([2023, 2022], ["424"], tmp_path, rates)
+
+    assert [(c["year"], c["present"], c["expected_pdfs"]) for c in chunks] == [(2023, 2, 75), (2022, 0, 75)]
+    assert chunks[1]["urls"] == 150
+    assert chunks[1]["expected_download_bytes"] == 75_000 and chunks[1]["expected_gemini_calls"] == 112
+
+
+def test_run_backfill_resumes_and_respects_budget(tmp_path):
+    pdf_dir, state_dir = tmp_path / "pdfs", tmp_path / "state"
+    pdf_dir.mkdir()
+    queue, downloads = [], []
+
+    def download(year, competition):
+        downloads.append((year, competition))
+        names = [f"{competition}{n}b_{year}.pdf" for n in range(1, 4)]
+        _touch(pdf_dir, *names)
+        queue.extend(names)
+
+    def analyze(n):
+        del queue[:n]
+        return []
+
+    kwargs = dict(download=download, analyze=analyze, pending=lambda: len(queue), batch_size=2, state_dir=str(state_dir))
+    first = run_backfill([2023, 2022], ["424"], pdf_dir, budget=ThroughputBudget(max_pdfs=4), **kwargs)
+    assert [c["status"] for c in first["chunks"]] == ["done", "downloaded"]
+    assert first["analyzed_pdfs"] == 4 and len(queue) == 2
+
+    # Same seasons again: the finished chunk and the finished download are not repeated
+    second = run_backfill([2023, 2022], ["424"], pdf_dir, **kwargs)
+    assert downloads == [(2023, "424"), (2022, "424")]
+    assert [c["status"] for c in second["chunks"]] == ["done", "done"] and second["analyzed_pdfs"] == 6
+
+    cancelled = threading.Event()
+    cancelled.set()
+    third = run_backfill([2021], ["424"], pdf_dir, cancel_event=cancelled, **kwargs)
+    assert third["chunks"][0]["status"] == "pending" and downloads[-1] == (2022, "424")
+
+
+def test_failed_downloads_leave_the_chunk_retryable(tmp_path):
+    pdf_dir, state_dir = tmp_path / "pdfs", tmp_path / "state"
+    pdf_dir.mkdir()
+    attempts = []
+
+    def download(year, competition):
+        attempts.append(year)
+        if len(attempts) == 1:
+            raise DownloadError("Falha no download")
+        # Second chunk: returns normally but nothing reached the disk (site down, unknown season)
+
+    kwargs = dict(download=download, analyze=lambda n: [], pending=lambda: 0, state_dir=str(state_dir))
+    first = run_backfill([2023, 2022], ["424"], pdf_dir, **kwargs)
+    assert [c["status"] for c in first["chunks"]] == ["error", "error"]
+
+    download = lambda year, competition: _touch(pdf_dir, f"424{year % 100}b_{year}.pdf")
+    second = run_backfill([2023, 2022], ["424"], pdf_dir, **{**kwargs, "download": download})
+    assert [c["status"] for c in second["chunks"]] == ["done", "done"]
+    assert "error" not in second["chunks"][0]
+
+
+def test_analysis_that_consumes_nothing_stops_the_run(tmp_path):
+    pdf_dir, state_dir = tmp_path / "pdfs", tmp_path / "state"
+    pdf_dir.mkdir()
+    calls = []
+
+    def analyze(n):
+        calls.append(n) # Fails before touching the queue, like run_operation without an API key
+        return []
+
+    download = lambda year, competition: _touch(pdf_dir, f"424{year % 100}b_{year}.pdf")
+    result = run_backfill([2023, 2022], ["424"], pdf_dir, download=download, analyze=analyze,
+                          pending=lambda: 3, state_dir=str(state_dir))
+    assert len(calls) == 1
+    assert [c["status"] for c in result["chunks"]] == ["error", "pending"]
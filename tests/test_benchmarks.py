@@ -0,0 +1,32 @@
+from benchmarks.corpus import match_extract, render_pdf, embedded_extract, plan_matches
+from benchmarks.fake_services import FakeCBFServer, FakeGeminiServer
+from benchmarks.pipeline import compare
+from src.gemini import check_extract_consistency
+
+
+def test_synthetic_borderos_are_consistent_and_round_trip():
+    extract = match_extract("14210b", 2025)
+    assert check_extract_consistency(extract) == []
+    assert embedded_extract(render_pdf(extract)) == extract
+    assert sum(380 if code != "424" else 150 for _, code in plan_matches(1000)) >= 1000
+
+
+def test_fake_services_behind_the_real_clients(tmp_path, monkeypatch):
+    with FakeCBFServer(missing_rate=0.2) as cbf, FakeGeminiServer() as gemini:
+        monkeypatch.setenv("CBF_BASE_URL", cbf.sumulas_url)
+        monkeypatch.setenv("GEMINI_BASE_URL", gemini.base_url)
+        monkeypatch.setenv("GEMINI_API_KEY", "test_key")
+        monkeypatch.setenv("GEMINI_MODEL_TIERS", "test-model")
+        from src.scraper import download_pdfs
+        from src.gemini import analyze_pdf
+
+        files = download_pdfs(2025, "424", str(tmp_path), max_workers=4)
+        assert cbf.requests == 150 and 0 < len(files) < 150 # Missing matches answer 404
+        pdf_bytes = open(files[0], "rb").read()
+        assert analyze_pdf(pdf_bytes, competition="424") == embedded_extract(pdf_bytes)
+
+
+def test_compare_flags_throughput_drops():
+    baseline = {"results": {"1000": {"process": {"items_per_s": 100.0}, "dashboard": {"items_per_s": 1000.0}}}}
+    current = {"results": {"1000": {"process": {"items_per_s": 70.0}, "dashboard": {"items_per_s": 950.0}}}}
+    assert compare(current, baseline, threshold=0.2) == ["1000 process: 100.0 -> 70.0 items/s (-30%)"]
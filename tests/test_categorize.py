@@ -0,0 +1,46 @@
+import csv
+from src.categorize import LineItemClassifier, categorize_csv
+
+
+def test_ticket_rules_fold_homoglyphs_and_prioritise(tmp_path):
+    classifier = LineItemClassifier("ticket", tmp_path)
+    assert classifier.classify("DESCOBERTA ARQUIBANCADA - ΜΕΙΑ") == "Meia-entrada"
+    assert classifier.classify("Cadeira Sul Sócio Futebol") == "Sócio-torcedor"
+    assert classifier.classify("CORTESIA DIVERSOS - CRIANÇAS - INTEIRA") == "Cortesia"
+    assert classifier.classify("SETOR VIP") is None
+
+
+def test_unknown_items_use_gemini_once_and_are_cached(tmp_path, mocker):
+    gemini = mocker.patch("src.categorize.call_gemini_for_buckets", return_value={"SETOR VIP": "Inteira"})
+    detail = tmp_path / "receitas_detalhe.csv"
+    with open(detail, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id_jogo_cbf", "source", "quantity", "price", "amount"])
+        writer.writerows([["1", "SETOR VIP", "10", "100", "1000"],
+                          ["1", "SETOR VIP", "5", "100", "500"],
+                          ["1", "ARQUIBANCADA - INTEIRA", "10", "50", "500"]])
+
+    aggregates = categorize_csv(detail, tmp_path / "clean.csv", LineItemClassifier("ticket", tmp_path), "key")
+    assert aggregates["Inteira"] == {"rows": 3, "amount": 2000.0}
+    assert gemini.call_count == 1
+
+    categorize_csv(detail, tmp_path / "clean.csv", LineItemClassifier("ticket", tmp_path), "key")
+    assert gemini.call_count == 1
+    with open(tmp_path / "clean.csv", encoding="utf-8") as f:
+        assert [row["tipo_ingresso"] for row in csv.DictReader(f)] == ["Inteira"] * 3
+
+
+def test_failed_gemini_calls_are_not_cached(tmp_path, mocker):
+    gemini = mocker.patch("src.categorize.call_gemini_for_buckets", return_value={}) # Network/quota error
+    classifier = LineItemClassifier("expense", tmp_path)
+    assert classifier.classify("TAXA DE LIMPEZA URBANA") == "Estádio e operação"
+    assert classifier.classify("TAXA BANCARIA") is None # "TAXA" alone is not a federation fee
+    assert classifier.classify("TAXA DA CONFEDERAÇÃO") == "Federação e CBF"
+    assert LineItemClassifier("ticket", tmp_path).classify("SETOR 50") is None
+
+    classifier.resolve_unknown(["TAXA BANCARIA", "CAFE"], "key")
+    assert classifier.classify("TAXA BANCARIA") is None and not (tmp_path / "expense_types_lookup.json").exists()
+
+    gemini.return_value = {"CAFE": "Estádio e operação"} # Partial answer
+    classifier.resolve_unknown(["TAXA BANCARIA", "CAFE"], "key")
+    assert classifier.classify("CAFE") == "Estádio e operação" and classifier.classify("TAXA BANCARIA") is None
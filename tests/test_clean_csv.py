@@ -0,0 +1,85 @@
+import csv
+import json
+from src.normalize import write_clean_csv, CleanCsvSync, get_lookup_store
+
+HEADER = ["id_jogo_cbf", "data_jogo", "time_mandante", "time_visitante", "estadio", "competicao"]
+
+
+def _write_raw(path, rows, mode="w"):
+    with open(path, mode, encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        if mode == "w":
+            writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+def _read(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+def _lookups(lookup_dir, teams):
+    lookup_dir.mkdir(exist_ok=True)
+    (lookup_dir / "teams_lookup.json").write_text(json.dumps(teams), encoding="utf-8")
+
+
+def test_incremental_appends_only_new_rows(tmp_path):
+    raw, clean, lookup_dir = tmp_path / "raw.csv", tmp_path / "clean.csv", tmp_path / "lookups"
+    _lookups(lookup_dir, {"FLAMENGO - RJ": "Flamengo", "BAHIA - BA": "Bahia"})
+    _write_raw(raw, [["1", "2025-01-01", "FLAMENGO - RJ", "BAHIA - BA", "MARACANA", "SERIE A"]])
+    write_clean_csv(raw, clean, lookup_dir, incremental=True)
+
+    _write_raw(raw, [["2", "2025-01-08", "BAHIA - BA", "FLAMENGO - RJ", "FONTE NOVA", "SERIE A"]], mode="a")
+    write_clean_csv(raw, clean, lookup_dir, incremental=True)
+
+    rows = _read(clean)
+    assert rows[0] == HEADER
+    assert [r[:4] for r in rows[1:]] == [["1", "2025-01-01", "Flamengo", "Bahia"],
+                                         ["2", "2025-01-08", "Bahia", "Flamengo"]]
+
+
+def test_changed_lookup_entry_remaps_dependent_rows(tmp_path):
+    raw, clean, lookup_dir = tmp_path / "raw.csv", tmp_path / "clean.csv", tmp_path / "lookups"
+    _lookups(lookup_dir, {"FLAMENGO - RJ": "Flamengo"})
+    _write_raw(raw, [["1", "d", "FLAMENGO - RJ", "BAHIA - BA", "", ""],
+                     ["2", "d", "VASCO - RJ", "FLAMENGO - RJ", "", ""]])
+    write_clean_csv(raw, clean, lookup_dir, incremental=True)
+
+    _lookups(lookup_dir, {"FLAMENGO - RJ": "Flamengo", "BAHIA - BA": "Bahia"})
+    write_clean_csv(raw, clean, lookup_dir, incremental=True)
+
+    incremental_rows = _read(clean)
+    assert incremental_rows[1][2:4] == ["Flamengo", "Bahia"]
+    write_clean_csv(raw, tmp_path / "full.csv", lookup_dir)
+    assert incremental_rows == _read(tmp_path / "full.csv")
+
+
+def test_sync_session_appends_per_match_and_queues_unknown_names(tmp_path):
+    raw, clean, lookup_dir = tmp_path / "raw.csv", tmp_path / "clean.csv", tmp_path / "lookups"
+    _lookups(lookup_dir, {"FLAMENGO - RJ": "Flamengo"})
+    with CleanCsvSync(raw, clean, lookup_dir) as clean_sync:
+        _write_raw(raw, [["1", "d", "FLAMENGO - RJ", "BAHIA - BA", "", ""]])
+        assert clean_sync.sync() == 1
+        assert _read(clean)[1][2:4] == ["Flamengo", "BAHIA - BA"]
+
+        # A lookup entry added mid-session (background resolution) re-maps the committed row
+        get_lookup_store(lookup_dir).update("teams", {"BAHIA - BA": "Bahia"})
+        _write_raw(raw, [["2", "d", "BAHIA - BA", "FLAMENGO - RJ", "", ""]], mode="a")
+        assert clean_sync.sync() == 1
+
+    assert [r[2:4] for r in _read(clean)[1:]] == [["Flamengo", "Bahia"], ["Bahia", "Flamengo"]]
+    pending = json.loads((lookup_dir / "pending_names.json").read_text(encoding="utf-8"))
+    assert pending == {"teams": ["BAHIA - BA"]}
+
+
+def test_raw_csv_rewritten_in_place_triggers_full_rewrite(tmp_path):
+    raw, clean, lookup_dir = tmp_path / "raw.csv", tmp_path / "clean.csv", tmp_path / "lookups"
+    _lookups(lookup_dir, {"FLAMENGO - RJ": "Flamengo", "BAHIA - BA": "Bahia"})
+    _write_raw(raw, [["1", "2025-01-01", "FLAMENGO - RJ", "BAHIA - BA", "", ""]])
+    write_clean_csv(raw, clean, lookup_dir, incremental=True)
+
+    # Same size, corrected row, then a new one appended: the prefix digest no longer matches
+    _write_raw(raw, [["1", "2025-01-01", "BAHIA - BA", "FLAMENGO - RJ", "", ""],
+                     ["2", "2025-01-08", "FLAMENGO - RJ", "BAHIA - BA", "", ""]])
+    write_clean_csv(raw, clean, lookup_dir, incremental=True)
+    assert [r[2:4] for r in _read(clean)[1:]] == [["Bahia", "Flamengo"], ["Flamengo", "Bahia"]]
@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import socket
+import argparse
+import pytest
+from src.cli import run_once, ConsoleNotifier
+from src.run_lock import RunLock
+from src.utils import OperationInProgressError
+
+SETTINGS = {"competitions": ["142"], "pdf_dir": "pdfs", "csv_dir": "csv", "gemini_api_key": "test_key"}
+
+
+def _args(**kwargs):
+    defaults = {"year": 2025, "quiet": True, "download_workers": 2, "profile": False, "batch_size": 0}
+    return argparse.Namespace(**{**defaults, **kwargs})
+
+
+def test_run_lock_rejects_second_holder_and_takes_over_stale(tmp_path):
+    with RunLock(state_dir=tmp_path):
+        with pytest.raises(OperationInProgressError):
+            RunLock(state_dir=tmp_path).acquire()
+    assert not (tmp_path / "run.lock").exists()
+
+    # Left behind by a process that no longer exists on this host
+    (tmp_path / "run.lock").write_text(json.dumps({"pid": 2 ** 22 + 1, "host": socket.gethostname(), "started_at": 0}))
+    with RunLock(state_dir=tmp_path, stale_after=10 ** 12) as lock:
+        assert json.loads(lock.path.read_text())["host"] == socket.gethostname()
+
+
+def test_run_lock_keeps_live_and_half_written_locks(tmp_path):
+    # A live holder on this host keeps the lock however old it is
+    (tmp_path / "run.lock").write_text(json.dumps({"pid": os.getpid(), "host": socket.gethostname(), "started_at": 0}))
+    with pytest.raises(OperationInProgressError):
+        RunLock(state_dir=tmp_path, stale_after=1).acquire()
+    # Another host's lock only expires with age
+    (tmp_path / "run.lock").write_text(json.dumps({"pid": 1, "host": "elsewhere", "started_at": time.time()}))
+    with pytest.raises(OperationInProgressError):
+        RunLock(state_dir=tmp_path).acquire()
+    with RunLock(state_dir=tmp_path, stale_after=0):
+        pass
+
+    # Empty file: another process is still writing it, unless it is older than the grace period
+    (tmp_path / "run.lock").write_text("")
+    with pytest.raises(OperationInProgressError):
+        RunLock(state_dir=tmp_path).acquire()
+    with RunLock(state_dir=tmp_path, grace=-1):
+        pass
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stale_takeover_does_not_remove_a_fresh_lock(tmp_path):
+    dead = json.dumps({"pid": 2 ** 22 + 1, "host": socket.gethostname(), "started_at": 0})
+    (tmp_path / "run.lock").write_text(dead)
+    first, second = RunLock(state_dir=tmp_path), RunLock(state_dir=tmp_path)
+    # Both judged the dead owner stale; the first took over and now holds a fresh lock
+    assert first._take_over(dead)
+    first.acquire()
+    assert not second._take_over(dead)
+    assert json.loads((tmp_path / "run.lock").read_text())["pid"] == os.getpid()
+    first.release()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_run_once_exit_codes(tmp_path, mocker, monkeypatch):
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    run_operation = mocker.patch("src.cli.run_operation", return_value=[])
+    assert run_once("full", _args(), SETTINGS) == 0
+    assert run_operation.call_args.kwargs["download_workers"] == 2
+    assert run_operation.call_args.args[0] == "3"
+
+    run_operation.return_value = ["pdfs/broken.pdf"]
+    assert run_once("process", _args(), SETTINGS) == 1
+
+    def failing(*args, notifier: ConsoleNotifier, **kwargs):
+        notifier.showerror("Erro", "falhou")
+        return []
+    run_operation.side_effect = failing
+    assert run_once("download", _args(), SETTINGS) == 1
+
+    with RunLock(state_dir=tmp_path):
+        assert run_once("full", _args(), SETTINGS) == 2
+
+
+def test_windows_liveness_uses_process_handles(monkeypatch):
+    import ctypes
+    from src import run_lock
+
+    class Kernel32:
+        def __init__(self, exit_code):
+            self.exit_code = exit_code
+
+        def OpenProcess(self, access, inherit, pid):
+            return 0 if pid == 404 else 1
+
+        def GetExitCodeProcess(self, handle, code):
+            code._obj.value = self.exit_code
+            return 1
+
+        def CloseHandle(self, handle):
+            return 1
+
+    monkeypatch.setattr(ctypes, "get_last_error", lambda: 87, raising=False) # ERROR_INVALID_PARAMETER: no such pid
+    for exit_code, alive in ((run_lock.STILL_ACTIVE, True), (0, False)):
+        monkeypatch.setattr(ctypes, "WinDLL", lambda name, **kwargs: Kernel32(exit_code), raising=False)
+        assert run_lock._pid_alive_windows(1234) is alive
+    assert run_lock._pid_alive_windows(404) is False
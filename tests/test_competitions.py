@@ -0,0 +1,63 @@
+import json
+import pytest
+from src import scraper
+from src.competitions import get_competition, load_competitions
+from src.utils import generate_urls, ConfigurationError
+
+
+def test_registry_generates_tight_url_sets(monkeypatch):
+    monkeypatch.setenv("CBF_BASE_URL", "https://cbf.test/sumulas/")
+    serie_a = generate_urls(2025, "142")
+    assert len(serie_a) == 380
+    assert serie_a[0] == "https://cbf.test/sumulas/2025/14210b.pdf" and serie_a[-1].endswith("/142389b.pdf")
+    assert len(generate_urls(2024, "424")) == 122 and len(generate_urls(2025, "424")) == 150
+    assert get_competition("142").season_round(2025, 389) == 38
+    with pytest.raises(ConfigurationError):
+        generate_urls(2025, "999")
+
+
+def test_new_competitions_come_from_the_registry_file(tmp_path, monkeypatch):
+    registry = tmp_path / "competitions.json"
+    registry.write_text(json.dumps({"611": {"name": "Paulistão", "scheme": "round_match", "rounds": 12,
+                                            "matches_per_round": 8, "seasons": {"2024": 90}}}))
+    monkeypatch.setenv("COMPETITIONS_FILE", str(registry))
+    assert list(load_competitions()) == ["611"]
+    urls = generate_urls(2025, "611")
+    assert len(urls) == 96 and urls[8].endswith("/61120b.pdf")
+    assert len(generate_urls(2024, "611")) == 90
+
+    registry.write_text(json.dumps({"611": {"scheme": "knockout"}}))
+    with pytest.raises(ConfigurationError):
+        load_competitions()
+
+
+def test_download_stops_after_consecutive_misses(tmp_path, monkeypatch):
+    registry = tmp_path / "competitions.json"
+    registry.write_text(json.dumps({"242": {"matches": 380, "stop_after_misses": 5}}))
+    monkeypatch.setenv("COMPETITIONS_FILE", str(registry))
+    requested = []
+
+    def fake_download(url, year, competition_code, download_dir, logger, content_index=None, failures=None):
+        requested.append(url)
+        number = int(url.rsplit("/", 1)[1][3:-5])
+        if number <= 12 and number not in (3, 4):
+            return f"{download_dir}/{number}.pdf"
+        failures[url] = "error" if 13 <= number <= 22 else "not_found" # Timeouts/5xx, then unplayed matches
+        return None
+
+    monkeypatch.setattr(scraper, "_download_single_pdf", fake_download)
+    files = scraper.download_pdfs(2025, "242", str(tmp_path / "pdfs"), max_workers=2)
+    assert len(files) == 10 # 1-2 and 5-12; the gap of two does not stop the walk
+    # Ten transient failures in a row do not count as misses; 23-27 do, checked per window of 5
+    assert len(requested) == 30
+
+
+def test_only_not_found_answers_are_misses(tmp_path):
+    from benchmarks.fake_services import FakeCBFServer
+    failures = {}
+    with FakeCBFServer(missing_rate=1.0) as cbf:
+        url = f"{cbf.sumulas_url.rstrip('/')}/2025/2421b.pdf"
+        assert scraper._download_single_pdf(url, 2025, "242", str(tmp_path), scraper.get_logger("test"), None, failures) is None
+        unreachable = "http://127.0.0.1:9/sumulas/2025/2422b.pdf" # Connection refused: transient
+        scraper._download_single_pdf(unreachable, 2025, "242", str(tmp_path), scraper.get_logger("test"), None, failures)
+    assert failures == {url: "not_found", unreachable: "error"}
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from src.dashboard_data import (mascara_categoria, posicoes_filtradas, selecao_normalizada, fatia_pagina,
+                                preparar_detalhe, detalhe_do_jogo, totais_do_clube, totais_da_categoria)
+
+
+def _jogos():
+    return pd.DataFrame({
+        "id_jogo_cbf": ["1", "2", "3", "4"],
+        "data_jogo": pd.to_datetime(["2025-04-01", "2025-04-02", "2025-04-03", "2026-01-01"]),
+        "competicao": pd.Categorical(["Série A", None, "Série B", "Série A"]),
+        "time_mandante": pd.Categorical(["Bahia", "Bahia", np.nan, "Santos"]),
+        "time_visitante": pd.Categorical(["Santos", "Vitória", "Bahia", "Bahia"]),
+    })
+
+
+def test_filters_drop_empty_cells_and_unknown_values():
+    data = _jogos()
+    assert list(mascara_categoria(data["competicao"], None)) == [True, False, True, True]
+    # An unknown value maps to -1, the NaN code: it must not bring the empty cells back
+    assert list(mascara_categoria(data["competicao"], ["Série B", "Copa"])) == [False, False, True, False]
+    assert not mascara_categoria(data["competicao"], ["Copa"]).any()
+
+    inicio, fim = pd.Timestamp("2025-01-01"), pd.Timestamp("2025-12-31")
+    # Full selection (None) counts the same rows as isin over every option, as the rollups do
+    opcoes = data["competicao"].dropna().unique().tolist()
+    assert selecao_normalizada(opcoes, opcoes) is None and selecao_normalizada(["Série A"], opcoes) == ("Série A",)
+    assert list(posicoes_filtradas(data, inicio, fim)) == [0]
+    assert list(posicoes_filtradas(data, inicio, fim, competicoes=("Série A", "Série B"))) == [0]
+    assert list(posicoes_filtradas(data, inicio, pd.Timestamp("2026-12-31"), visitantes=("Bahia",))) == [3]
+
+
+def test_pages_are_clamped_to_the_data():
+    data = pd.DataFrame({"x": range(7)})
+    pagina, total = fatia_pagina(data, 2, 3)
+    assert total == 3 and list(pagina["x"]) == [3, 4, 5]
+    assert list(fatia_pagina(data, 9, 3)[0]["x"]) == [6]
+    assert fatia_pagina(data.iloc[0:0], 1, 50)[1] == 1
+
+
+def test_drill_down_frames():
+    itens = pd.DataFrame({"id_jogo_cbf": ["4", "1", "1", "2"], "category": ["Arbitragem", "Arbitragem", "INSS", "INSS"],
+                          "amount": [10.0, 20.0, 5.0, 7.0]})
+    detalhe, totais = preparar_detalhe(itens, "category")
+    assert list(detalhe.index) == ["1", "1", "2", "4"] and str(detalhe["category"].dtype) == "category"
+    assert list(detalhe_do_jogo(detalhe, "1")["amount"]) == [20.0, 5.0] and detalhe_do_jogo(detalhe, "9").empty
+
+    jogos = _jogos().set_index("id_jogo_cbf")
+    filtrados = totais[totais.index.isin(["1", "2", "4"])]
+    por_tipo = totais_do_clube(filtrados, jogos, "Bahia", "category")
+    assert por_tipo.loc["Arbitragem", "valor"] == 20.0 and por_tipo.loc["INSS", "linhas"] == 2
+    assert por_tipo.loc["INSS", "valor_medio_por_jogo"] == 6.0 # Two Bahia home matches
+    assert totais_da_categoria(filtrados, jogos, "Arbitragem", "category").to_dict() == {"Bahia": 20.0, "Santos": 10.0}
@@ -0,0 +1,46 @@
+import os
+import pandas as pd
+from src.dataset import MatchDataset
+
+HEADER = "id_jogo_cbf,data_jogo,time_mandante,time_visitante,estadio,competicao,publico_total,receita_bruta_total,resultado_liquido\n"
+ROW_1 = "1,2025-03-29,Juventude,Vitória,Alfredo Jaconi,Série A,6547,220000.0,120647.23\n"
+ROW_2 = "2,2025-04-06,Fluminense,Bahia,Maracanã,Série A,0,1000.0,-10.0\n"
+ROW_3 = "3,2025-04-07,Bahia,Juventude,Fonte Nova,Série A,100,500.0,5.0\n"
+
+
+def test_append_parses_only_new_rows(tmp_path, mocker):
+    path = tmp_path / "clean.csv"
+    path.write_text(HEADER + ROW_1, encoding="utf-8")
+    dataset = MatchDataset(path)
+    first = dataset.load()
+    assert dataset.load() is first # Unchanged file: cached frame
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(ROW_2 + ROW_3[:10]) # Last line still being written
+    full_load = mocker.spy(dataset, "_full_load")
+    data = dataset.load()
+    assert full_load.call_count == 0
+    assert list(data["id_jogo_cbf"].astype(str)) == ["1", "2"]
+    assert data.loc[1, "ticket_medio"] == 0 # No public
+    assert str(data["time_mandante"].dtype) == "category"
+    assert str(data["publico_total"].dtype) == "Int32" and str(data["ticket_medio"].dtype) == "float32"
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(ROW_3[10:])
+    data = dataset.load()
+    assert list(data["dia_semana"]) == [5, 6, 0]
+    assert list(data["dia_semana_pt"]) == ["Sábado", "Domingo", "Segunda-feira"]
+    pd.testing.assert_frame_equal(data, MatchDataset(path).load(), check_categorical=False)
+
+
+def test_replaced_file_is_fully_reloaded(tmp_path):
+    path = tmp_path / "clean.csv"
+    path.write_text(HEADER + ROW_1 + ROW_2, encoding="utf-8")
+    dataset = MatchDataset(path)
+    dataset.load()
+
+    tmp = tmp_path / "clean.csv.tmp"
+    tmp.write_text(HEADER + ROW_1.replace("Juventude", "EC Juventude") + ROW_2 + ROW_3, encoding="utf-8")
+    os.replace(tmp, path)
+    data = dataset.load()
+    assert list(data["time_mandante"]) == ["EC Juventude", "Fluminense", "Bahia"]
@@ -0,0 +1,35 @@
+import pytest
+from src.utils import (
+    handle_error, classify_error, error_stats,
+    DownloadError, APIError, DataValidationError
+)
+
+
+def test_classify_expected_errors():
+    assert classify_error(DownloadError("Failed", {"status_code": 404})) == "not_found"
+    assert classify_error(FileNotFoundError("x.pdf")) == "not_found"
+    assert classify_error(APIError("429 RESOURCE_EXHAUSTED: quota exceeded")) == "quota"
+    assert classify_error(DataValidationError("Summary data validation failed", {"errors": []})) == "validation"
+    # A match id containing 429 is not a rate limit, and a CSV I/O failure is not a validation error
+    assert classify_error(DownloadError("Failed to download .../42429b.pdf: 500", {"status_code": 500})) is None
+    assert classify_error(DataValidationError("I/O error reading CSV file", {"file_path": "x.csv"})) is None
+
+
+def test_expected_errors_skip_traceback_and_are_counted(mocker):
+    error_stats.reset()
+    format_exception = mocker.spy(__import__("traceback"), "format_exception")
+    for _ in range(3):
+        details = handle_error(DownloadError("Failed to download", {"status_code": 404}), {"url": "u"}, log_level="warning")
+    assert details["error_kind"] == "not_found" and details["traceback"] is None
+    assert format_exception.call_count == 0
+
+    try:
+        raise ValueError("boom")
+    except ValueError as e:
+        details = handle_error(e)
+    assert details["error_kind"] == "unexpected" and "ValueError: boom" in details["traceback"]
+
+    rows = error_stats.snapshot()
+    assert [(r["kind"], r["error_type"], r["count"]) for r in rows] == [("not_found", "DownloadError", 3), ("unexpected", "ValueError", 1)]
+    assert "not_found" in error_stats.table().splitlines()[2]
+    error_stats.reset()
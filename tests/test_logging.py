@@ -0,0 +1,31 @@
+import pytest
+import structlog
+from src.utils import EventSampler, PayloadTruncator
+
+
+def test_sampler_keeps_first_and_every_nth_event():
+    sampler = EventSampler({"Skipping processed PDF": 3, "rare": 1})
+    kept = []
+    for i in range(7):
+        try:
+            kept.append(sampler(None, "info", {"event": "Skipping processed PDF", "i": i}))
+        except structlog.DropEvent:
+            pass
+    assert [e["i"] for e in kept] == [0, 3, 6]
+    assert kept[0]["sampled"] == 3
+    assert sampler(None, "info", {"event": "rare"}) == {"event": "rare"} # Rate 1 means no sampling
+
+
+def test_sampler_rates_from_env(monkeypatch):
+    monkeypatch.setenv("LOG_SAMPLE_EVENTS", "File already exists:10, bad, Other:x")
+    assert EventSampler.from_env().rates == {"File already exists": 10}
+
+
+def test_truncator_caps_strings_and_collections():
+    truncator = PayloadTruncator(max_chars=5, max_items=2)
+    event = truncator(None, "info", {
+        "event": "Prompt", "prompt": "abcdefgh", "names": ["a", "b", "c"], "mapping": {"x": "1234567", "y": 1, "z": 2},
+    })
+    assert event["prompt"] == "abcde... [+3 chars]"
+    assert event["names"] == ["a", "b", "... +1 items"]
+    assert event["mapping"] == {"x": "12345... [+2 chars]", "y": 1, "...": "+1 items"}
@@ -0,0 +1,24 @@
+import json
+from src.lookup_store import LookupStore, get_lookup_store
+
+
+def test_store_lookups_aliases_and_versioned_save(tmp_path):
+    (tmp_path / "teams_lookup.json").write_text(json.dumps({"FLAMENGO - RJ": "Flamengo"}), encoding="utf-8")
+    store = LookupStore(tmp_path)
+    assert store.get("teams", "FLAMENGO - RJ") == "Flamengo"
+    assert store.canonical("teams", "ΒΑΗΙΑ") == "BAHIA"
+
+    store.update("teams", {"Flamengo (RJ)": "Flamengo"})
+    store.save()
+    assert sorted(store.aliases("teams", "Flamengo")) == ["FLAMENGO - RJ", "Flamengo (RJ)"]
+    assert store.version("teams") == 1
+    snapshot = tmp_path / "snapshots" / "teams_lookup.v1.json"
+    assert json.loads(snapshot.read_text(encoding="utf-8"))["Flamengo (RJ)"] == "Flamengo"
+    assert LookupStore(tmp_path).version("teams") == 1
+
+
+def test_shared_store_picks_up_external_changes(tmp_path):
+    store = get_lookup_store(tmp_path)
+    assert get_lookup_store(tmp_path) is store
+    (tmp_path / "stadiums_lookup.json").write_text(json.dumps({"MARACANA": "Maracanã"}), encoding="utf-8")
+    assert get_lookup_store(tmp_path).get("stadiums", "MARACANA") == "Maracanã"
@@ -0,0 +1,38 @@
+from src.matching import NameMatcher, fold_name, candidate_context
+
+TEAMS = {
+    "CRUZEIRO SAF - MG": "Cruzeiro",
+    "BOTAFOGO - SP": "Botafogo-SP",
+    "BOTAFOGO - RJ": "Botafogo",
+    "RED BULL BRAGANTINO - SP": "Red Bull Bragantino",
+    "RIO BRANCO A. C. SAF - ES": "Rio Branco-ES",
+}
+
+
+def test_fold_name_strips_noise_and_state():
+    assert fold_name("Coritiba SAF (PR)", "teams") == ("CORITIBA", "PR")
+    assert fold_name("ALFREDO JACONI - CAXIAS DO SUL - RS", "stadiums") == ("ALFREDO JACONI", "RS")
+    assert fold_name("CAMPEONATO BRASILEIRO SÉRIE A 2025", "competitions").core == "CAMPEONATO BRASILEIRO SERIE A"
+
+
+def test_new_variants_resolve_locally():
+    matcher = NameMatcher(TEAMS, "teams")
+    assert matcher.match("Cruzeiro (MG)").canonical == "Cruzeiro"
+    assert matcher.match("RED BULL BRAGANTIΙΝΟ").canonical == "Red Bull Bragantino"
+    assert matcher.match("Botafogo FC (SP)").canonical == "Botafogo-SP"
+
+
+def test_ambiguous_names_are_escalated_with_candidates():
+    matcher = NameMatcher(TEAMS, "teams")
+    resolved, ambiguous = matcher.resolve(["BOTAFOGO", "RIO BRANCO - AC"])
+    assert resolved == {}
+    assert set(ambiguous) == {"BOTAFOGO", "RIO BRANCO - AC"}
+    context = candidate_context(ambiguous, TEAMS)
+    assert context["BOTAFOGO - SP"] == "Botafogo-SP"
+
+
+def test_competition_series_letter_must_match():
+    lookup = {"CAMPEONATO BRASILEIRO SÉRIE A": "Campeonato Brasileiro Série A"}
+    matcher = NameMatcher(lookup, "competitions")
+    assert matcher.match("CAMPEONATO BRASILEIRO SÉRIE A 2026").canonical == "Campeonato Brasileiro Série A"
+    assert matcher.match("CAMPEONATO BRASILEIRO SÉRIE B").canonical is None
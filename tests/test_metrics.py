@@ -0,0 +1,42 @@
+import json
+import pytest
+from src.metrics import PipelineMetrics, size_bucket, export_metrics, pipeline_metrics
+
+
+def test_size_buckets():
+    assert size_bucket(None) == "unknown"
+    assert size_bucket(100 * 1024) == "lt_256k"
+    assert size_bucket(512 * 1024) == "256k_1m"
+    assert size_bucket(10 * 1024 * 1024) == "ge_4m"
+
+
+def test_summary_and_prometheus_rendering():
+    metrics = PipelineMetrics()
+    metrics.observe("analyze", 2.0, competition="142", size_bytes=300 * 1024)
+    metrics.observe("analyze", 4.0, competition="424", size_bytes=300 * 1024)
+    with pytest.raises(ValueError):
+        with metrics.timer("csv_write", competition="142"):
+            raise ValueError("disk full")
+
+    summary = {row["stage"]: row for row in metrics.summary()}
+    assert summary["analyze"]["count"] == 2 and summary["analyze"]["total_s"] == 6.0
+    assert summary["analyze"]["p95_s"] == 5.0 and summary["analyze"]["max_s"] == 4.0
+    assert summary["csv_write"]["errors"] == 1
+    assert metrics.summary()[0]["stage"] == "analyze" # Slowest stage first
+
+    text = metrics.to_prometheus()
+    labels = 'stage="analyze",competition="142",size_bucket="256k_1m",outcome="ok"'
+    assert f'cbf_robot_stage_duration_seconds_bucket{{{labels},le="1.0"}} 0' in text
+    assert f'cbf_robot_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f"cbf_robot_stage_bytes_total{{{labels}}} {300 * 1024}" in text
+
+
+def test_export_writes_selected_formats(tmp_path):
+    pipeline_metrics.reset()
+    assert export_metrics(str(tmp_path)) == [] # Nothing recorded
+    pipeline_metrics.observe("download", 0.3, competition="142", size_bytes=1000)
+    paths = export_metrics(str(tmp_path), formats="json")
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["pipeline_metrics.json"]
+    report = json.loads((tmp_path / "pipeline_metrics.json").read_text(encoding="utf-8"))
+    assert report["summary"][0]["stage"] == "download"
+    pipeline_metrics.reset()
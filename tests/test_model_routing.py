@@ -0,0 +1,83 @@
+import os
+import json
+import pytest
+from src import gemini
+from src.gemini import analyze_pdf, check_extract_consistency, load_model_tiers, routing_stats
+
+
+def _extract(net_result=100.0, total_attendance=30):
+    return {
+        "match_details": {"home_team": "A", "away_team": "B", "match_date": "2025-01-01",
+                          "stadium": "S", "competition": "C"},
+        "financial_data": {"gross_revenue": 300.0, "total_expenses": 200.0, "net_result": net_result,
+                           "revenue_details": [{"source": "INTEIRA", "quantity": 10, "price": 30.0, "amount": 300.0}],
+                           "expense_details": [{"category": "ARBITRAGEM", "amount": 200.0}]},
+        "audience_statistics": {"paid_attendance": 10, "non_paid_attendance": 20, "total_attendance": total_attendance},
+    }
+
+
+@pytest.fixture(autouse=True)
+def routing_env(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test_key")
+    monkeypatch.setenv("GEMINI_MODEL_TIERS", "cheap:0.1:0.4,strong:1:10")
+    monkeypatch.setenv("GEMINI_RETRY_COUNT", "1")
+    monkeypatch.setenv("ENABLE_FALLBACK", "false")
+    routing_stats.reset()
+
+
+def _fake_client(mocker, answers):
+    client = mocker.MagicMock()
+    responses = []
+    for payload in answers:
+        response = mocker.MagicMock()
+        response.parsed = None
+        response.text = json.dumps(payload)
+        response.usage_metadata.prompt_token_count = 1000
+        response.usage_metadata.candidates_token_count = 100
+        responses.append(response)
+    client.models.generate_content.side_effect = responses
+    mocker.patch.object(gemini, "setup_client", return_value=client)
+    return client
+
+
+def test_load_model_tiers_parses_prices():
+    tiers = load_model_tiers()
+    assert [t.model for t in tiers] == ["cheap", "strong"]
+    assert tiers[1].output_price == 10.0
+
+
+def test_consistency_checks_flag_arithmetic_errors():
+    assert check_extract_consistency(_extract()) == []
+    issues = check_extract_consistency(_extract(net_result=5.0, total_attendance=99))
+    assert len(issues) == 2
+
+
+def test_cheap_tier_accepted_without_escalation(mocker):
+    client = _fake_client(mocker, [_extract()])
+    result = analyze_pdf(b"%PDF-1.4", competition="142")
+    assert result["financial_data"]["net_result"] == 100.0
+    assert client.models.generate_content.call_count == 1
+    [row] = routing_stats.snapshot()
+    assert row["model"] == "cheap" and row["accepted"] == 1 and row["cost_usd"] > 0
+
+
+def test_inconsistent_answer_escalates_to_stronger_tier(mocker):
+    client = _fake_client(mocker, [_extract(net_result=5.0), _extract()])
+    result = analyze_pdf(b"%PDF-1.4", competition="142")
+    assert result["financial_data"]["net_result"] == 100.0
+    models = [call.kwargs["model"] for call in client.models.generate_content.call_args_list]
+    assert models == ["cheap", "strong"]
+    outcomes = {row["model"]: row for row in routing_stats.snapshot()}
+    assert outcomes["cheap"]["low_confidence"] == 1
+    assert outcomes["strong"]["accepted"] == 1
+
+
+def test_routing_reports_cover_one_run(tmp_path, mocker):
+    from src.main import run_operation
+    routing_stats.record("cheap", "142", "accepted", cost_usd=0.01)
+    report = gemini.write_routing_report(str(tmp_path))
+    assert os.path.basename(report).startswith("model_routing_") and len(json.load(open(report))) == 1
+
+    # A new operation starts from zero, so a long-lived GUI/scheduler does not re-report earlier runs
+    run_operation("1", 2025, [], str(tmp_path), str(tmp_path), "test_key", notifier=mocker.MagicMock())
+    assert routing_stats.snapshot() == []
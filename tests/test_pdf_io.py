@@ -0,0 +1,35 @@
+import hashlib
+from benchmarks.corpus import match_extract, render_pdf
+from src.gemini import fallback_extract
+from src.pdf_io import PdfSource, pdf_stream
+
+
+def test_pdf_source_maps_file_without_copy(tmp_path):
+    content = render_pdf(match_extract("1421b", 2024), padding=10000)
+    path = tmp_path / "1421b_2024.pdf"
+    path.write_bytes(content)
+
+    with PdfSource(path) as source:
+        assert source.size == len(content)
+        assert source.view.readonly and source.view[:5] == b"%PDF-"
+        assert source.sha256() == hashlib.sha256(content).hexdigest()
+        with pdf_stream(source.view) as stream:
+            assert stream.read(8) == content[:8]
+            stream.seek(-6, 2)
+            assert stream.read() == content[-6:]
+
+    empty = tmp_path / "empty.pdf"
+    empty.write_bytes(b"")
+    with PdfSource(empty) as source:
+        assert source.size == 0 and not source.view
+
+
+def test_fallback_extract_reads_mapped_pdf(tmp_path):
+    extract = match_extract("1422b", 2024)
+    path = tmp_path / "1422b_2024.pdf"
+    path.write_bytes(render_pdf(extract))
+
+    with PdfSource(path) as source:
+        from_view = fallback_extract(source.view)
+    assert from_view == fallback_extract(path.read_bytes())
+    assert from_view["financial_data"]["gross_revenue"] == extract["financial_data"]["gross_revenue"]
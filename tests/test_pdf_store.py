@@ -0,0 +1,62 @@
+import os
+from benchmarks.corpus import match_extract, render_pdf
+from src import scraper
+from src.pdf_store import PdfContentIndex, looks_like_pdf
+
+
+class _FakeResponse:
+    def __init__(self, body: bytes, content_type: str = "application/pdf"):
+        self.body = body
+        self.headers = {"Content-Type": content_type}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+def test_index_marks_duplicates_and_placeholders(tmp_path):
+    unique, template = render_pdf(match_extract("1421b", 2024)), render_pdf(match_extract("1422b", 2024))
+    for name, body in [("1421b_2024.pdf", unique), ("1422b_2024.pdf", template), ("1423b_2024.pdf", template),
+                       ("1424b_2024.pdf", template), ("1425b_2024.pdf", b"<html>Not found</html>")]:
+        (tmp_path / name).write_bytes(body)
+
+    index = PdfContentIndex(tmp_path, placeholder_copies=3)
+    assert index.sync(sorted(tmp_path.glob("*.pdf"))) == (5, 0)
+    assert index.get("1423b_2024.pdf")["duplicate_of"] == "1422b_2024.pdf"
+    assert "duplicate_of" not in index.get("1421b_2024.pdf")
+    assert index.is_placeholder(index.get("1422b_2024.pdf")["sha256"])
+    assert not index.get("1425b_2024.pdf")["is_pdf"] and not looks_like_pdf(b"<html>")
+    index.save()
+
+    reloaded = PdfContentIndex(tmp_path, placeholder_copies=3)
+    assert reloaded.sync(tmp_path.glob("*.pdf")) == (0, 5) # Unchanged files are not hashed again
+    assert reloaded.canonical(index.get("1424b_2024.pdf")["sha256"]) == "1422b_2024.pdf"
+
+
+def test_download_links_duplicates_and_rejects_non_pdf(tmp_path, monkeypatch):
+    pdf = render_pdf(match_extract("1421b", 2024))
+    bodies = {
+        "https://cbf.test/sumulas/2024/1421b.pdf": _FakeResponse(pdf),
+        "https://cbf.test/sumulas/2025/1421b.pdf": _FakeResponse(pdf),
+        "https://cbf.test/sumulas/2025/1422b.pdf": _FakeResponse(b"<!DOCTYPE html><p>Em breve</p>", "text/html"),
+    }
+    monkeypatch.setattr(scraper.requests, "get", lambda url, **kwargs: bodies[url])
+    index = PdfContentIndex(tmp_path)
+    logger = scraper.get_logger("test")
+
+    first = scraper._download_single_pdf("https://cbf.test/sumulas/2024/1421b.pdf", 2024, "142", str(tmp_path), logger, index)
+    second = scraper._download_single_pdf("https://cbf.test/sumulas/2025/1421b.pdf", 2025, "142", str(tmp_path), logger, index)
+    rejected = scraper._download_single_pdf("https://cbf.test/sumulas/2025/1422b.pdf", 2025, "142", str(tmp_path), logger, index)
+
+    assert os.path.samefile(first, second) # Hard link, stored once
+    assert index.get("1421b_2025.pdf")["duplicate_of"] == "1421b_2024.pdf"
+    assert rejected is None and sorted(p.name for p in tmp_path.iterdir()) == ["1421b_2024.pdf", "1421b_2025.pdf"]
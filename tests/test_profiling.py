@@ -0,0 +1,38 @@
+import threading
+from src.profiling import RunProfiler
+
+
+def _busy_worker(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(2000))
+
+
+def test_stage_profiles_are_written(tmp_path):
+    profiler = RunProfiler(enabled=True, report_dir=str(tmp_path), top_n=5, sample_interval=0.002)
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_worker, args=(stop,))
+    with profiler.stage("process", memory=True):
+        worker.start()
+        blocks = [bytearray(1024) for _ in range(2000)]
+        stop.wait(0.2)
+        stop.set()
+        worker.join()
+    with profiler.stage("normalize"):
+        sorted(range(10000), key=lambda i: -i)
+    output = profiler.finish()
+
+    assert {p.name for p in output.iterdir()} == {
+        "process.pstats", "normalize.pstats", "samples.folded", "memory_process.txt", "summary.txt"}
+    summary = (output / "summary.txt").read_text(encoding="utf-8")
+    assert "=== Stage process" in summary and "Peak traced memory" in summary
+    assert "_busy_worker" in (output / "samples.folded").read_text(encoding="utf-8") # Other threads are sampled
+    assert profiler.memory["process"]["peak_bytes"] >= 2000 * 1024
+    assert len(blocks) == 2000
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    profiler = RunProfiler(enabled=False, report_dir=str(tmp_path))
+    with profiler.stage("process", memory=True):
+        pass
+    assert profiler.finish() is None
+    assert not any(tmp_path.iterdir())
@@ -0,0 +1,55 @@
+import csv
+import json
+from src import normalize
+from src.normalize import merge_proposals, refresh_lookups
+
+
+def test_merge_proposals_flags_conflicts():
+    lookups = {"teams": {"BAHIA - BA": "Bahia"}}
+    proposals = {"teams": {"VASCO": {"Vasco da Gama"}, "BOTAFOGO": {"Botafogo", "Botafogo-SP"},
+                           "BAHIA - BA": {"EC Bahia"}}}
+    new_mappings, conflicts = merge_proposals(lookups, proposals)
+    assert new_mappings == {"teams": {"VASCO": "Vasco da Gama"}}
+    assert sorted(c["name"] for c in conflicts) == ["BAHIA - BA", "BOTAFOGO"]
+
+
+def test_refresh_lookups_chunks_ambiguous_names(tmp_path, monkeypatch, mocker):
+    monkeypatch.setenv("NORMALIZATION_CHUNK_SIZE", "2")
+    monkeypatch.chdir(tmp_path)
+    raw = tmp_path / "jogos_resumo.csv"
+    with open(raw, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id_jogo_cbf", "data_jogo", "time_mandante", "time_visitante", "estadio", "competicao"])
+        writer.writerow(["1", "d", "ALPHA", "BRAVO", "", ""])
+        writer.writerow(["2", "d", "CHARLIE", "DELTA", "", ""])
+        writer.writerow(["3", "d", "ECHO", "ALPHA", "", ""])
+
+    def fake_gemini(names, context, category, api_key):
+        return {name: name.title() for name in names}
+
+    gemini = mocker.patch.object(normalize, "call_gemini_for_normalization", side_effect=fake_gemini)
+    refresh_lookups(raw, tmp_path / "lookups", "key")
+
+    assert gemini.call_count == 3
+    assert all(len(call.args[0]) <= 2 for call in gemini.call_args_list)
+    teams = json.loads((tmp_path / "lookups" / "teams_lookup.json").read_text(encoding="utf-8"))
+    assert teams == {"ALPHA": "Alpha", "BRAVO": "Bravo", "CHARLIE": "Charlie", "DELTA": "Delta", "ECHO": "Echo"}
+
+
+def test_chunks_disagreeing_on_one_name_are_reported(tmp_path, monkeypatch, mocker):
+    monkeypatch.setenv("NORMALIZATION_CHUNK_SIZE", "1")
+    monkeypatch.setenv("NORMALIZATION_REPORT_DIR", str(tmp_path / "out"))
+    store = normalize.get_lookup_store(tmp_path / "lookups")
+    # Two spellings of the same club land in different chunks and come back with different names
+    answers = {"BAHIA - BA": "Bahia", "Bahia (BA)": "EC Bahia", "VASCO": "Vasco da Gama"}
+    mocker.patch.object(normalize, "call_gemini_for_normalization",
+                        side_effect=lambda names, context, category, api_key: {n: answers[n] for n in names})
+    normalize.normalize_new_names(store, {"teams": sorted(answers)}, tmp_path / "lookups", "key")
+    normalize.normalize_new_names(store, {"teams": ["BAHIA - BA", "Bahia (BA)"]}, tmp_path / "lookups", "key")
+
+    assert dict(store.mapping("teams")) == {"VASCO": "Vasco da Gama"}
+    reports = sorted((tmp_path / "out").glob("normalization_conflicts_*.json"))
+    assert len(reports) == 2 # One per run, not one per day
+    conflicts = json.loads(reports[0].read_text(encoding="utf-8"))["conflicts"]
+    assert [(c["name"], c["candidates"]) for c in conflicts] == [("BAHIA - BA", ["Bahia", "EC Bahia"]),
+                                                                 ("Bahia (BA)", ["Bahia", "EC Bahia"])]
@@ -0,0 +1,21 @@
+from src.sanitize import RepairCounter, sanitize_record, sanitize_text
+
+
+def test_sanitize_text_repairs_lookalikes_mojibake_and_spacing():
+    assert sanitize_text("RED BULL BRAGANTIΝΟ") == ("RED BULL BRAGANTINO", True)
+    assert sanitize_text("SÃ£O PAULO") == ("SãO PAULO", True)
+    assert sanitize_text("ARQUIBANCADA  -\u200b MEIA ") == ("ARQUIBANCADA - MEIA", True)
+    assert sanitize_text("Maracanã") == ("Maracanã", False)
+
+
+def test_sanitize_record_counts_repairs_per_field():
+    counter = RepairCounter()
+    record = {
+        "match_details": {"home_team": "ΒΑΗΙΑ", "away_team": "Vitória"},
+        "financial_data": {"gross_revenue": 10.0,
+                           "revenue_details": [{"source": "ΜΕΙΑ"}, {"source": "INTEIRA"}, {"source": "SÓCIO  "}]},
+    }
+    cleaned = sanitize_record(record, counter)
+    assert cleaned["match_details"]["home_team"] == "BAHIA"
+    assert [d["source"] for d in cleaned["financial_data"]["revenue_details"]] == ["MEIA", "INTEIRA", "SÓCIO"]
+    assert counter.as_dict() == {"match_details.home_team": 1, "financial_data.revenue_details[].source": 2}
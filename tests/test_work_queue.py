@@ -0,0 +1,71 @@
+import datetime
+from src.work_queue import ExtractionQueue, match_recency
+
+
+def _touch(pdf_dir, *names):
+    paths = []
+    for name in names:
+        path = pdf_dir / name
+        path.write_bytes(b"%PDF-1.4\n")
+        paths.append(path)
+    return paths
+
+
+def test_match_recency_compares_rounds_across_competitions():
+    assert match_recency("14210b_2025.pdf") == (2025, 1, 10) # Série A round 1, match 0
+    assert match_recency("142389b_2025.pdf") == (2025, 38, 389)
+    assert match_recency("242380b_2025.pdf")[1] == 38
+    assert match_recency("424150b_2025.pdf")[1] == 38
+    assert match_recency("notes.pdf") == (0, 0, 0)
+
+
+def test_queue_orders_by_recency_priority_and_retries(tmp_path):
+    paths = _touch(tmp_path, "242300b_2024.pdf", "242300b_2025.pdf", "142300b_2025.pdf", "14210b_2025.pdf",
+                   "142301b_2025.pdf", "14211b_2025.pdf")
+    queue = ExtractionQueue(tmp_path, competition_priority=["142", "242"], base_delay=0)
+    assert queue.sync(paths, processed_ids={"14211b_2025"}) == 5
+
+    # Round 30 of 2025 first (Série A before Série B, newest match first), then older rounds and years
+    assert queue.ordered() == ["142301b_2025.pdf", "142300b_2025.pdf", "242300b_2025.pdf",
+                               "14210b_2025.pdf", "242300b_2024.pdf"]
+    assert queue.ordered(limit=2) == ["142301b_2025.pdf", "142300b_2025.pdf"]
+
+    queue.fail("142301b_2025.pdf", "parse_error")
+    queue.complete("142300b_2025.pdf")
+    queue.save()
+
+    reloaded = ExtractionQueue(tmp_path, competition_priority=["142", "242"], base_delay=0)
+    assert reloaded.ordered()[0] == "242300b_2025.pdf" and reloaded.ordered()[-1] == "142301b_2025.pdf"
+    assert reloaded.untried() == 3
+    # Processed or deleted files leave the queue on the next sync; the retry count of the rest survives
+    (tmp_path / "242300b_2024.pdf").unlink()
+    assert reloaded.sync(tmp_path.glob("*.pdf"), processed_ids={"14211b_2025", "142300b_2025"}) == 0
+    assert len(reloaded) == 3 and reloaded.ordered()[-1] == "142301b_2025.pdf"
+
+
+def test_failed_pdfs_back_off_and_dead_letter(tmp_path):
+    paths = _touch(tmp_path, "14210b_2025.pdf", "14211b_2025.pdf", "14212b_2025.pdf")
+    queue = ExtractionQueue(tmp_path, max_attempts=3, base_delay=60, max_delay=100)
+    queue.sync(paths, processed_ids=set())
+    now = datetime.datetime(2025, 6, 1, 12, 0, 0)
+
+    assert queue.fail("14210b_2025.pdf", "parse_error", now=now)["next_attempt_at"] == "2025-06-01T12:01:00"
+    assert "14210b_2025.pdf" not in queue.ordered(now=now + datetime.timedelta(seconds=59))
+    assert "14210b_2025.pdf" in queue.ordered(now=now + datetime.timedelta(seconds=60))
+    assert queue.fail("14210b_2025.pdf", "parse_error", now=now)["next_attempt_at"] == "2025-06-01T12:01:40" # Capped
+    # Outages, bad keys and network errors back off but do not count toward dead-lettering
+    for error_class in ("quota", "api_error", "ConfigurationError", "OSError", None):
+        assert not queue.fail("14210b_2025.pdf", error_class, now=now).get("dead")
+    assert queue.fail("14210b_2025.pdf", "validation", now=now)["dead"]
+    queue.fail("14211b_2025.pdf", "not_pdf", now=now) # Permanent: dead at once
+
+    later = now + datetime.timedelta(days=30)
+    assert queue.ordered(now=later) == ["14212b_2025.pdf"]
+    assert set(queue.dead_letters()) == {"14210b_2025.pdf", "14211b_2025.pdf"}
+    assert queue.dead_letters()["14210b_2025.pdf"]["attempts"] == 8
+    queue.save()
+
+    reloaded = ExtractionQueue(tmp_path, max_attempts=3)
+    assert reloaded.dead_letters()["14210b_2025.pdf"]["last_error_class"] == "validation"
+    assert reloaded.requeue() == ["14210b_2025.pdf", "14211b_2025.pdf"]
+    assert len(reloaded.ordered(now=later)) == 3